@@ -20,9 +20,23 @@ fileConfig(config.config_file_name)
 
 from app.models import SQLModel  # noqa
 from app.core.config import settings # noqa
+from app.core.partitions import is_partition  # noqa
 
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Partitions are created at runtime, they aren't part of the models. A
+    # foreign key to a partitioned table also gets one reflected constraint
+    # per referenced partition.
+    if not reflected:
+        return True
+    if type_ == "table":
+        return not is_partition(name)
+    if type_ == "foreign_key_constraint":
+        return not is_partition(object.referred_table.name)
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,7 +61,11 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -71,7 +89,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
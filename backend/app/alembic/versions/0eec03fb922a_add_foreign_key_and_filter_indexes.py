@@ -0,0 +1,50 @@
+"""add_foreign_key_and_filter_indexes
+
+Revision ID: 0eec03fb922a
+Revises: 6bce073103ce
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0eec03fb922a'
+down_revision = '6bce073103ce'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra index options)
+INDEXES = [
+    ('ix_item_owner_id', 'item', ['owner_id'], {}),
+    ('ix_orientation_owner_id', 'orientation', ['owner_id'], {}),
+    ('ix_orientationtrait_orientation_id', 'orientationtrait', ['orientation_id'], {}),
+    ('ix_appointment_user_id', 'appointment', ['user_id'], {}),
+    ('ix_questionnairetemplate_created_by_id', 'questionnairetemplate', ['created_by_id'], {}),
+    ('ix_questionnairetemplate_title_active', 'questionnairetemplate', ['title'], {'postgresql_where': sa.text('is_active')}),
+    ('ix_question_questionnaire_id', 'question', ['questionnaire_id'], {}),
+    ('ix_questionnaireassignment_user_id', 'questionnaireassignment', ['user_id'], {}),
+    ('ix_questionnaireassignment_questionnaire_id', 'questionnaireassignment', ['questionnaire_id'], {}),
+    ('ix_questionnaireassignment_appointment_id', 'questionnaireassignment', ['appointment_id'], {'postgresql_where': sa.text('appointment_id IS NOT NULL')}),
+    ('ix_questionnaireresponse_user_id', 'questionnaireresponse', ['user_id'], {}),
+    ('ix_answer_response_id', 'answer', ['response_id'], {'postgresql_include': ['question_id', 'likert_value']}),
+    ('ix_answer_question_id', 'answer', ['question_id'], {}),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            create_index_concurrently(name, table, columns, **options)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True
+            )
@@ -0,0 +1,39 @@
+"""Index orientation traits by name and value
+
+Revision ID: 2f6b9d4e8a13
+Revises: 8d4a6c2e1b95
+Create Date: 2026-10-19 16:44:27.385345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_concurrently
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6b9d4e8a13'
+down_revision = '8d4a6c2e1b95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            'ix_orientationtrait_name_value',
+            'orientationtrait',
+            ['name', 'value'],
+            postgresql_include=['orientation_id'],
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orientationtrait_name_value',
+            table_name='orientationtrait',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
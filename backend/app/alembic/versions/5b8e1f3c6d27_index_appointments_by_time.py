@@ -0,0 +1,57 @@
+"""Index appointments by time
+
+Revision ID: 5b8e1f3c6d27
+Revises: 7c2e9a41f0d3
+Create Date: 2026-10-19 16:32:54.280640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_concurrently
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e1f3c6d27'
+down_revision = '7c2e9a41f0d3'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_appointment_user_id_appointment_datetime', ['user_id', 'appointment_datetime', 'id']),
+    ('ix_appointment_appointment_datetime', ['appointment_datetime', 'id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            create_index_concurrently(name, 'appointment', columns)
+        # (user_id, appointment_datetime) covers the user_id foreign key
+        op.drop_index(
+            'ix_appointment_user_id',
+            table_name='appointment',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appointment_user_id',
+            'appointment',
+            ['user_id'],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='appointment',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,172 @@
+"""partition_responses_and_answers
+
+Revision ID: 90c3adab2e4d
+Revises: ff93e9ee8c30
+Create Date: 2026-10-19 15:30:52.902354
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '90c3adab2e4d'
+down_revision = 'ff93e9ee8c30'
+branch_labels = None
+depends_on = None
+
+
+# Months of partitions created past the current one, like
+# settings.PARTITION_MONTHS_AHEAD; init_db keeps creating them afterwards
+MONTHS_AHEAD = 3
+
+# One partition per month from the oldest response on, plus a default
+# partition for anything outside them
+CREATE_PARTITIONS = f"""
+DO $$
+DECLARE
+    parent text;
+    month timestamp;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['questionnaireresponse', 'answer'] LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+        FOR month IN SELECT generate_series(
+            date_trunc('month', coalesce(
+                (SELECT min(completed_at) FROM questionnaireresponse_unpartitioned),
+                now() AT TIME ZONE 'utc'
+            )),
+            date_trunc('month', now() AT TIME ZONE 'utc') + interval '{MONTHS_AHEAD} months',
+            interval '1 month'
+        ) LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_p' || to_char(month, 'YYYYMM'),
+                parent,
+                month,
+                month + interval '1 month'
+            );
+        END LOOP;
+    END LOOP;
+END $$
+"""
+
+
+def upgrade():
+    # An existing table can't be turned into a partitioned one: the data is
+    # copied into new tables, which blocks writes to responses until done.
+    # Index and constraint names are unique per schema, so the old ones are
+    # dropped before the new tables take them.
+    op.rename_table('answer', 'answer_unpartitioned')
+    op.rename_table('questionnaireresponse', 'questionnaireresponse_unpartitioned')
+    op.drop_constraint('answer_response_id_fkey', 'answer_unpartitioned', type_='foreignkey')
+    op.drop_constraint('answer_pkey', 'answer_unpartitioned', type_='primary')
+    op.drop_index('ix_answer_response_id', table_name='answer_unpartitioned')
+    op.drop_index('ix_answer_question_id', table_name='answer_unpartitioned')
+    op.drop_constraint('questionnaireresponse_pkey', 'questionnaireresponse_unpartitioned', type_='primary')
+    op.drop_constraint('questionnaireresponse_assignment_id_key', 'questionnaireresponse_unpartitioned', type_='unique')
+    op.drop_index('ix_questionnaireresponse_user_id', table_name='questionnaireresponse_unpartitioned')
+    op.drop_index('ix_questionnaireresponse_completed_at', table_name='questionnaireresponse_unpartitioned')
+
+    op.create_table('questionnaireresponse',
+    sa.Column('total_score', sa.Integer(), nullable=True),
+    sa.Column('manual_score_override', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('assignment_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assignment_id'], ['questionnaireassignment.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'completed_at'),
+    postgresql_partition_by='RANGE (completed_at)'
+    )
+    op.create_index(op.f('ix_questionnaireresponse_assignment_id'), 'questionnaireresponse', ['assignment_id'], unique=False)
+    op.create_index(op.f('ix_questionnaireresponse_user_id'), 'questionnaireresponse', ['user_id'], unique=False)
+    op.create_index(op.f('ix_questionnaireresponse_completed_at'), 'questionnaireresponse', ['completed_at'], unique=False)
+    op.create_table('answer',
+    sa.Column('likert_value', sa.Integer(), nullable=True),
+    sa.Column('text_response', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.Column('response_id', sa.Uuid(), nullable=False),
+    sa.Column('question_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['response_id', 'completed_at'], ['questionnaireresponse.id', 'questionnaireresponse.completed_at'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'completed_at'),
+    postgresql_partition_by='RANGE (completed_at)'
+    )
+    op.create_index('ix_answer_response_id', 'answer', ['response_id', 'completed_at'], unique=False, postgresql_include=['question_id', 'likert_value'])
+    op.create_index(op.f('ix_answer_question_id'), 'answer', ['question_id'], unique=False)
+    op.execute(CREATE_PARTITIONS)
+
+    op.execute(
+        'INSERT INTO questionnaireresponse'
+        ' (id, assignment_id, user_id, completed_at, total_score, manual_score_override)'
+        ' SELECT id, assignment_id, user_id, completed_at, total_score, manual_score_override'
+        ' FROM questionnaireresponse_unpartitioned'
+    )
+    op.execute(
+        'INSERT INTO answer'
+        ' (id, response_id, completed_at, question_id, likert_value, text_response)'
+        ' SELECT a.id, a.response_id, r.completed_at, a.question_id, a.likert_value, a.text_response'
+        ' FROM answer_unpartitioned a'
+        ' JOIN questionnaireresponse_unpartitioned r ON r.id = a.response_id'
+    )
+    op.drop_table('answer_unpartitioned')
+    op.drop_table('questionnaireresponse_unpartitioned')
+    op.execute('ANALYZE questionnaireresponse')
+    op.execute('ANALYZE answer')
+
+
+def downgrade():
+    op.rename_table('answer', 'answer_partitioned')
+    op.rename_table('questionnaireresponse', 'questionnaireresponse_partitioned')
+    op.drop_constraint('answer_response_id_completed_at_fkey', 'answer_partitioned', type_='foreignkey')
+    op.drop_constraint('answer_pkey', 'answer_partitioned', type_='primary')
+    op.drop_index('ix_answer_response_id', table_name='answer_partitioned')
+    op.drop_index('ix_answer_question_id', table_name='answer_partitioned')
+    op.drop_constraint('questionnaireresponse_pkey', 'questionnaireresponse_partitioned', type_='primary')
+    op.drop_index('ix_questionnaireresponse_assignment_id', table_name='questionnaireresponse_partitioned')
+    op.drop_index('ix_questionnaireresponse_user_id', table_name='questionnaireresponse_partitioned')
+    op.drop_index('ix_questionnaireresponse_completed_at', table_name='questionnaireresponse_partitioned')
+
+    op.create_table('questionnaireresponse',
+    sa.Column('total_score', sa.Integer(), nullable=True),
+    sa.Column('manual_score_override', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('assignment_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assignment_id'], ['questionnaireassignment.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('assignment_id')
+    )
+    op.create_index(op.f('ix_questionnaireresponse_user_id'), 'questionnaireresponse', ['user_id'], unique=False)
+    op.create_index(op.f('ix_questionnaireresponse_completed_at'), 'questionnaireresponse', ['completed_at'], unique=False)
+    op.create_table('answer',
+    sa.Column('likert_value', sa.Integer(), nullable=True),
+    sa.Column('text_response', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('response_id', sa.Uuid(), nullable=False),
+    sa.Column('question_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['response_id'], ['questionnaireresponse.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_answer_response_id', 'answer', ['response_id'], unique=False, postgresql_include=['question_id', 'likert_value'])
+    op.create_index(op.f('ix_answer_question_id'), 'answer', ['question_id'], unique=False)
+
+    op.execute(
+        'INSERT INTO questionnaireresponse'
+        ' (id, assignment_id, user_id, completed_at, total_score, manual_score_override)'
+        ' SELECT id, assignment_id, user_id, completed_at, total_score, manual_score_override'
+        ' FROM questionnaireresponse_partitioned'
+    )
+    op.execute(
+        'INSERT INTO answer (id, response_id, question_id, likert_value, text_response)'
+        ' SELECT id, response_id, question_id, likert_value, text_response'
+        ' FROM answer_partitioned'
+    )
+    op.drop_table('answer_partitioned')
+    op.drop_table('questionnaireresponse_partitioned')
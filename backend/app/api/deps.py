@@ -2,7 +2,7 @@ from collections.abc import Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -10,7 +10,14 @@ from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import engine, replica_engines
+from app.core.metrics import record_threadpool_entry
+from app.core.replicas import (
+    ReplicaRouter,
+    RoutingSession,
+    record_session_writes,
+    uses_replicas,
+)
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -18,9 +25,28 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+replica_router = ReplicaRouter(replica_engines)
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
+    # Sync dependencies run in the threadpool, so this is the first point
+    # where the request has been picked up by a worker thread
+    record_threadpool_entry()
+    if not replica_router.replicas:
+        with Session(engine) as session:
+            yield session
+        return
+
+    session = (
+        RoutingSession(engine, replica_router)
+        if uses_replicas(request.scope)
+        else Session(engine)
+    )
+    with session:
         yield session
+        # Runs before the response is sent, so the user's next request
+        # already avoids replicas that haven't replayed this one
+        record_session_writes(session, replica_router)
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
@@ -38,6 +64,8 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    # Lets a replica routing session keep the user's own writes visible
+    session.info["user_id"] = token_data.sub
     user = session.get(User, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
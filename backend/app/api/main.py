@@ -1,6 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, login, orientations, private, users, utils, questionnaires
+from app.api.routes import (
+    items,
+    jobs,
+    login,
+    orientations,
+    private,
+    questionnaires,
+    users,
+    utils,
+)
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -9,7 +18,10 @@ api_router.include_router(users.router)
 api_router.include_router(utils.router)
 api_router.include_router(items.router)
 api_router.include_router(orientations.router)
-api_router.include_router(questionnaires.router, prefix="/questionnaires", tags=["questionnaires"])
+api_router.include_router(
+    questionnaires.router, prefix="/questionnaires", tags=["questionnaires"]
+)
+api_router.include_router(jobs.router)
 
 
 if settings.ENVIRONMENT == "local":
@@ -0,0 +1,72 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import Table
+from sqlmodel import SQLModel
+
+from app import crud
+from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.core.bulk_delete import bulk_delete_job
+from app.core.jobs import run_job
+from app.models import (
+    BulkDeleteCreate,
+    BulkDeleteTarget,
+    Job,
+    JobPublic,
+    QuestionnaireTemplate,
+    User,
+)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+BULK_DELETE_MODELS: dict[BulkDeleteTarget, type[SQLModel]] = {
+    BulkDeleteTarget.USER: User,
+    BulkDeleteTarget.QUESTIONNAIRE_TEMPLATE: QuestionnaireTemplate,
+}
+
+
+@router.post(
+    "/bulk-delete",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=JobPublic,
+    status_code=202,
+)
+def create_bulk_delete_job(
+    session: SessionDep,
+    current_user: CurrentUser,
+    job_in: BulkDeleteCreate,
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Delete a user or questionnaire template and everything under it in the background.
+    """
+    model = BULK_DELETE_MODELS[job_in.target]
+    if not session.get(model, job_in.target_id):
+        raise HTTPException(status_code=404, detail="Delete target not found")
+    if model is User and job_in.target_id == current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Super users are not allowed to delete themselves"
+        )
+    job = crud.create_job(
+        session=session,
+        kind=f"bulk_delete_{job_in.target.value.lower()}",
+        target_id=job_in.target_id,
+        created_by_id=current_user.id,
+    )
+    table: Table = model.__table__  # type: ignore[attr-defined]
+    background_tasks.add_task(run_job, job.id, bulk_delete_job(table, job_in.target_id))
+    return job
+
+
+@router.get("/{job_id}", response_model=JobPublic)
+def read_job(job_id: uuid.UUID, session: SessionDep, current_user: CurrentUser) -> Any:
+    """
+    Get the status of a background job.
+    """
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not current_user.is_superuser and job.created_by_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return job
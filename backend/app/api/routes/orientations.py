@@ -1,55 +1,193 @@
+import operator
+import re
 import uuid
-from typing import Any
+from collections.abc import Callable
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import selectinload
+from sqlmodel import col, func, select
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.core.db import engine
+from app.core.querylog import query_budget
+from app.core.replicas import replica_reads
+from app.core.similarity import SimilarityIndex, VectorSet
 from app.crud import create_orientation, update_orientation
 from app.models import (
+    Message,
     Orientation,
     OrientationCreate,
     OrientationPublic,
     OrientationsPublic,
+    OrientationTrait,
     OrientationUpdate,
-    Message,
+    SimilarOrientation,
+    SimilarOrientationsPublic,
+    TraitHistogram,
+    TraitHistogramBucket,
+    TraitsStatsPublic,
+    TraitStats,
 )
 
 router = APIRouter(prefix="/orientations", tags=["orientations"])
 
+similarity_index = SimilarityIndex(engine)
+
+
+_TRAIT_FILTER = re.compile(
+    r"^\s*(?P<name>[^<>=!]*[^<>=!\s])\s*(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>\d+)\s*$"
+)
+_COMPARISONS: dict[str, Callable[[Any, int], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+TraitFilters = Annotated[
+    list[str] | None,
+    Query(
+        alias="trait",
+        description="`name<op>value` with op one of > >= < <= = !=, e.g. "
+        "`openness>70`. Repeat to require several.",
+    ),
+]
+
+
+def _trait_filters(expressions: list[str] | None) -> list[Any]:
+    # Each filter is a range of ix_orientationtrait_name_value, an index-only
+    # scan yielding the ids of the matching orientations
+    filters: list[Any] = []
+    for expression in expressions or []:
+        match = _TRAIT_FILTER.match(expression)
+        if not match or int(match["value"]) > 100:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid trait filter {expression!r}, expected e.g. "
+                "'openness>70' with a value from 0 to 100",
+            )
+        compare = _COMPARISONS[match["op"]]
+        filters.append(
+            col(Orientation.id).in_(
+                select(OrientationTrait.orientation_id).where(
+                    OrientationTrait.name == match["name"],
+                    compare(OrientationTrait.value, int(match["value"])),
+                )
+            )
+        )
+    return filters
+
 
 @router.get("/", response_model=OrientationsPublic)
+@query_budget(4)
+@replica_reads
 def read_orientations(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    traits: TraitFilters = None,
 ) -> Any:
     """
-    Retrieve orientations.
+    Retrieve orientations, optionally only those whose traits match every `trait` filter.
     """
+    filters = _trait_filters(traits)
+    if not current_user.is_superuser:
+        filters.append(Orientation.owner_id == current_user.id)
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Orientation)
-        count = session.exec(count_statement).one()
-        statement = select(Orientation).offset(skip).limit(limit)
-        orientations = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Orientation)
-            .where(Orientation.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Orientation)
-            .where(Orientation.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        orientations = session.exec(statement).all()
+    count_statement = select(func.count()).select_from(Orientation).where(*filters)
+    count = session.exec(count_statement).one()
+    statement = (
+        select(Orientation)
+        .where(*filters)
+        .options(selectinload(Orientation.traits))  # type: ignore[arg-type]
+        .offset(skip)
+        .limit(limit)
+    )
+    orientations = session.exec(statement).all()
 
     return OrientationsPublic(data=orientations, count=count)
 
 
+@router.get(
+    "/traits",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=TraitsStatsPublic,
+)
+@query_budget(2)
+@replica_reads
+def read_trait_stats(session: SessionDep, traits: TraitFilters = None) -> Any:
+    """
+    Get the value statistics of every trait name, over the orientations matching the `trait` filters (Admin only).
+    """
+    statement = select(  # type: ignore[call-overload]
+        OrientationTrait.name,
+        func.count(),
+        func.avg(OrientationTrait.value),
+        func.percentile_cont(0.5).within_group(col(OrientationTrait.value)),
+        func.min(OrientationTrait.value),
+        func.max(OrientationTrait.value),
+    )
+    filters = _trait_filters(traits)
+    if filters:
+        statement = statement.join(Orientation).where(*filters)
+    rows = session.exec(
+        statement.group_by(OrientationTrait.name).order_by(OrientationTrait.name)
+    ).all()
+    return TraitsStatsPublic(
+        data=[
+            TraitStats(
+                name=name,
+                count=count,
+                average=average,
+                median=median,
+                minimum=minimum,
+                maximum=maximum,
+            )
+            for name, count, average, median, minimum, maximum in rows
+        ]
+    )
+
+
+@router.get(
+    "/traits/{name}/histogram",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=TraitHistogram,
+)
+@query_budget(2)
+@replica_reads
+def read_trait_histogram(
+    session: SessionDep,
+    name: str,
+    width: int = Query(default=10, ge=1, le=101),
+    traits: TraitFilters = None,
+) -> Any:
+    """
+    Count a trait's values in buckets of `width`, over the orientations matching the `trait` filters (Admin only).
+    """
+    bucket = (col(OrientationTrait.value) // width).label("bucket")
+    statement = select(bucket, func.count()).where(OrientationTrait.name == name)
+    filters = _trait_filters(traits)
+    if filters:
+        statement = statement.join(Orientation).where(*filters)
+    counts = dict(session.exec(statement.group_by(bucket)).all())
+
+    buckets = [
+        TraitHistogramBucket(
+            lower=index * width,
+            upper=min(index * width + width - 1, 100),
+            count=counts.get(index, 0),
+        )
+        for index in range(100 // width + 1)
+    ]
+    return TraitHistogram(name=name, count=sum(counts.values()), buckets=buckets)
+
+
 @router.get("/{id}", response_model=OrientationPublic)
+@replica_reads
 def read_orientation(
     session: SessionDep, current_user: CurrentUser, id: uuid.UUID
 ) -> Any:
@@ -64,6 +202,57 @@ def read_orientation(
     return orientation
 
 
+@router.get("/{id}/similar", response_model=SimilarOrientationsPublic)
+@query_budget(5)
+@replica_reads
+def read_similar_orientations(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    k: int = Query(default=10, ge=1, le=100),
+) -> Any:
+    """
+    Get the k orientations with the closest trait values, nearest first.
+    """
+    orientation = session.get(Orientation, id)
+    if not orientation:
+        raise HTTPException(status_code=404, detail="Orientation not found")
+    if not current_user.is_superuser and (orientation.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    if current_user.is_superuser:
+        # The index can be a little behind, leave room for deleted orientations
+        matches = similarity_index.search(
+            orientation.trait_vector, k + 10, exclude=orientation.id
+        )
+    else:
+        # Users only see their own, few enough to search on the spot
+        rows = session.exec(
+            select(Orientation.id, Orientation.trait_vector).where(
+                Orientation.owner_id == current_user.id
+            )
+        ).all()
+        matches = VectorSet.build(rows, ann_min_rows=len(rows) + 1).search(
+            orientation.trait_vector, k, exclude=orientation.id
+        )
+
+    found = {
+        o.id: o
+        for o in session.exec(
+            select(Orientation)
+            .where(col(Orientation.id).in_([match_id for match_id, _ in matches]))
+            .options(selectinload(Orientation.traits))  # type: ignore[arg-type]
+        ).all()
+    }
+    return SimilarOrientationsPublic(
+        data=[
+            SimilarOrientation(orientation=found[match_id], distance=distance)
+            for match_id, distance in matches
+            if match_id in found
+        ][:k]
+    )
+
+
 @router.post("/", response_model=OrientationPublic)
 def create_orientation_endpoint(
     *, session: SessionDep, current_user: CurrentUser, orientation_in: OrientationCreate
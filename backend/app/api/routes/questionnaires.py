@@ -1,14 +1,26 @@
 import uuid
-from datetime import datetime, timedelta
-from typing import Any
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Annotated, Any, TypeVar
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select, col
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import selectinload
+from sqlmodel import func, select, col, literal, union_all
 
 from app import crud
+from app.api import deps
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.core import events, ical, idempotency, serialization
+from app.core.db import engine
+from app.core.querylog import query_budget
+from app.core.replicas import RoutingSession, replica_reads
 from app.models import (
     Message,
+    Question,
+    QuestionPublic,
     QuestionnaireTemplate,
     QuestionnaireTemplateCreate,
     QuestionnaireTemplatePublic,
@@ -20,22 +32,148 @@ from app.models import (
     QuestionnaireAssignmentPublic,
     QuestionnaireAssignmentsPublic,
     QuestionnaireResponse,
+    QuestionnaireResponseArchive,
     QuestionnaireResponseCreate,
     QuestionnaireResponsePublic,
     QuestionnaireResponsesPublic,
     QuestionnaireResponseUpdate,
     Appointment,
     AppointmentCreate,
+    AppointmentDayPublic,
     AppointmentPublic,
+    AppointmentStatus,
     AppointmentsPublic,
     AppointmentUpdate,
     AssignmentStatus,
+    Answer,
+    AnswerArchive,
+    QuestionnaireDraft,
+    QuestionnaireDraftPublic,
+    QuestionnaireDraftSummary,
+    QuestionnaireDraftUpdate,
+    ResponseScoreStats,
     User,
 )
 from fastapi import Depends
 
 router = APIRouter()
 
+# Eager loaders for the nested public models, so list endpoints don't lazy load
+# each answer's question one row at a time
+_response_answers_loader = selectinload(
+    QuestionnaireResponse.answers  # type: ignore[arg-type]
+).selectinload(Answer.question)  # type: ignore[arg-type]
+_archived_answers_loader = selectinload(
+    QuestionnaireResponseArchive.answers  # type: ignore[arg-type]
+).selectinload(AnswerArchive.question)  # type: ignore[arg-type]
+
+# Hot list endpoints build their pages from row tuples of these fields
+_assignment_row = serialization.RowSerializer(
+    QuestionnaireAssignmentPublic, QuestionnaireAssignment, exclude={"questionnaire"}
+)
+_template_row = serialization.RowSerializer(
+    QuestionnaireTemplatePublic, QuestionnaireTemplate, exclude={"questions"}
+)
+_question_row = serialization.RowSerializer(QuestionPublic, Question)
+_appointment_row = serialization.RowSerializer(AppointmentPublic, Appointment)
+
+S = TypeVar("S", bound=Select[Any])
+
+
+def _page(
+    statement: S,
+    id_column: Any,
+    *,
+    skip: int,
+    limit: int,
+    after: uuid.UUID | None,
+) -> S:
+    # Ids are UUIDv7, so ordering by them follows creation. Passing the last id
+    # of the previous page as ``after`` seeks through the primary key instead
+    # of reading and discarding ``skip`` rows
+    if after is not None:
+        statement = statement.where(id_column > after)
+    return statement.order_by(id_column).offset(skip).limit(limit)
+
+
+def _utc(value: datetime) -> datetime:
+    # Datetimes are stored as naive UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _assignment_page(
+    session: SessionDep, statement: Select[Any], count: int
+) -> ORJSONResponse:
+    # Assignments, then their templates and questions by template id, like
+    # selectinload would, without building ORM objects or public models
+    # on the way
+    assignments = [_assignment_row.to_dict(row) for row in session.execute(statement)]
+    template_ids = {assignment["questionnaire_id"] for assignment in assignments}
+    templates: dict[uuid.UUID, dict[str, Any]] = {}
+    if template_ids:
+        for row in session.execute(
+            _template_row.select().where(
+                col(QuestionnaireTemplate.id).in_(template_ids)
+            )
+        ):
+            template = _template_row.to_dict(row)
+            template["questions"] = []
+            templates[template["id"]] = template
+        for row in session.execute(
+            _question_row.select()
+            .where(col(Question.questionnaire_id).in_(template_ids))
+            .order_by(col(Question.questionnaire_id), col(Question.id))
+        ):
+            question = _question_row.to_dict(row)
+            templates[question["questionnaire_id"]]["questions"].append(question)
+    for assignment in assignments:
+        assignment["questionnaire"] = templates[assignment["questionnaire_id"]]
+    return serialization.page(assignments, count)
+
+
+def _appointment_filters(
+    current_user: User,
+    start: datetime | None,
+    end: datetime | None,
+    status: AppointmentStatus | None,
+) -> list[Any]:
+    # With the user first, every filter but status is a range of
+    # ix_appointment_user_id_appointment_datetime or, for admins,
+    # ix_appointment_appointment_datetime
+    filters: list[Any] = []
+    if not current_user.is_superuser:
+        filters.append(Appointment.user_id == current_user.id)
+    if start is not None:
+        filters.append(Appointment.appointment_datetime >= _utc(start))
+    if end is not None:
+        filters.append(Appointment.appointment_datetime < _utc(end))
+    if status is not None:
+        filters.append(Appointment.status == status)
+    return filters
+
+
+def _lock_open_assignment(
+    session: SessionDep, current_user: User, assignment_id: uuid.UUID
+) -> QuestionnaireAssignment:
+    # Verify assignment exists and belongs to current user. The row lock makes
+    # concurrent submissions and draft saves for one assignment wait for each
+    # other, as questionnaireresponse can't have a unique constraint on
+    # assignment_id
+    assignment = session.get(
+        QuestionnaireAssignment, assignment_id, with_for_update=True
+    )
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    if assignment.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not your assignment")
+
+    if assignment.status == AssignmentStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Assignment already completed")
+    return assignment
+
 
 # Questionnaire Template endpoints (Admin only)
 @router.get(
@@ -43,8 +181,13 @@ router = APIRouter()
     dependencies=[Depends(get_current_active_superuser)],
     response_model=QuestionnaireTemplatesPublic,
 )
+@query_budget(4)
+@replica_reads
 def read_questionnaire_templates(
-    session: SessionDep, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    after: uuid.UUID | None = None,
 ) -> Any:
     """
     Retrieve questionnaire templates (Admin only).
@@ -52,7 +195,15 @@ def read_questionnaire_templates(
     count_statement = select(func.count()).select_from(QuestionnaireTemplate)
     count = session.exec(count_statement).one()
     
-    statement = select(QuestionnaireTemplate).offset(skip).limit(limit)
+    statement = _page(
+        select(QuestionnaireTemplate).options(
+            selectinload(QuestionnaireTemplate.questions)  # type: ignore[arg-type]
+        ),
+        QuestionnaireTemplate.id,
+        skip=skip,
+        limit=limit,
+        after=after,
+    )
     templates = session.exec(statement).all()
     
     return QuestionnaireTemplatesPublic(data=templates, count=count)
@@ -80,6 +231,7 @@ def create_questionnaire_template(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=QuestionnaireTemplatePublic,
 )
+@replica_reads
 def read_questionnaire_template(
     template_id: uuid.UUID, session: SessionDep
 ) -> Any:
@@ -135,6 +287,56 @@ def delete_questionnaire_template(
     return Message(message="Questionnaire template deleted successfully")
 
 
+@router.get(
+    "/templates/{template_id}/scores",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=ResponseScoreStats,
+)
+@query_budget(3)
+@replica_reads
+def read_questionnaire_template_scores(
+    template_id: uuid.UUID, session: SessionDep
+) -> Any:
+    """
+    Get score statistics of a template's responses, archived ones included (Admin only).
+    """
+    if not session.get(QuestionnaireTemplate, template_id):
+        raise HTTPException(status_code=404, detail="Questionnaire template not found")
+
+    scores = union_all(
+        *(
+            select(
+                func.coalesce(table.manual_score_override, table.total_score).label(
+                    "score"
+                ),
+                literal(archived).label("archived"),
+            )
+            .join(QuestionnaireAssignment)
+            .where(QuestionnaireAssignment.questionnaire_id == template_id)
+            for table, archived in (
+                (QuestionnaireResponse, False),
+                (QuestionnaireResponseArchive, True),
+            )
+        )
+    ).subquery()
+    count, archived, average, minimum, maximum = session.exec(
+        select(  # type: ignore[call-overload]
+            func.count(),
+            func.count().filter(scores.c.archived),
+            func.avg(scores.c.score),
+            func.min(scores.c.score),
+            func.max(scores.c.score),
+        )
+    ).one()
+    return ResponseScoreStats(
+        count=count,
+        archived=archived,
+        average=average,
+        minimum=minimum,
+        maximum=maximum,
+    )
+
+
 # Assignment endpoints
 @router.post(
     "/assignments",
@@ -211,8 +413,14 @@ def create_bulk_assignments(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=QuestionnaireAssignmentsPublic,
 )
+@query_budget(5)
+@replica_reads
 def read_all_assignments(
-    session: SessionDep, skip: int = 0, limit: int = 100, questionnaire_id: uuid.UUID | None = None
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    after: uuid.UUID | None = None,
+    questionnaire_id: uuid.UUID | None = None,
 ) -> Any:
     """
     Get all questionnaire assignments (Admin only). Optionally filter by questionnaire_id.
@@ -225,28 +433,37 @@ def read_all_assignments(
         )
         count = session.exec(count_statement).one()
         
-        statement = (
-            select(QuestionnaireAssignment)
-            .where(QuestionnaireAssignment.questionnaire_id == questionnaire_id)
-            .offset(skip)
-            .limit(limit)
+        statement = _assignment_row.select().where(
+            col(QuestionnaireAssignment.questionnaire_id) == questionnaire_id
         )
     else:
         count_statement = select(func.count()).select_from(QuestionnaireAssignment)
         count = session.exec(count_statement).one()
         
-        statement = select(QuestionnaireAssignment).offset(skip).limit(limit)
-    
-    assignments = session.exec(statement).all()
-    return QuestionnaireAssignmentsPublic(data=assignments, count=count)
+        statement = _assignment_row.select()
+    
+    statement = _page(
+        statement,
+        QuestionnaireAssignment.id,
+        skip=skip,
+        limit=limit,
+        after=after,
+    )
+    return _assignment_page(session, statement, count)
 
 
 @router.get(
     "/assignments/me",
     response_model=QuestionnaireAssignmentsPublic,
 )
+@query_budget(5)
+@replica_reads
 def read_my_assignments(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    after: uuid.UUID | None = None,
 ) -> Any:
     """
     Get current user's questionnaire assignments.
@@ -258,21 +475,24 @@ def read_my_assignments(
     )
     count = session.exec(count_statement).one()
     
-    statement = (
-        select(QuestionnaireAssignment)
-        .where(QuestionnaireAssignment.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
+    statement = _page(
+        _assignment_row.select().where(
+            col(QuestionnaireAssignment.user_id) == current_user.id
+        ),
+        QuestionnaireAssignment.id,
+        skip=skip,
+        limit=limit,
+        after=after,
     )
-    assignments = session.exec(statement).all()
-    
-    return QuestionnaireAssignmentsPublic(data=assignments, count=count)
+    return _assignment_page(session, statement, count)
 
 
 @router.get(
     "/assignments/{assignment_id}",
     response_model=QuestionnaireAssignmentPublic,
 )
+@query_budget(4)
+@replica_reads
 def read_assignment(
     assignment_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
 ) -> Any:
@@ -315,21 +535,24 @@ def delete_assignment(
     response_model=QuestionnaireResponsePublic,
 )
 def create_response(
-    *, session: SessionDep, current_user: CurrentUser, response_in: QuestionnaireResponseCreate
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    response_in: QuestionnaireResponseCreate,
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
 ) -> Any:
     """
     Submit questionnaire response.
+
+    Retries sent with the same Idempotency-Key header get the original result.
     """
-    # Verify assignment exists and belongs to current user
-    assignment = session.get(QuestionnaireAssignment, response_in.assignment_id)
-    if not assignment:
-        raise HTTPException(status_code=404, detail="Assignment not found")
-    
-    if assignment.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your assignment")
-    
-    if assignment.status == AssignmentStatus.COMPLETED:
-        raise HTTPException(status_code=400, detail="Assignment already completed")
+    if idempotency_key is not None:
+        body_hash = idempotency.request_hash(response_in)
+        replay = idempotency.claim(session, current_user.id, idempotency_key, body_hash)
+        if replay is not None:
+            return replay
+
+    _lock_open_assignment(session, current_user, response_in.assignment_id)
     
     # Check if response already exists
     existing_response = session.exec(
@@ -340,6 +563,17 @@ def create_response(
     if existing_response:
         raise HTTPException(status_code=400, detail="Response already submitted")
     
+    if idempotency_key is not None:
+        response = crud.add_questionnaire_response(
+            session=session, response_in=response_in, user_id=current_user.id
+        )
+        return idempotency.store(
+            session,
+            current_user.id,
+            idempotency_key,
+            QuestionnaireResponsePublic.model_validate(response),
+        )
+
     response = crud.create_questionnaire_response(
         session=session, response_in=response_in, user_id=current_user.id
     )
@@ -350,8 +584,14 @@ def create_response(
     "/responses/me",
     response_model=QuestionnaireResponsesPublic,
 )
+@query_budget(5)
+@replica_reads
 def read_my_responses(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    after: uuid.UUID | None = None,
 ) -> Any:
     """
     Get current user's questionnaire responses.
@@ -363,11 +603,14 @@ def read_my_responses(
     )
     count = session.exec(count_statement).one()
     
-    statement = (
+    statement = _page(
         select(QuestionnaireResponse)
         .where(QuestionnaireResponse.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
+        .options(_response_answers_loader),
+        QuestionnaireResponse.id,
+        skip=skip,
+        limit=limit,
+        after=after,
     )
     responses = session.exec(statement).all()
     
@@ -378,13 +621,25 @@ def read_my_responses(
     "/responses/{response_id}",
     response_model=QuestionnaireResponsePublic,
 )
+@query_budget(5)
+@replica_reads
 def read_response(
     response_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
 ) -> Any:
     """
     Get specific response.
     """
-    response = session.get(QuestionnaireResponse, response_id)
+    response: QuestionnaireResponse | QuestionnaireResponseArchive | None
+    response = session.get(
+        QuestionnaireResponse, response_id, options=[_response_answers_loader]
+    )
+    if not response:
+        # Old responses have been moved to the archive by app.archive
+        response = session.exec(
+            select(QuestionnaireResponseArchive)
+            .where(QuestionnaireResponseArchive.id == response_id)
+            .options(_archived_answers_loader)
+        ).first()
     if not response:
         raise HTTPException(status_code=404, detail="Response not found")
     
@@ -421,40 +676,230 @@ def update_response_score(
     return response
 
 
+# Event stream, instead of polling the assignment and appointment lists
+@router.get(
+    "/events/me",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_my_events(current_user: CurrentUser) -> StreamingResponse:
+    """
+    Stream changes to my assignments and appointments as server-sent events.
+
+    Events are `assignment.created`, `assignment.overdue`, `appointment.created`
+    and `appointment.updated`, with the id of the changed row as data, and
+    `resync` when some events may have been missed.
+    """
+    return StreamingResponse(
+        events.stream(str(current_user.id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Draft endpoints, for saving long questionnaires a few answers at a time
+@router.get(
+    "/assignments/{assignment_id}/draft",
+    response_model=QuestionnaireDraftPublic,
+)
+def read_draft(
+    assignment_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+) -> Any:
+    """
+    Get the answers saved so far for one of my assignments.
+    """
+    assignment = session.get(QuestionnaireAssignment, assignment_id)
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    if assignment.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not your assignment")
+
+    draft = session.exec(
+        select(QuestionnaireDraft)
+        .where(QuestionnaireDraft.assignment_id == assignment_id)
+        .options(selectinload(QuestionnaireDraft.answers))  # type: ignore[arg-type]
+    ).first()
+    if not draft:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return draft
+
+
+@router.patch(
+    "/assignments/{assignment_id}/draft",
+    response_model=QuestionnaireDraftSummary,
+)
+def save_draft(
+    *,
+    assignment_id: uuid.UUID,
+    session: SessionDep,
+    current_user: CurrentUser,
+    draft_in: QuestionnaireDraftUpdate,
+) -> Any:
+    """
+    Save answers to the draft of one of my assignments.
+
+    Answers to questions already in the draft replace the earlier ones.
+    """
+    assignment = _lock_open_assignment(session, current_user, assignment_id)
+
+    question_ids = {answer.question_id for answer in draft_in.answers}
+    known = session.exec(
+        select(Question.id).where(
+            Question.questionnaire_id == assignment.questionnaire_id,
+            col(Question.id).in_(question_ids),
+        )
+    ).all()
+    if len(known) != len(question_ids):
+        raise HTTPException(
+            status_code=400, detail="Question not in this questionnaire"
+        )
+
+    return crud.save_draft_answers(
+        session=session, assignment_id=assignment_id, answers=draft_in.answers
+    )
+
+
+@router.post(
+    "/assignments/{assignment_id}/draft/finalize",
+    response_model=QuestionnaireResponsePublic,
+)
+def finalize_draft(
+    assignment_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+) -> Any:
+    """
+    Submit the draft of one of my assignments as its response.
+    """
+    _lock_open_assignment(session, current_user, assignment_id)
+    draft = session.get(QuestionnaireDraft, assignment_id)
+    if not draft:
+        raise HTTPException(status_code=404, detail="Draft not found")
+
+    return crud.finalize_draft(session=session, draft=draft, user_id=current_user.id)
+
+
 # Appointment endpoints
 @router.get(
     "/appointments",
     response_model=AppointmentsPublic,
 )
+@query_budget(3)
+@replica_reads
 def read_appointments(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    after: uuid.UUID | None = None,
+    start: Annotated[datetime | None, Query(alias="from")] = None,
+    end: Annotated[datetime | None, Query(alias="to")] = None,
+    status: AppointmentStatus | None = None,
 ) -> Any:
     """
     Retrieve appointments. Users see their own, admins see all.
+
+    With `from` and/or `to` (inclusive and exclusive), only appointments in
+    that window are returned, in order of time. Otherwise they are in order of
+    creation and can be paged with `after`.
     """
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Appointment)
-        count = session.exec(count_statement).one()
-        
-        statement = select(Appointment).offset(skip).limit(limit)
-        appointments = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Appointment)
-            .where(Appointment.user_id == current_user.id)
+    windowed = start is not None or end is not None
+    if windowed and after is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="after can't be combined with from and to, use skip",
         )
-        count = session.exec(count_statement).one()
-        
+    filters = _appointment_filters(current_user, start, end, status)
+
+    count_statement = select(func.count()).select_from(Appointment).where(*filters)
+    count = session.exec(count_statement).one()
+
+    statement = _appointment_row.select().where(*filters)
+    if windowed:
         statement = (
-            select(Appointment)
-            .where(Appointment.user_id == current_user.id)
+            statement.order_by(
+                col(Appointment.appointment_datetime), col(Appointment.id)
+            )
             .offset(skip)
             .limit(limit)
         )
-        appointments = session.exec(statement).all()
-    
-    return AppointmentsPublic(data=appointments, count=count)
+    else:
+        statement = _page(
+            statement, Appointment.id, skip=skip, limit=limit, after=after
+        )
+    appointments = [_appointment_row.to_dict(row) for row in session.execute(statement)]
+    return serialization.page(appointments, count)
+
+
+@router.get(
+    "/appointments/day/{day}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=AppointmentDayPublic,
+)
+@query_budget(3)
+@replica_reads
+def read_appointment_day(
+    session: SessionDep,
+    day: date,
+    tz: str = "UTC",
+    user_id: uuid.UUID | None = None,
+    status: AppointmentStatus | None = None,
+) -> Any:
+    """
+    Get everyone's appointments on a day in time order, with their users (Admin only).
+    """
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=422, detail="Unknown time zone")
+    start = datetime.combine(day, time(), zone)
+    end = datetime.combine(day + timedelta(days=1), time(), zone)
+
+    statement = (
+        select(Appointment)
+        .where(
+            Appointment.appointment_datetime >= _utc(start),
+            Appointment.appointment_datetime < _utc(end),
+        )
+        .options(selectinload(Appointment.user))  # type: ignore[arg-type]
+        .order_by(col(Appointment.appointment_datetime), col(Appointment.id))
+    )
+    if user_id is not None:
+        statement = statement.where(Appointment.user_id == user_id)
+    if status is not None:
+        statement = statement.where(Appointment.status == status)
+    appointments = session.exec(statement).all()
+    return AppointmentDayPublic(day=day, data=appointments, count=len(appointments))
+
+
+@router.get("/appointments/calendar.ics", response_class=StreamingResponse)
+@replica_reads
+def read_appointment_calendar(
+    current_user: CurrentUser,
+    start: Annotated[datetime | None, Query(alias="from")] = None,
+    end: Annotated[datetime | None, Query(alias="to")] = None,
+) -> StreamingResponse:
+    """
+    Stream appointments as an iCalendar feed. Users get their own, admins all.
+    """
+    statement = (
+        select(Appointment)
+        .where(*_appointment_filters(current_user, start, end, None))
+        .order_by(col(Appointment.appointment_datetime), col(Appointment.id))
+        .execution_options(yield_per=500)
+    )
+    user_id = str(current_user.id)
+
+    def feed() -> Iterator[bytes]:
+        # The request's session is closed before the body is sent, so the
+        # feed reads through its own, streaming rows from a server side cursor
+        with RoutingSession(engine, deps.replica_router) as session:
+            session.info["user_id"] = user_id
+            yield from ical.render(session.exec(statement), name="Appointments")
+
+    return StreamingResponse(
+        feed(),
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": 'inline; filename="appointments.ics"'},
+    )
 
 
 @router.post(
@@ -481,6 +926,7 @@ def create_appointment(
     "/appointments/{appointment_id}",
     response_model=AppointmentPublic,
 )
+@replica_reads
 def read_appointment(
     appointment_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
 ) -> Any:
@@ -519,6 +965,7 @@ def update_appointment(
     update_data = appointment_in.model_dump(exclude_unset=True)
     appointment.sqlmodel_update(update_data)
     session.add(appointment)
+    events.notify(session, appointment.user_id, "appointment.updated", appointment.id)
     session.commit()
     session.refresh(appointment)
     
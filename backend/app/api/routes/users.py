@@ -1,9 +1,20 @@
 import uuid
+import tempfile
+from pathlib import Path
 from typing import Any
 import base64
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlmodel import col, delete, func, select
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from sqlmodel import func, select
+from starlette.concurrency import run_in_threadpool
 
 from app import crud
 from app.api.deps import (
@@ -11,10 +22,13 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.core import user_import
 from app.core.config import settings
+from app.core.jobs import run_job
+from app.core.querylog import query_budget
 from app.core.security import get_password_hash, verify_password
 from app.models import (
-    Item,
+    JobPublic,
     Message,
     UpdatePassword,
     User,
@@ -24,8 +38,6 @@ from app.models import (
     UsersPublic,
     UserUpdate,
     UserUpdateMe,
-    QuestionnaireTemplate,
-    QuestionnaireAssignmentCreate,
 )
 from app.utils import generate_new_account_email, send_email
 
@@ -37,6 +49,7 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
+@query_budget(3)
 def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
     """
     Retrieve users.
@@ -78,6 +91,61 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     return user
 
 
+@router.post(
+    "/import",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=JobPublic,
+    status_code=202,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                content_type: {"schema": {"type": "string"}}
+                for content_type in user_import.READERS
+            },
+        }
+    },
+)
+async def import_users(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Create users from a CSV or NDJSON upload in the background.
+    """
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip()
+    if content_type not in user_import.READERS:
+        raise HTTPException(
+            status_code=415,
+            detail="Upload a CSV (text/csv) or NDJSON (application/x-ndjson) file",
+        )
+    # Kept on disk until the job has read it, as it arrives
+    with tempfile.NamedTemporaryFile(suffix=".import", delete=False) as file:
+        path = Path(file.name)
+        try:
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > settings.USER_IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                file.write(chunk)
+        except BaseException:
+            path.unlink()
+            raise
+    job = await run_in_threadpool(
+        crud.create_job,
+        session=session,
+        kind="user_import",
+        created_by_id=current_user.id,
+    )
+    background_tasks.add_task(
+        run_job, job.id, user_import.import_users_job(path, content_type)
+    )
+    return job
+
+
 @router.patch("/me", response_model=UserPublic)
 def update_user_me(
     *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
@@ -164,6 +232,7 @@ def delete_profile_image(
 
 
 @router.get("/me", response_model=UserPublic)
+@query_budget(1)
 def read_user_me(current_user: CurrentUser) -> Any:
     """
     Get current user.
@@ -186,6 +255,7 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
 
 
 @router.post("/signup", response_model=UserPublic)
+@query_budget(6)
 def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
@@ -197,26 +267,7 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Any:
             detail="The user with this email already exists in the system",
         )
     user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
-    
-    # Auto-assign "Initial Assessment" questionnaire if it exists
-    initial_questionnaire = session.exec(
-        select(QuestionnaireTemplate).where(
-            QuestionnaireTemplate.title == "Initial Assessment",
-            QuestionnaireTemplate.is_active == True
-        )
-    ).first()
-    
-    if initial_questionnaire:
-        from datetime import datetime, timedelta
-        assignment_data = QuestionnaireAssignmentCreate(
-            questionnaire_id=initial_questionnaire.id,
-            user_id=user.id,
-            due_date=datetime.utcnow() + timedelta(days=7)  # 7 days to complete
-        )
-        crud.create_questionnaire_assignment(session=session, assignment_in=assignment_data)
-    
-    return user
+    return crud.register_user(session=session, user_create=user_create)
 
 
 @router.get("/{user_id}", response_model=UserPublic)
@@ -283,8 +334,8 @@ def delete_user(
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
+    # Children are removed by the ON DELETE CASCADE foreign keys, use a
+    # bulk-delete job for users with a lot of data
     session.delete(user)
     session.commit()
     return Message(message="User deleted successfully")
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core import profiler, readiness
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Message, Readiness
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -26,6 +32,45 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/profile",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=PlainTextResponse,
+)
+def profile(
+    seconds: float = Query(default=10, gt=0, le=60),
+    mode: profiler.ProfileMode = "wall",
+    hz: int = Query(default=100, ge=1, le=1000),
+) -> PlainTextResponse:
+    """
+    Sample the worker serving this request and return collapsed stacks,
+    ready for flamegraph.pl or speedscope.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    try:
+        stacks = profiler.sample(seconds, interval=1 / hz, mode=mode)
+    except profiler.ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    filename = f"profile-{os.getpid()}-{mode}.collapsed"
+    return PlainTextResponse(
+        profiler.render_collapsed(stacks),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/ready/", responses={503: {"model": Readiness}})
+def ready(response: Response) -> Readiness:
+    """
+    Whether this worker can serve requests: its database is reachable, answers
+    queries and is migrated to the head revision. 503 when it isn't.
+    """
+    status = readiness.check(engine)
+    if not status.ready:
+        response.status_code = 503
+    return status
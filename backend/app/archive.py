@@ -0,0 +1,131 @@
+"""
+Move old questionnaire responses out of the hot tables.
+
+    python -m app.archive                      # older than the configured horizon
+    python -m app.archive --older-than-days 90
+
+Responses completed before the horizon are moved, with their answers, into
+``questionnaireresponsearchive`` and ``answerarchive``. Both are range
+partitioned by month of completion, so old months can later be detached and
+dropped or dumped without touching the live tables. Archived responses are
+still served by ``GET /questionnaires/responses/{id}`` and counted by
+``GET /questionnaires/templates/{id}/scores``.
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, text
+
+from app.core.config import settings
+from app.core.partitions import ensure_monthly_partitions, next_month
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLES = ("questionnaireresponsearchive", "answerarchive")
+
+# One statement per batch, so a batch is moved completely or not at all.
+# SKIP LOCKED leaves responses being updated to the next run.
+_MOVE_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT id, completed_at FROM questionnaireresponse
+        WHERE completed_at < :before
+        ORDER BY completed_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved_answers AS (
+        DELETE FROM answer USING batch
+        WHERE answer.response_id = batch.id
+            AND answer.completed_at = batch.completed_at
+        RETURNING answer.*
+    ), moved_responses AS (
+        DELETE FROM questionnaireresponse USING batch
+        WHERE questionnaireresponse.id = batch.id
+            AND questionnaireresponse.completed_at = batch.completed_at
+        RETURNING questionnaireresponse.*
+    ), archived_responses AS (
+        INSERT INTO questionnaireresponsearchive (
+            id, completed_at, assignment_id, user_id, total_score,
+            manual_score_override, archived_at
+        )
+        SELECT id, completed_at, assignment_id, user_id, total_score,
+            manual_score_override, :archived_at
+        FROM moved_responses
+        RETURNING id
+    ), archived_answers AS (
+        INSERT INTO answerarchive (
+            id, completed_at, response_id, question_id, likert_value,
+            text_response
+        )
+        SELECT id, completed_at, response_id, question_id, likert_value,
+            text_response
+        FROM moved_answers
+    )
+    SELECT count(*) FROM archived_responses
+    """
+)
+
+
+def archive_responses(engine: Engine, before: datetime, *, batch_size: int) -> int:
+    """
+    Archive the responses completed before ``before``, a batch per transaction.
+
+    Returns the number of responses moved.
+    """
+    with engine.begin() as connection:
+        oldest = connection.execute(
+            text(
+                "SELECT min(completed_at) FROM questionnaireresponse"
+                " WHERE completed_at < :before"
+            ),
+            {"before": before},
+        ).scalar_one()
+        if oldest is None:
+            return 0
+        for table in ARCHIVE_TABLES:
+            created = ensure_monthly_partitions(
+                connection, table, oldest, next_month(before)
+            )
+            if created:
+                logger.info("Created partitions %s", ", ".join(created))
+
+    archived = 0
+    while True:
+        with engine.begin() as connection:
+            moved: int = connection.execute(
+                _MOVE_BATCH,
+                {
+                    "before": before,
+                    "batch_size": batch_size,
+                    "archived_at": datetime.utcnow(),
+                },
+            ).scalar_one()
+        archived += moved
+        logger.info("Archived %d responses", archived)
+        if moved < batch_size:
+            return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.RESPONSE_ARCHIVE_AFTER_DAYS,
+        help="archive responses completed more than this many days ago",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.core.db import engine
+
+    before = datetime.utcnow() - timedelta(days=args.older_than_days)
+    archived = archive_responses(engine, before, batch_size=args.batch_size)
+    print(f"Archived {archived} responses completed before {before:%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
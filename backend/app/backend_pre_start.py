@@ -1,32 +1,20 @@
 import logging
+import time
 
 from sqlalchemy import Engine
-from sqlmodel import Session, select
-from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
 
+from app.core import readiness
 from app.core.db import engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-max_tries = 60 * 5  # 5 minutes
-wait_seconds = 1
 
-
-@retry(
-    stop=stop_after_attempt(max_tries),
-    wait=wait_fixed(wait_seconds),
-    before=before_log(logger, logging.INFO),
-    after=after_log(logger, logging.WARN),
-)
 def init(db_engine: Engine) -> None:
-    try:
-        with Session(db_engine) as session:
-            # Try to create session to check if DB is awake
-            session.exec(select(1))
-    except Exception as e:
-        logger.error(e)
-        raise e
+    start = time.perf_counter()
+    # Checks the port, then a query, retrying with backoff until the timeout
+    readiness.wait_until_ready(db_engine)
+    logger.info("Database ready after %.2fs", time.perf_counter() - start)
 
 
 def main() -> None:
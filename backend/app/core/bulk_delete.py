@@ -0,0 +1,126 @@
+"""
+Delete a row and everything that cascades from it, in small batches.
+
+A plain ``DELETE`` lets Postgres follow the ``ON DELETE CASCADE`` foreign keys,
+but for a template with tens of thousands of assignments that is one long
+transaction holding locks on every descendant and writing all of its WAL at
+once. Here descendants are removed leaves first, a batch per transaction, so
+locks are short-lived and vacuum and replicas keep up with the churn.
+"""
+
+import uuid
+from collections.abc import Callable
+from typing import Any, cast
+
+from sqlalchemy import (
+    ColumnElement,
+    CursorResult,
+    Delete,
+    ForeignKeyConstraint,
+    FromClause,
+    Table,
+    and_,
+    delete,
+    tuple_,
+)
+from sqlmodel import Session, SQLModel, select
+
+from app.core.config import settings
+from app.core.jobs import JobFunction
+from app.models import Job
+
+# A chain of foreign keys from a descendant table up to a direct child of the
+# table being deleted from
+CascadePath = list[ForeignKeyConstraint]
+
+
+def cascade_paths(table: Table) -> list[CascadePath]:
+    """Every chain of cascading foreign keys that ends at ``table``, deepest first."""
+    paths: list[CascadePath] = []
+
+    def visit(parent: Table, chain: CascadePath) -> None:
+        for child in SQLModel.metadata.sorted_tables:
+            for constraint in child.foreign_key_constraints:
+                if constraint.referred_table is not parent:
+                    continue
+                if (constraint.ondelete or "").upper() != "CASCADE":
+                    continue
+                path = [constraint, *chain]
+                # Stop at self-references and cycles
+                if child is table or any(fk.table is child for fk in chain):
+                    continue
+                visit(child, path)
+                paths.append(path)
+
+    visit(table, [])
+    return paths
+
+
+def _join_condition(constraint: ForeignKeyConstraint) -> ColumnElement[bool]:
+    return and_(*(element.parent == element.column for element in constraint.elements))
+
+
+def batch_statement(path: CascadePath, root_id: uuid.UUID, batch_size: int) -> Delete:
+    leaf = path[0].table
+    joined: FromClause = leaf
+    for constraint in path[:-1]:
+        joined = joined.join(constraint.referred_table, _join_condition(constraint))
+    # Partitioned tables have composite primary keys
+    primary_key = tuple_(*leaf.primary_key.columns)
+    batch = (
+        select(*leaf.primary_key.columns)
+        .select_from(joined)
+        .where(*(column == root_id for column in path[-1].columns))
+        .limit(batch_size)
+    )
+    return delete(leaf).where(primary_key.in_(batch))
+
+
+def bulk_delete(
+    session: Session,
+    table: Table,
+    root_id: uuid.UUID,
+    *,
+    batch_size: int,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Delete ``root_id`` from ``table`` with all of its descendants.
+
+    Commits after every batch and returns the number of rows deleted.
+    ``progress`` is called with the running total before each commit.
+    """
+    deleted = 0
+    statements = [
+        batch_statement(path, root_id, batch_size) for path in cascade_paths(table)
+    ]
+    statements.append(
+        delete(table).where(*(column == root_id for column in table.primary_key))
+    )
+    for statement in statements:
+        while True:
+            result = cast(CursorResult[Any], session.execute(statement))
+            deleted += result.rowcount
+            if progress is not None:
+                progress(deleted)
+            session.commit()
+            if result.rowcount < batch_size:
+                break
+    return deleted
+
+
+def bulk_delete_job(table: Table, root_id: uuid.UUID) -> JobFunction:
+    def run(session: Session, job: Job) -> None:
+        def progress(deleted: int) -> None:
+            job.processed = deleted
+            session.add(job)
+
+        bulk_delete(
+            session,
+            table,
+            root_id,
+            batch_size=settings.BULK_DELETE_BATCH_SIZE,
+            progress=progress,
+        )
+
+    return run
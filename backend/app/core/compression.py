@@ -0,0 +1,273 @@
+"""
+Compressed responses, negotiated from Accept-Encoding.
+
+``CompressionMiddleware`` compresses text and JSON responses of at least
+``COMPRESSION_MINIMUM_SIZE`` bytes with zstd, brotli or gzip, whichever the
+client accepts with the highest q-value, preferring them in that order on
+ties. Streamed responses like the calendar feed are compressed as they go,
+each chunk flushed so clients don't wait for the end of the stream. Event
+streams are left alone, as are responses that already have a
+Content-Encoding: ``PrecompressedDocument`` serves bodies that never change,
+like the OpenAPI document, compressed once at the highest levels instead of
+on every request.
+"""
+
+import zlib
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Protocol
+
+import brotli  # type: ignore[import-untyped]
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipEncoder:
+    def __init__(self, level: int) -> None:
+        # wbits 31 writes a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._compressor.process(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._compressor.flush())
+
+    def finish(self) -> bytes:
+        return bytes(self._compressor.finish())
+
+
+class ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# In order of preference, with the level used for responses compressed per
+# request and for precompressed ones. Per request levels trade some ratio
+# for a few milliseconds per megabyte at most
+ENCODINGS: dict[str, tuple[Callable[[int], Encoder], int, int]] = {
+    "zstd": (ZstdEncoder, 3, 19),
+    "br": (BrotliEncoder, 4, 11),
+    "gzip": (GzipEncoder, 6, 9),
+}
+
+# Saved precompressed bodies are named after the uncompressed one plus these
+SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+
+_COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+}
+
+
+def negotiate(accept_encoding: str, encodings: Iterable[str] = ENCODINGS) -> str | None:
+    """The encoding with the highest q-value in ``accept_encoding``, if any"""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, parameters = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        # Only a strictly higher q-value beats a preferred encoding
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def compress(body: bytes, encoding: str, *, precompressed: bool = False) -> bytes:
+    encoder_class, level, precompressed_level = ENCODINGS[encoding]
+    encoder = encoder_class(precompressed_level if precompressed else level)
+    return encoder.compress(body) + encoder.finish()
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Message = {}
+        self.encoder: Encoder | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not compressible(
+                headers.get("content-type", "")
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Held back until the first body shows whether to compress
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            encoder_class, level, _ = ENCODINGS[self.encoding]
+            self.encoder = encoder_class(level)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start)
+
+        # Flushed after every chunk, so streams arrive as they are produced
+        body = self.encoder.compress(body) + (
+            self.encoder.flush() if more_body else self.encoder.finish()
+        )
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(
+            scope, receive, _CompressingSend(send, encoding, self.minimum_size)
+        )
+
+
+class PrecompressedDocument:
+    """A body rendered and compressed with every encoding once, on first use"""
+
+    def __init__(self, render: Callable[[], bytes], media_type: str) -> None:
+        self.render = render
+        self.media_type = media_type
+        self._bodies: dict[str | None, bytes] | None = None
+
+    def load(self) -> None:
+        body = self.render()
+        bodies: dict[str | None, bytes] = {None: body}
+        for encoding in ENCODINGS:
+            bodies[encoding] = compress(body, encoding, precompressed=True)
+        self._bodies = bodies
+
+    def save(self, path: Path) -> None:
+        """Write the body to ``path`` and each compressed body next to it"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.body(None))
+        for encoding, suffix in SUFFIXES.items():
+            path.with_name(path.name + suffix).write_bytes(self.body(encoding))
+
+    def load_files(self, path: Path) -> bytes:
+        """Read the bodies written by ``save`` and return the uncompressed one"""
+        body = path.read_bytes()
+        bodies: dict[str | None, bytes] = {None: body}
+        for encoding, suffix in SUFFIXES.items():
+            compressed = path.with_name(path.name + suffix)
+            bodies[encoding] = (
+                compressed.read_bytes()
+                if compressed.exists()
+                else compress(body, encoding, precompressed=True)
+            )
+        self._bodies = bodies
+        return body
+
+    @property
+    def loaded(self) -> bool:
+        return self._bodies is not None
+
+    def clear(self) -> None:
+        self._bodies = None
+
+    def body(self, encoding: str | None) -> bytes:
+        """The body compressed with ``encoding``, or uncompressed for None"""
+        if self._bodies is None:
+            self.load()
+        assert self._bodies is not None
+        return self._bodies[encoding]
+
+    def response(self, request: Request) -> Response:
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(
+            self.body(encoding), media_type=self.media_type, headers=headers
+        )
@@ -1,4 +1,5 @@
 import secrets
+import uuid
 import warnings
 from typing import Annotated, Any, Literal
 
@@ -51,11 +52,111 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+    # Compress responses with zstd, brotli or gzip from this many bytes on;
+    # turn off when a proxy in front already compresses
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # OpenAPI document built by `python -m app.openapi`, served as is instead
+    # of every worker rendering it at startup
+    OPENAPI_SCHEMA_FILE: str | None = None
+    # Database connections each worker opens before it accepts requests
+    WARMUP_CONNECTIONS: int = 5
+    # Waiting for the database at startup (app.backend_pre_start): each
+    # attempt checks its port before connecting, and failed attempts are
+    # retried with exponential backoff and jitter, from the first wait up to
+    # the longest, until the timeout
+    READINESS_TIMEOUT_SECONDS: float = 300
+    READINESS_BACKOFF_MIN_SECONDS: float = 0.05
+    READINESS_BACKOFF_MAX_SECONDS: float = 5.0
+    READINESS_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    # Production server (python -m app.server): workers per CPU of the
+    # container's quota, unless WEB_CONCURRENCY sets the count, and how many
+    # requests a worker serves (plus a random part of the jitter) before it's
+    # replaced, finishing its requests within the graceful timeout
+    WEB_CONCURRENCY: int | None = None
+    WORKERS_PER_CPU: float = 2.0
+    WORKER_MAX_REQUESTS: int = 10_000
+    WORKER_MAX_REQUESTS_JITTER: int = 1_000
+    WORKER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_PRELOAD: bool = True
+    # Expose per-route Prometheus metrics on /metrics
+    METRICS_ENABLED: bool = False
+    # SQL diagnostics: per-request N+1 detection and route query budgets,
+    # plus logging (and optionally EXPLAIN) of statements slower than the threshold
+    QUERY_RECORDER_ENABLED: bool = False
+    N_PLUS_ONE_THRESHOLD: int = 10
+    SLOW_QUERY_THRESHOLD_MS: float | None = None
+    SLOW_QUERY_EXPLAIN: bool = False
+    # Allow superusers to sample a live worker through /utils/profile
+    PROFILER_ENABLED: bool = False
+    # Rows removed per transaction by bulk-delete jobs
+    BULK_DELETE_BATCH_SIZE: int = 5000
+    # User imports (POST /users/import): rows per transaction, processes
+    # hashing the rows' passwords (one per CPU when unset) and largest upload
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_HASH_WORKERS: int | None = None
+    USER_IMPORT_MAX_BYTES: int = 100 * 1024 * 1024
+    # Responses older than this are moved to the archive tables by app.archive
+    RESPONSE_ARCHIVE_AFTER_DAYS: int = 365
+    # Monthly partitions of responses and answers created ahead by init_db
+    PARTITION_MONTHS_AHEAD: int = 3
+    # How long a response submitted with an Idempotency-Key is replayed for
+    # retries, and how many of them each worker keeps in memory
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    # Server-sent event streams: comment sent on idle streams to keep proxies
+    # from closing them, events buffered per slow stream, and the backoff of
+    # each worker's LISTEN connection when the database goes away
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_RECONNECT_MIN_SECONDS: float = 0.5
+    EVENTS_RECONNECT_MAX_SECONDS: float = 30.0
+    # Length of the events in the iCalendar feed, as appointments only have
+    # a start time
+    APPOINTMENT_DURATION_MINUTES: int = 60
+    # Similar orientation search: how often each worker reloads its in-memory
+    # vectors, and from how many orientations it searches approximately,
+    # scanning only the clusters nearest to the query. Only this many trait
+    # names get a dimension; the workers' matrices take 4 bytes per dimension
+    # and orientation
+    ORIENTATION_INDEX_REFRESH_SECONDS: float = 300.0
+    ORIENTATION_ANN_MIN_ROWS: int = 100_000
+    ORIENTATION_ANN_PROBES: int = 8
+    ORIENTATION_MAX_DIMENSIONS: int = 256
+    # Templates assigned to every user who signs up: the listed ids (comma
+    # separated) and every active template tagged with one of the tags, due
+    # that many days later. Each worker caches the resolved templates for the
+    # TTL, and drops them as soon as it changes a template itself
+    ONBOARDING_TEMPLATE_IDS: Annotated[
+        list[uuid.UUID] | str, BeforeValidator(parse_cors)
+    ] = []
+    ONBOARDING_TEMPLATE_TAGS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = ["onboarding"]
+    ONBOARDING_DUE_DAYS: int = 7
+    ONBOARDING_CACHE_SECONDS: float = 60.0
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
+    # Connection pool of each worker, and the connections all the server's
+    # workers may hold together, below the database's max_connections with
+    # room for migrations and maintenance; the server shrinks the pools to fit
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_MAX_CONNECTIONS: int = 80
+    # Streaming replicas serving the routes marked with replica_reads, as
+    # comma separated postgresql+psycopg:// URIs. A replica further behind
+    # than the maximum lag, or behind the user's own last write, is skipped.
+    REPLICA_DATABASE_URIS: Annotated[
+        list[PostgresDsn] | str, BeforeValidator(parse_cors)
+    ] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 1.0
+    # Connecting to a replica gives up after this long (libpq's connect_timeout)
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    REPLICA_WRITE_TRACKING_SECONDS: float = 60.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -2,6 +2,7 @@ from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.partitions import ensure_partitions_ahead
 from app.models import (
     User,
     UserCreate,
@@ -10,7 +11,20 @@ from app.models import (
     Orientation,
 )
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+pool_options = {
+    "pool_size": settings.POSTGRES_POOL_SIZE,
+    "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+}
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **pool_options)
+replica_engines = [
+    create_engine(
+        str(uri),
+        # A replica that doesn't answer is skipped, not waited for
+        connect_args={"connect_timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS},
+        **pool_options,
+    )
+    for uri in settings.REPLICA_DATABASE_URIS
+]
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -37,3 +51,6 @@ def init_db(session: Session) -> None:
             is_superuser=True,
         )
         user = crud.create_user(session=session, user_create=user_in)
+
+    ensure_partitions_ahead(session.connection())
+    session.commit()
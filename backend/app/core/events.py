@@ -0,0 +1,195 @@
+"""
+Changes to a user's assignments and appointments, pushed as server-sent events.
+
+Writers call ``notify`` in the transaction that makes the change. Postgres
+delivers the NOTIFY to listeners when it commits and drops it on rollback.
+Each worker holds one LISTEN connection in ``hub`` and fans events out to the
+streams of its connected users, so an idle subscriber costs a small queue and
+a suspended coroutine, not a database connection.
+
+Events only say what changed (``{"type": "assignment.created", "id": ...}``);
+clients fetch the row through the regular endpoints. Events sent while a
+worker is reconnecting to the database are lost, so after reconnecting it
+sends ``resync`` to every stream, telling clients to refetch their lists.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import psycopg
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_events"
+
+_NOTIFY = text(
+    "SELECT pg_notify(:channel, payload)"
+    " FROM unnest(CAST(:payloads AS text[])) AS payload"
+)
+
+
+@dataclass(frozen=True)
+class Event:
+    user_id: str
+    type: str
+    id: str | None = None
+
+    @classmethod
+    def parse(cls, payload: str) -> "Event":
+        return cls(**json.loads(payload))
+
+    def encode(self) -> bytes:
+        data = json.dumps({"type": self.type, "id": self.id})
+        return f"event: {self.type}\ndata: {data}\n\n".encode()
+
+
+def notify(session: Session, user_id: uuid.UUID, type: str, id: uuid.UUID) -> None:
+    notify_many(session, [(user_id, type, id)])
+
+
+def notify_many(
+    session: Session, events: Iterable[tuple[uuid.UUID, str, uuid.UUID]]
+) -> None:
+    """Send events when the session's transaction commits, in one statement"""
+    payloads = [
+        json.dumps({"user_id": str(user_id), "type": type, "id": str(id)})
+        for user_id, type, id in events
+    ]
+    if payloads:
+        session.execute(_NOTIFY, {"channel": CHANNEL, "payloads": payloads})
+
+
+class EventHub:
+    """Fan-out of the notifications on ``CHANNEL`` to this worker's streams"""
+
+    def __init__(self, conninfo: str) -> None:
+        self.conninfo = conninfo
+        self._subscribers: defaultdict[str, set[asyncio.Queue[Event]]] = defaultdict(
+            set
+        )
+        self._listener: asyncio.Task[None] | None = None
+        self._listening: asyncio.Event | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue[Event]]:
+        """
+        Receive the events of ``user_id`` while in the block.
+
+        Waits until the worker is listening, so every change committed after
+        entering the block is delivered.
+        """
+        listening = self._start()
+        queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        try:
+            await listening.wait()
+            yield queue
+        finally:
+            queues = self._subscribers[user_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def publish(self, event: Event) -> None:
+        for queue in self._subscribers.get(event.user_id, ()):
+            if queue.full():
+                # A stream this far behind gets the latest events
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def broadcast(self, type: str) -> None:
+        for user_id in list(self._subscribers):
+            self.publish(Event(user_id=user_id, type=type))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        self._listening = None
+
+    def _start(self) -> asyncio.Event:
+        # The listener belongs to the event loop serving the streams; start a
+        # new one if that loop has been replaced (e.g. between test clients)
+        loop = asyncio.get_running_loop()
+        if (
+            self._listener is None
+            or self._listener.done()
+            or self._listener.get_loop() is not loop
+            or self._listening is None
+        ):
+            self._listening = asyncio.Event()
+            self._listener = loop.create_task(self._listen(self._listening))
+        return self._listening
+
+    async def _listen(self, listening: asyncio.Event) -> None:
+        delay = settings.EVENTS_RECONNECT_MIN_SECONDS
+        reconnecting = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {CHANNEL}")
+                    listening.set()
+                    delay = settings.EVENTS_RECONNECT_MIN_SECONDS
+                    if reconnecting:
+                        self.broadcast("resync")
+                    async for notification in connection.notifies():
+                        try:
+                            self.publish(Event.parse(notification.payload))
+                        except Exception:
+                            # Sent by something other than notify, which
+                            # mustn't stop the streams of everyone else
+                            logger.exception(
+                                "Ignoring malformed event %r", notification.payload
+                            )
+            except (psycopg.Error, OSError):
+                logger.warning(
+                    "Event listener lost its connection, reconnecting in %.1fs",
+                    delay,
+                    exc_info=True,
+                )
+            reconnecting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.EVENTS_RECONNECT_MAX_SECONDS)
+
+
+hub = EventHub(
+    str(settings.SQLALCHEMY_DATABASE_URI).replace(
+        "postgresql+psycopg://", "postgresql://", 1
+    )
+)
+
+
+async def stream(user_id: str) -> AsyncGenerator[bytes, None]:
+    """Server-sent events for ``user_id``, with keep-alive comments while idle"""
+    async with hub.subscribe(user_id) as queue:
+        yield b"retry: 5000\n: connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), settings.EVENTS_KEEPALIVE_SECONDS
+                )
+            # Not the builtin TimeoutError before Python 3.11
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield event.encode()
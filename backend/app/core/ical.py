@@ -0,0 +1,106 @@
+"""
+iCalendar (RFC 5545) feeds of appointments, rendered as they are read.
+
+``render`` takes any iterable of appointments, typically a result streamed
+from the database with ``yield_per``, and yields the feed in chunks of about
+``CHUNK_SIZE`` bytes, so a feed of any length is sent in constant memory.
+Appointments only store their start; events last
+``APPOINTMENT_DURATION_MINUTES``.
+"""
+
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+from app.models import Appointment, AppointmentStatus
+
+CHUNK_SIZE = 64 * 1024
+# Lines longer than this many octets are folded onto continuation lines
+_LINE_LIMIT = 75
+
+_STATUS = {
+    AppointmentStatus.SCHEDULED: "CONFIRMED",
+    AppointmentStatus.COMPLETED: "CONFIRMED",
+    AppointmentStatus.CANCELLED: "CANCELLED",
+}
+
+
+def escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> bytes:
+    """Encode a content line, folded without splitting UTF-8 sequences"""
+    encoded = line.encode()
+    if len(encoded) <= _LINE_LIMIT:
+        return encoded + b"\r\n"
+    parts = []
+    start = 0
+    # Continuation lines start with a space, which counts towards their limit
+    limit = _LINE_LIMIT
+    while len(encoded) - start > limit:
+        end = start + limit
+        # Back off to the start of a UTF-8 sequence
+        while encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end])
+        start = end
+        limit = _LINE_LIMIT - 1
+    parts.append(encoded[start:])
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def timestamp(value: datetime) -> str:
+    # Datetimes are stored as naive UTC
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(appointment: Appointment, stamp: str) -> bytes:
+    start = appointment.appointment_datetime
+    end = start + timedelta(minutes=settings.APPOINTMENT_DURATION_MINUTES)
+    domain = urlsplit(settings.FRONTEND_HOST).hostname or "localhost"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{appointment.id}@{domain}",
+        f"DTSTAMP:{stamp}",
+        f"CREATED:{timestamp(appointment.created_at)}",
+        f"DTSTART:{timestamp(start)}",
+        f"DTEND:{timestamp(end)}",
+        f"SUMMARY:{escape(appointment.title)}",
+        f"STATUS:{_STATUS[appointment.status]}",
+    ]
+    if appointment.description:
+        lines.append(f"DESCRIPTION:{escape(appointment.description)}")
+    lines.append("END:VEVENT")
+    return b"".join(fold(line) for line in lines)
+
+
+def render(appointments: Iterable[Appointment], name: str) -> Iterator[bytes]:
+    stamp = timestamp(datetime.utcnow())
+    chunk = bytearray(
+        b"".join(
+            fold(line)
+            for line in (
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                f"PRODID:-//{escape(settings.PROJECT_NAME)}//Appointments//EN",
+                "CALSCALE:GREGORIAN",
+                "METHOD:PUBLISH",
+                f"X-WR-CALNAME:{escape(name)}",
+            )
+        )
+    )
+    for appointment in appointments:
+        chunk += render_event(appointment, stamp)
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += fold("END:VCALENDAR")
+    yield bytes(chunk)
@@ -0,0 +1,178 @@
+"""
+Replay the stored result of requests retried with the same Idempotency-Key.
+
+A request carrying the header first claims ``(user, key)`` in the
+``idempotencykey`` table, in the same transaction that does its work and
+stores the response body. A concurrent duplicate blocks on that row until the
+first request commits, then replays its body; if the first one fails, the
+claim is rolled back with it and the duplicate does the work instead.
+
+Stored results are immutable, so every worker keeps the most recent ones in
+memory and answers retries it has seen without touching the database. Keys
+expire after ``IDEMPOTENCY_KEY_TTL_HOURS``: an expired key is claimed again
+on reuse, and new claims delete a batch of expired rows as they go.
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col
+
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_PURGE_EXPIRED = text(
+    """
+    DELETE FROM idempotencykey WHERE ctid IN (
+        SELECT ctid FROM idempotencykey WHERE expires_at < :now
+        LIMIT 100 FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    body: bytes
+    expires_at: datetime
+
+    def replay(self, request_hash: str) -> Response:
+        if request_hash != self.request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+
+class ResponseCache:
+    """Least recently used stored responses of this worker"""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[tuple[uuid.UUID, str], StoredResponse] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID, key: str) -> StoredResponse | None:
+        with self._lock:
+            stored = self._entries.get((user_id, key))
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.utcnow():
+                del self._entries[(user_id, key)]
+                return None
+            self._entries.move_to_end((user_id, key))
+            return stored
+
+    def put(self, user_id: uuid.UUID, key: str, stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries[(user_id, key)] = stored
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > settings.IDEMPOTENCY_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+cache = ResponseCache()
+
+
+def request_hash(body: BaseModel) -> str:
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+def claim(
+    session: Session, user_id: uuid.UUID, key: str, body_hash: str
+) -> Response | None:
+    """
+    Claim ``key`` for this request, or replay the response stored for it.
+
+    Returns None once claimed; the request must then call ``store`` in the same
+    transaction. Raises 422 if the key was used for a request with another body.
+    """
+    stored = cache.get(user_id, key)
+    if stored is not None:
+        return stored.replay(body_hash)
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    statement = insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        request_hash=body_hash,
+        created_at=now,
+        expires_at=expires_at,
+    )
+    claim_statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "key"],
+        set_={
+            "request_hash": statement.excluded.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "created_at": statement.excluded.created_at,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=IdempotencyKey.expires_at <= now,  # type: ignore[arg-type]
+    ).returning(col(IdempotencyKey.key))
+    if session.execute(claim_statement).first() is not None:
+        session.execute(_PURGE_EXPIRED, {"now": now})
+        return None
+
+    # Waited for the request that claimed the key to commit
+    row = session.get(IdempotencyKey, (user_id, key))
+    assert row is not None and row.status_code is not None
+    assert row.response_body is not None
+    stored = StoredResponse(
+        request_hash=row.request_hash,
+        status_code=row.status_code,
+        body=row.response_body,
+        expires_at=row.expires_at,
+    )
+    cache.put(user_id, key, stored)
+    return stored.replay(body_hash)
+
+
+def store(
+    session: Session,
+    user_id: uuid.UUID,
+    key: str,
+    body: BaseModel,
+    status_code: int = 200,
+) -> Response:
+    """Save the response of a claimed request and commit its transaction."""
+    row = session.get(IdempotencyKey, (user_id, key))
+    assert row is not None
+    stored = StoredResponse(
+        request_hash=row.request_hash,
+        status_code=status_code,
+        body=body.model_dump_json().encode(),
+        expires_at=row.expires_at,
+    )
+    row.status_code = stored.status_code
+    row.response_body = stored.body
+    session.add(row)
+    session.commit()
+    cache.put(user_id, key, stored)
+    return Response(
+        content=stored.body, status_code=status_code, media_type="application/json"
+    )
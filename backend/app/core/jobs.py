@@ -0,0 +1,46 @@
+"""
+Background jobs tracked in the ``job`` table.
+
+A job runs in the worker that accepted the request, after the response has
+been sent (FastAPI ``BackgroundTasks``). Its state lives in the database so
+any worker can report it; a job whose worker died stays ``RUNNING``.
+"""
+
+import logging
+import uuid
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Does the work, updating ``job.processed`` and committing as it goes
+JobFunction = Callable[[Session, Job], None]
+
+
+def run_job(job_id: uuid.UUID, function: JobFunction) -> None:
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+        if job is None:
+            logger.warning("Job %s no longer exists", job_id)
+            return
+        job.status = JobStatus.RUNNING
+        session.add(job)
+        session.commit()
+
+        try:
+            function(session, job)
+        except Exception as e:
+            session.rollback()
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        else:
+            job.status = JobStatus.SUCCEEDED
+        job.finished_at = datetime.utcnow()
+        session.add(job)
+        session.commit()
@@ -0,0 +1,334 @@
+"""
+Per-route request metrics exposed in the Prometheus text format.
+
+Writers never take a lock: every thread records into its own shard (a plain
+dict held in a ``threading.local``) and the shards are only merged when
+``/metrics`` is scraped. Values are per worker process, Prometheus adds the
+``instance`` label and aggregates across workers.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import ExceptionContext
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = tuple[str, ...]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._shards: list[dict[tuple[str, Labels], list[float]]] = []
+        self._local = threading.local()
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def shard(self) -> dict[tuple[str, Labels], list[float]]:
+        try:
+            return self._local.values  # type: ignore[no-any-return]
+        except AttributeError:
+            values: dict[tuple[str, Labels], list[float]] = {}
+            self._local.values = values
+            # list.append is atomic, so shards can be added without a lock
+            self._shards.append(values)
+            return values
+
+    def collect(self, name: str) -> dict[Labels, list[float]]:
+        merged: dict[Labels, list[float]] = {}
+        for shard in list(self._shards):
+            # Copying the items is a single C call under the GIL, so it can't
+            # observe a shard in the middle of a resize
+            for (metric_name, labels), values in list(shard.items()):
+                if metric_name != name:
+                    continue
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        total[i] += value
+        return merged
+
+    def clear(self) -> None:
+        for shard in list(self._shards):
+            shard.clear()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render(self.collect(metric.name)))
+        return "\n".join(lines) + "\n"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        registry: Registry,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def _values(self, labels: Labels, size: int) -> list[float]:
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0.0] * size
+        return values
+
+    def _label_str(self, labels: Labels, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, labels, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self, series: dict[Labels, list[float]]) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type_name}"
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, labels: Labels, amount: float = 1.0) -> None:
+        self._values(labels, 1)[0] += amount
+
+    def render(self, series: dict[Labels, list[float]]) -> Iterable[str]:
+        yield from super().render(series)
+        for labels, values in sorted(series.items()):
+            yield f"{self.name}{self._label_str(labels)} {_format(values[0])}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        registry: Registry,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float) -> None:
+        # One slot per bucket plus +Inf, followed by the running sum
+        values = self._values(labels, len(self.buckets) + 2)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def render(self, series: dict[Labels, list[float]]) -> Iterable[str]:
+        yield from super().render(series)
+        for labels, values in sorted(series.items()):
+            cumulative = 0.0
+            for bound, count in zip(
+                (*self.buckets, float("inf")), values[:-1], strict=True
+            ):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format(bound)
+                bucket_labels = self._label_str(labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {_format(cumulative)}"
+            yield f"{self.name}_sum{self._label_str(labels)} {_format(values[-1])}"
+            yield f"{self.name}_count{self._label_str(labels)} {_format(cumulative)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Total HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+    registry,
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+    registry,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template.",
+    ("method", "route"),
+    registry,
+    buckets=SIZE_BUCKETS,
+)
+DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Number of SQL statements executed per request.",
+    ("method", "route"),
+    registry,
+    buckets=COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements per request.",
+    ("method", "route"),
+    registry,
+)
+THREADPOOL_WAIT = Histogram(
+    "http_request_threadpool_wait_seconds",
+    "Time from request arrival until its first dependency ran in the threadpool.",
+    ("method", "route"),
+    registry,
+)
+
+
+@dataclass
+class RequestStats:
+    start: float
+    db_statements: int = 0
+    db_time: float = 0.0
+    threadpool_wait: float | None = None
+
+
+# The stats object is shared by reference with the threadpool, which copies the
+# context, so sync routes and dependencies record into the same request
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def get_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def record_threadpool_entry() -> None:
+    stats = _request_stats.get()
+    if stats is not None and stats.threadpool_wait is None:
+        stats.threadpool_wait = time.perf_counter() - stats.start
+
+
+# Start times by cursor, as a cursor runs one statement at a time
+_QUERY_START = "metrics_query_start"
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,  # noqa: ARG001
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    conn.info.setdefault(_QUERY_START, {})[cursor] = time.perf_counter()
+
+
+def _record_statement(conn: Any, cursor: Any) -> None:
+    start = conn.info.get(_QUERY_START, {}).pop(cursor, None)
+    stats = _request_stats.get()
+    if start is not None and stats is not None:
+        stats.db_statements += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,  # noqa: ARG001
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    _record_statement(conn, cursor)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # Failed statements count too. Errors raised before a statement ran, or
+    # after it was recorded, find no start time
+    cursor = getattr(context.execution_context, "cursor", None)
+    if context.connection is not None and cursor is not None:
+        _record_statement(context.connection, cursor)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(start=time.perf_counter())
+        token = _request_stats.set(stats)
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - stats.start
+            labels = (scope["method"], route_template(scope))
+            REQUESTS.inc((*labels, str(status_code)))
+            REQUEST_LATENCY.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, response_size)
+            DB_STATEMENTS.observe(labels, stats.db_statements)
+            DB_TIME.observe(labels, stats.db_time)
+            if stats.threadpool_wait is not None:
+                THREADPOOL_WAIT.observe(labels, stats.threadpool_wait)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:  # noqa: ARG001
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,38 @@
+"""
+Operations shared by the Alembic migrations in ``app/alembic/versions``.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def create_index_concurrently(
+    name: str, table: str, columns: Sequence[str], **options: Any
+) -> None:
+    """
+    ``CREATE INDEX CONCURRENTLY``, which doesn't block writes while the index
+    builds on a live table. Call it in ``op.get_context().autocommit_block()``,
+    as it can't run inside a transaction block.
+
+    A failed concurrent build leaves an INVALID index behind that
+    ``IF NOT EXISTS`` would skip, so it is dropped before building again.
+    """
+    op.execute(
+        sa.text(
+            "DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index"
+            f" WHERE indexrelid = to_regclass('{name}') AND NOT indisvalid)"
+            f" THEN DROP INDEX {name}; END IF; END $$"
+        )
+    )
+    op.create_index(
+        name,
+        table,
+        list(columns),
+        unique=False,
+        if_not_exists=True,
+        postgresql_concurrently=True,
+        **options,
+    )
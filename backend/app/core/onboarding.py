@@ -0,0 +1,163 @@
+"""
+Questionnaires assigned to every user who signs up.
+
+The onboarding policy is a set of template ids (``ONBOARDING_TEMPLATE_IDS``)
+and tags (``ONBOARDING_TEMPLATE_TAGS``): every active template that is listed
+or carries one of the tags is assigned, due ``ONBOARDING_DUE_DAYS`` later.
+
+Signups don't look the templates up. Each worker keeps the resolved ids in
+``registry`` for ``ONBOARDING_CACHE_SECONDS``, and drops them once a session
+of its own commits a change to a template, so a worker sees its own edits at
+once and the others' within the TTL. The assignments are inserted from the
+cached ids joined with the active templates, so a template deleted or
+deactivated meanwhile is skipped rather than assigned.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm import UOWTransaction
+from sqlmodel import Session, col, or_, select
+
+from app.core import events
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.models import AssignmentStatus, QuestionnaireAssignment, QuestionnaireTemplate
+
+# Set on sessions that flushed a template change, cleared when they end
+_CHANGED = "onboarding_templates_changed"
+
+
+def policy() -> Any:
+    """Which active templates ``ONBOARDING_*`` selects"""
+    return select(QuestionnaireTemplate.id).where(
+        col(QuestionnaireTemplate.is_active).is_(True),
+        or_(
+            col(QuestionnaireTemplate.id).in_(settings.ONBOARDING_TEMPLATE_IDS),
+            col(QuestionnaireTemplate.tags).overlap(  # type: ignore[attr-defined]
+                settings.ONBOARDING_TEMPLATE_TAGS
+            ),
+        ),
+    )
+
+
+class OnboardingRegistry:
+    """This worker's resolved onboarding templates"""
+
+    def __init__(self) -> None:
+        self._templates: tuple[uuid.UUID, ...] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def templates(self, session: Session) -> tuple[uuid.UUID, ...]:
+        with self._lock:
+            templates = self._templates
+            age = time.monotonic() - self._loaded_at
+        if templates is not None and age <= settings.ONBOARDING_CACHE_SECONDS:
+            return templates
+        loaded_at = time.monotonic()
+        templates = tuple(
+            session.exec(policy().order_by(col(QuestionnaireTemplate.id))).all()
+        )
+        with self._lock:
+            # Unless cleared while loading, by a change the query may have missed
+            if self._loaded_at <= loaded_at:
+                self._templates, self._loaded_at = templates, loaded_at
+        return templates
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates = None
+            self._loaded_at = time.monotonic()
+
+
+registry = OnboardingRegistry()
+
+
+def assign(
+    session: Session, user_id: uuid.UUID, *, now: datetime | None = None
+) -> list[uuid.UUID]:
+    """
+    Assign the onboarding templates to ``user_id`` in one statement, along
+    with the events, leaving the commit to the caller. Returns the new
+    assignments' ids.
+    """
+    templates = registry.templates(session)
+    if not templates:
+        return []
+    now = now or datetime.utcnow()
+    table = QuestionnaireAssignment.__table__  # type: ignore[attr-defined]
+    new = (
+        sa.func.unnest(
+            sa.literal(list(templates), ARRAY(sa.Uuid)),
+            sa.literal([uuid7() for _ in templates], ARRAY(sa.Uuid)),
+        )
+        .table_valued(sa.column("template_id", sa.Uuid), sa.column("id", sa.Uuid))
+        .render_derived(name="new")
+    )
+    rows = sa.select(
+        new.c.id,
+        col(QuestionnaireTemplate.id),
+        sa.literal(user_id, sa.Uuid),
+        sa.literal(now, table.c.assigned_at.type),
+        sa.literal(
+            now + timedelta(days=settings.ONBOARDING_DUE_DAYS), table.c.due_date.type
+        ),
+        sa.literal(AssignmentStatus.PENDING, table.c.status.type),
+        sa.false(),
+    ).join_from(
+        new,
+        QuestionnaireTemplate,
+        sa.and_(
+            col(QuestionnaireTemplate.id) == new.c.template_id,
+            col(QuestionnaireTemplate.is_active).is_(True),
+        ),
+    )
+    assignments = list(
+        session.scalars(
+            sa.insert(table)
+            .from_select(
+                [
+                    "id",
+                    "questionnaire_id",
+                    "user_id",
+                    "assigned_at",
+                    "due_date",
+                    "status",
+                    "reminder_sent",
+                ],
+                rows,
+            )
+            .returning(table.c.id)
+        )
+    )
+    events.notify_many(
+        session, [(user_id, "assignment.created", id) for id in assignments]
+    )
+    return assignments
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _note_template_changes(session: OrmSession, _context: UOWTransaction) -> None:
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(instance, QuestionnaireTemplate) for instance in changed):
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _clear_after_commit(session: OrmSession) -> None:
+    if session.info.pop(_CHANGED, False):
+        registry.clear()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,122 @@
+"""
+Monthly range partitions, created on demand.
+
+``questionnaireresponse`` and ``answer`` are partitioned by month of
+completion, as are their archive tables. Partitions are named
+``<table>_pYYYYMM`` (plus ``<table>_default`` for rows outside every month
+created so far) and are not part of ``SQLModel.metadata``; Alembic's
+autogenerate skips them through ``is_partition``.
+"""
+
+import logging
+import re
+from collections.abc import Iterator
+from datetime import datetime
+
+from sqlalchemy import Connection, text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by RANGE (completed_at) that take live writes
+PARTITIONED_TABLES = ("questionnaireresponse", "answer")
+
+_PARTITION_NAME = re.compile(r"_(p\d{6}|default)$")
+
+
+def is_partition(table_name: str) -> bool:
+    return _PARTITION_NAME.search(table_name) is not None
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def add_months(start: datetime, count: int) -> datetime:
+    month = month_start(start)
+    for _ in range(count):
+        month = next_month(month)
+    return month
+
+
+def months(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Start of every month overlapping ``[start, end)``."""
+    month = month_start(start)
+    while month < end:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _exists(connection: Connection, name: str) -> bool:
+    return bool(
+        connection.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"), {"name": f'"{name}"'}
+        ).scalar_one()
+    )
+
+
+def _has_rows(connection: Connection, table: str, month: datetime) -> bool:
+    return bool(
+        connection.execute(
+            text(
+                f'SELECT EXISTS (SELECT FROM "{table}"'
+                " WHERE completed_at >= :start AND completed_at < :end)"
+            ),
+            {"start": month, "end": next_month(month)},
+        ).scalar_one()
+    )
+
+
+def ensure_monthly_partitions(
+    connection: Connection, table: str, start: datetime, end: datetime
+) -> list[str]:
+    """Create the missing partitions of ``table`` covering ``[start, end)``."""
+    default = f"{table}_default"
+    has_default = _exists(connection, default)
+    created = []
+    for month in months(start, end):
+        name = partition_name(table, month)
+        if _exists(connection, name):
+            continue
+        # Postgres refuses a partition for rows that already sit in the default
+        # partition; they have to be moved by hand
+        if has_default and _has_rows(connection, default, month):
+            logger.warning("Not creating %s, %s has rows for it", name, default)
+            continue
+        connection.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}"'
+                f" FOR VALUES FROM ('{month.isoformat()}')"
+                f" TO ('{next_month(month).isoformat()}')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def ensure_partitions_ahead(
+    connection: Connection, now: datetime | None = None
+) -> list[str]:
+    """
+    Create the partitions of the live tables up to ``PARTITION_MONTHS_AHEAD``.
+
+    Called by ``init_db`` on every deploy, so new months exist well before
+    rows arrive for them instead of piling up in the default partitions.
+    """
+    start = month_start(now or datetime.utcnow())
+    end = add_months(start, settings.PARTITION_MONTHS_AHEAD + 1)
+    created = []
+    for table in PARTITIONED_TABLES:
+        created += ensure_monthly_partitions(connection, table, start, end)
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    return created
@@ -0,0 +1,100 @@
+"""
+Pure-Python sampling profiler for a live worker.
+
+Stacks of every thread are read with ``sys._current_frames()`` and returned in
+the collapsed format (``frame;frame;frame count`` per line) understood by
+flamegraph.pl, speedscope and similar tools.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from types import FrameType
+from typing import Literal
+
+ProfileMode = Literal["wall", "cpu"]
+
+_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{frame.f_code.co_name} ({module}:{frame.f_lineno})"
+
+
+def _collapse(frame: FrameType | None, root: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+def _cpu_clock(ident: int) -> Callable[[], float] | None:
+    # Per-thread CPU clocks are available on Linux and most Unixes
+    try:
+        clock_id = time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+def sample(
+    seconds: float, *, interval: float = 0.01, mode: ProfileMode = "wall"
+) -> Counter[str]:
+    """
+    Sample all other threads of this process for ``seconds``.
+
+    In ``wall`` mode every thread is counted on every tick, idle or not. In
+    ``cpu`` mode a thread only counts when its CPU clock advanced since the
+    previous tick, so threads blocked on I/O or locks drop out.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already being collected")
+    try:
+        return _sample(seconds, interval, mode)
+    finally:
+        _lock.release()
+
+
+def _sample(seconds: float, interval: float, mode: ProfileMode) -> Counter[str]:
+    stacks: Counter[str] = Counter()
+    own_ident = threading.get_ident()
+    clocks: dict[int, Callable[[], float] | None] = {}
+    last_cpu: dict[int, float] = {}
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if mode == "cpu":
+                if ident not in clocks:
+                    clocks[ident] = _cpu_clock(ident)
+                clock = clocks[ident]
+                if clock is not None:
+                    try:
+                        now = clock()
+                    except OSError:
+                        # The thread exited between listing and reading its clock
+                        continue
+                    previous = last_cpu.get(ident)
+                    last_cpu[ident] = now
+                    if previous is None or now <= previous:
+                        continue
+            stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+        time.sleep(interval)
+
+    return stacks
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
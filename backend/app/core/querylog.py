@@ -0,0 +1,249 @@
+"""
+SQL diagnostics: slow-query logging, N+1 detection and per-route query budgets.
+
+Every request gets a ``QueryRecorder`` that counts statements by fingerprint,
+the statement text with literals and placeholders collapsed. The same
+fingerprint showing up more than ``N_PLUS_ONE_THRESHOLD`` times in one request
+is almost always a lazy relationship being loaded in a loop.
+"""
+
+import logging
+import re
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import ExceptionContext
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+# Transaction control, like the BEGIN and COMMIT the driver sends itself
+_SAVEPOINT = re.compile(r"(RELEASE |ROLLBACK TO )?SAVEPOINT\b", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    normalized = _STRING.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """
+    Declare the maximum number of SQL statements a route may execute.
+
+    Apply it below the router decorator so FastAPI registers the marked function.
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.__query_budget__ = max_queries  # type: ignore[attr-defined]
+        return endpoint
+
+    return decorator
+
+
+def get_query_budget(scope: Scope) -> int | None:
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__query_budget__", None)
+
+
+@dataclass
+class BudgetViolation:
+    route: str
+    budget: int
+    count: int
+    fingerprints: dict[str, int]
+
+    def __str__(self) -> str:
+        worst = sorted(self.fingerprints.items(), key=lambda kv: -kv[1])[:5]
+        lines = [f"{self.route} ran {self.count} queries (budget {self.budget})"]
+        lines += [f"  {count}x {statement}" for statement, count in worst]
+        return "\n".join(lines)
+
+
+# Recent budget violations, kept so the pytest plugin can fail the test that
+# triggered them (under TestClient the app runs on another thread)
+budget_violations: deque[BudgetViolation] = deque(maxlen=100)
+
+
+@dataclass
+class QueryRecorder:
+    n_plus_one_threshold: int | None = None
+    explain: bool = False
+    count: int = 0
+    duration: float = 0.0
+    fingerprints: Counter[str] = field(default_factory=Counter)
+    n_plus_one: set[str] = field(default_factory=set)
+
+    def record(self, statement: str, duration: float) -> None:
+        if _SAVEPOINT.match(statement):
+            return
+        self.count += 1
+        self.duration += duration
+        key = fingerprint(statement)
+        self.fingerprints[key] += 1
+        if (
+            self.n_plus_one_threshold is not None
+            and self.fingerprints[key] > self.n_plus_one_threshold
+            and key not in self.n_plus_one
+        ):
+            self.n_plus_one.add(key)
+            logger.warning(
+                "Possible N+1: statement repeated more than %d times: %s",
+                self.n_plus_one_threshold,
+                key,
+            )
+
+
+_recorder: ContextVar[QueryRecorder | None] = ContextVar("query_recorder", default=None)
+
+
+def get_recorder() -> QueryRecorder | None:
+    return _recorder.get()
+
+
+@contextmanager
+def record_queries(
+    n_plus_one_threshold: int | None = None, explain: bool = False
+) -> Generator[QueryRecorder, None, None]:
+    recorder = QueryRecorder(n_plus_one_threshold=n_plus_one_threshold, explain=explain)
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def explain(cursor: Any, statement: str, parameters: Any) -> str | None:
+    """
+    Capture the plan of a statement that just ran, on a separate cursor.
+
+    Runs inside a savepoint so a failing EXPLAIN can't abort the caller's
+    transaction.
+    """
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return None
+    try:
+        with cursor.connection.cursor() as explain_cursor:
+            explain_cursor.execute("SAVEPOINT query_explain")
+            try:
+                explain_cursor.execute(f"EXPLAIN {statement}", parameters)
+                rows = explain_cursor.fetchall()
+            finally:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT query_explain")
+    except Exception as e:
+        logger.debug("Could not EXPLAIN statement: %s", e)
+        return None
+    return "\n".join(row[0] for row in rows)
+
+
+# Start times by cursor, as a cursor runs one statement at a time
+_QUERY_START = "querylog_start"
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,  # noqa: ARG001
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    conn.info.setdefault(_QUERY_START, {})[cursor] = time.perf_counter()
+
+
+def _record_statement(conn: Any, cursor: Any, statement: str) -> float | None:
+    start: float | None = conn.info.get(_QUERY_START, {}).pop(cursor, None)
+    if start is None:
+        return None
+    duration = time.perf_counter() - start
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.record(statement, duration)
+    return duration
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # Failed statements count towards the budget too. Errors raised before a
+    # statement ran, or after it was recorded, find no start time
+    cursor = getattr(context.execution_context, "cursor", None)
+    if context.connection is not None and cursor is not None and context.statement:
+        _record_statement(context.connection, cursor, context.statement)
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,  # noqa: ARG001
+    executemany: bool,
+) -> None:
+    duration = _record_statement(conn, cursor, statement)
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if duration is None or threshold is None or duration * 1000 < threshold:
+        return
+    recorder = _recorder.get()
+    plan = None
+    if not executemany and (
+        settings.SLOW_QUERY_EXPLAIN or (recorder is not None and recorder.explain)
+    ):
+        plan = explain(cursor, statement, parameters)
+    logger.warning(
+        "Slow query (%.1f ms): %s%s",
+        duration * 1000,
+        statement,
+        f"\n{plan}" if plan else "",
+    )
+
+
+def instrument_engine(engine: Engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryRecorderMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with record_queries(
+            n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD
+        ) as recorder:
+            await self.app(scope, receive, send)
+
+        budget = get_query_budget(scope)
+        if budget is not None and recorder.count > budget:
+            route = getattr(scope.get("route"), "path_format", scope["path"])
+            violation = BudgetViolation(
+                route=f"{scope['method']} {route}",
+                budget=budget,
+                count=recorder.count,
+                fingerprints=dict(recorder.fingerprints),
+            )
+            budget_violations.append(violation)
+            logger.warning("Query budget exceeded: %s", violation)
@@ -0,0 +1,103 @@
+"""
+Whether the database is there for the app, and waiting until it is.
+
+Containers starting next to their database (``app.backend_pre_start``) used
+to open a session every second until one worked. Each attempt now first
+checks that the database's port accepts TCP connections, which fails within
+``READINESS_CONNECT_TIMEOUT_SECONDS`` where connecting could hang, and only
+then connects and runs ``SELECT 1``. Failed attempts are retried with
+exponential backoff and full jitter: the first retries come within a
+fraction of a second, so a database that's just come up doesn't hold up the
+boot, while a recovering one isn't hit by every waiting container at once.
+
+``check`` also compares the database's Alembic revision with the head of the
+migrations shipped with the code. It's what ``/utils/ready`` reports: a
+worker whose database is unreachable or not migrated yet isn't ready for
+traffic, while ``/utils/health-check`` only says the process is up.
+"""
+
+import functools
+import logging
+import socket
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+from tenacity import (
+    Retrying,
+    before_sleep_log,
+    retry_if_exception_type,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+from app.models import Readiness
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = Path(__file__).parents[1] / "alembic"
+
+
+class UnreachableError(Exception):
+    pass
+
+
+@functools.cache
+def migration_heads() -> frozenset[str]:
+    return frozenset(ScriptDirectory(str(MIGRATIONS)).get_heads())
+
+
+def reachable(db_engine: Engine) -> bool:
+    address = (db_engine.url.host or "localhost", db_engine.url.port or 5432)
+    try:
+        socket.create_connection(
+            address, timeout=settings.READINESS_CONNECT_TIMEOUT_SECONDS
+        ).close()
+    except OSError:
+        return False
+    return True
+
+
+def ping(db_engine: Engine) -> None:
+    """One attempt, raising when the database isn't accepting queries"""
+    if not reachable(db_engine):
+        raise UnreachableError(
+            f"Can't reach the database at {db_engine.url.host}:{db_engine.url.port}"
+        )
+    with db_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def wait_until_ready(
+    db_engine: Engine, *, sleep: Callable[[float], None] = time.sleep
+) -> None:
+    """Retry ``ping`` until it succeeds, raising its error after the timeout"""
+    retrying = Retrying(
+        retry=retry_if_exception_type((UnreachableError, OperationalError)),
+        stop=stop_after_delay(settings.READINESS_TIMEOUT_SECONDS),
+        wait=wait_random_exponential(
+            multiplier=settings.READINESS_BACKOFF_MIN_SECONDS,
+            max=settings.READINESS_BACKOFF_MAX_SECONDS,
+        ),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        sleep=sleep,
+        reraise=True,
+    )
+    retrying(ping, db_engine)
+
+
+def check(db_engine: Engine) -> Readiness:
+    if not reachable(db_engine):
+        return Readiness(ready=False, reachable=False, database=False, migrations=False)
+    try:
+        with db_engine.connect() as connection:
+            revisions = MigrationContext.configure(connection).get_current_heads()
+    except OperationalError:
+        return Readiness(ready=False, reachable=True, database=False, migrations=False)
+    migrated = frozenset(revisions) == migration_heads()
+    return Readiness(ready=migrated, reachable=True, database=True, migrations=migrated)
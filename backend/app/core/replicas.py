@@ -0,0 +1,218 @@
+"""
+Send the reads of marked routes to streaming replicas.
+
+Routes decorated with ``replica_reads`` get a ``RoutingSession``. Its queries
+go to a replica that:
+
+* answered its last status check (made at most every
+  ``REPLICA_CHECK_INTERVAL_SECONDS`` per process),
+* lags the primary by at most ``REPLICA_MAX_LAG_SECONDS``, and
+* has replayed the last write the current user committed on the primary, so
+  users read their own writes.
+
+Otherwise, and from the first flush on, the session uses the primary.
+Writes are tracked per worker process for ``REPLICA_WRITE_TRACKING_SECONDS``;
+a user whose next request lands on another worker may briefly read from a
+replica that hasn't replayed their write yet, within the lag limit.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlmodel import Session
+from starlette.types import Scope
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# On a primary (e.g. a replica URI pointing at it in development) there is
+# nothing to replay. A standby that has replayed everything it received isn't
+# lagging, even if the primary has been idle since its last transaction.
+_STATUS = text(
+    """
+    SELECT
+        CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+            ELSE pg_current_wal_lsn() END::text,
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE coalesce(
+                extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+            )
+        END
+    """
+)
+
+
+def replica_reads(endpoint: F) -> F:
+    """
+    Mark a read-only route whose queries may be served by a replica.
+
+    Apply it below the router decorator so FastAPI registers the marked function.
+    """
+    endpoint.__replica_reads__ = True  # type: ignore[attr-defined]
+    return endpoint
+
+
+def uses_replicas(scope: Scope) -> bool:
+    return getattr(scope.get("endpoint"), "__replica_reads__", False)
+
+
+def parse_lsn(lsn: str) -> int:
+    """A WAL position like ``16/B374D848`` as a comparable integer."""
+    high, low = lsn.split("/")
+    return int(high, 16) << 32 | int(low, 16)
+
+
+@dataclass(frozen=True)
+class ReplicaStatus:
+    healthy: bool
+    replay_lsn: int = 0
+    lag_seconds: float = 0.0
+
+
+class Replica:
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._status = ReplicaStatus(healthy=False)
+        self._checked_at: float | None = None
+        self._checking = False
+        self._lock = threading.Lock()
+
+    def status(self) -> ReplicaStatus:
+        """
+        The replica's status, checked by the first request once it is stale;
+        requests meanwhile get the last known one rather than wait for it
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = (
+                self._checked_at is None
+                or now - self._checked_at >= settings.REPLICA_CHECK_INTERVAL_SECONDS
+            )
+            if self._checking or not due:
+                return self._status
+            self._checking = True
+        status = ReplicaStatus(healthy=False)
+        try:
+            status = self._check()
+        finally:
+            with self._lock:
+                self._status, self._checked_at, self._checking = status, now, False
+        return status
+
+    def _check(self) -> ReplicaStatus:
+        try:
+            with self.engine.connect() as connection:
+                lsn, lag = connection.execute(_STATUS).one()
+        except SQLAlchemyError:
+            logger.warning(
+                "Replica %s is unavailable", self.engine.url.host, exc_info=True
+            )
+            return ReplicaStatus(healthy=False)
+        return ReplicaStatus(
+            healthy=True, replay_lsn=parse_lsn(lsn), lag_seconds=float(lag)
+        )
+
+
+class ReplicaRouter:
+    def __init__(self, engines: Sequence[Engine]) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        # User id -> (WAL position of their last write, when to forget it)
+        self._writes: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def record_write(self, user_id: str, lsn: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._writes) > 10_000:
+                self._writes = {
+                    user: write
+                    for user, write in self._writes.items()
+                    if write[1] > now
+                }
+            self._writes[user_id] = (lsn, now + settings.REPLICA_WRITE_TRACKING_SECONDS)
+
+    def last_write(self, user_id: str | None) -> int:
+        if user_id is None:
+            return 0
+        with self._lock:
+            write = self._writes.get(user_id)
+        if write is None or write[1] <= time.monotonic():
+            return 0
+        return write[0]
+
+    def choose(self, user_id: str | None) -> Engine | None:
+        """A replica fit to serve ``user_id``, or None for the primary."""
+        needed = self.last_write(user_id)
+        candidates = []
+        for replica in self.replicas:
+            status = replica.status()
+            if (
+                status.healthy
+                and status.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+                and status.replay_lsn >= needed
+            ):
+                candidates.append(replica.engine)
+        return random.choice(candidates) if candidates else None
+
+
+class RoutingSession(Session):
+    """
+    Session bound to a replica or the primary on its first query.
+
+    Set ``info["user_id"]`` before then to get read-your-writes routing.
+    """
+
+    def __init__(self, primary: Engine, router: ReplicaRouter, **kwargs: Any) -> None:
+        super().__init__(primary, **kwargs)
+        self.router = router
+        self.use_primary = False
+        self._replica: Engine | None = None
+        self._routed = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.use_primary = True
+        if not self.use_primary:
+            if not self._routed:
+                self._replica = self.router.choose(self.info.get("user_id"))
+                self._routed = True
+            if self._replica is not None:
+                return self._replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:  # noqa: ARG001
+    session.info["flushed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop("flushed", False):
+        session.info["committed_writes"] = True
+
+
+def record_session_writes(session: Session, router: ReplicaRouter) -> None:
+    """
+    Remember where the primary's WAL was after the session's commits.
+
+    A replica that has replayed up to there has the user's writes.
+    """
+    user_id = session.info.get("user_id")
+    if not session.info.get("committed_writes") or user_id is None:
+        return
+    lsn = session.execute(text("SELECT pg_current_wal_lsn()::text")).scalar_one()
+    router.record_write(user_id, parse_lsn(lsn))
@@ -11,6 +11,10 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+# Stored for users who haven't chosen a password yet, such as imported users
+# sent an invite; no password matches it
+UNUSABLE_PASSWORD = "!"
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
@@ -20,6 +24,8 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
     return pwd_context.verify(plain_password, hashed_password)
 
 
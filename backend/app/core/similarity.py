@@ -0,0 +1,321 @@
+"""
+Nearest orientations by trait values.
+
+Every trait name gets a fixed dimension in ``traitdimension`` the first time
+it is used, and each orientation stores its traits as ``trait_vector``, one
+byte (the 0-100 value) per dimension. Traits an orientation doesn't have
+count as 0, and vectors are as long as their highest dimension. Trait names
+are free-form, so only the first ``ORIENTATION_MAX_DIMENSIONS`` names get a
+dimension; later ones are stored but left out of the search, which keeps the
+vectors, and the matrix every worker holds, from growing with every new name.
+
+Each worker searches an in-memory matrix of all vectors, loaded on the first
+search and reloaded in the background once it is older than
+``ORIENTATION_INDEX_REFRESH_SECONDS``; results are checked against the
+database, so deleted orientations never show up. Up to
+``ORIENTATION_ANN_MIN_ROWS`` the search is exact. Larger sets get an inverted
+file index: vectors are clustered with k-means and only the
+``ORIENTATION_ANN_PROBES`` clusters nearest to the query are scanned, which is
+approximate but keeps a search over millions of orientations in milliseconds.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import Engine, event, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.models import Orientation, OrientationTraitBase, TraitDimension
+
+logger = logging.getLogger(__name__)
+
+Matrix = npt.NDArray[np.float32]
+
+# Vectors assigned to clusters per step while building, bounding the
+# distance matrix to this many rows times the number of clusters
+_ASSIGN_CHUNK = 8192
+_KMEANS_SAMPLE = 50_000
+_KMEANS_ITERATIONS = 10
+
+# Dimensions never change once assigned, so every worker caches them, once
+# the transaction that read or assigned them has committed: ones cached from
+# a transaction that rolled back would be handed out again to other names
+_dimensions: dict[str, int] = {}
+_dimensions_lock = threading.Lock()
+_PENDING = "trait_dimensions"
+
+# New names in alphabetical order, while there are dimensions left. A name
+# inserted concurrently waits for that transaction and is then skipped
+_ASSIGN = text(
+    """
+    INSERT INTO traitdimension (name)
+    SELECT name FROM unnest(CAST(:names AS varchar[])) AS new(name)
+    WHERE NOT EXISTS (SELECT 1 FROM traitdimension t WHERE t.name = new.name)
+    ORDER BY name
+    LIMIT greatest(0, :limit - (SELECT count(*) FROM traitdimension))
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+def _assign_dimensions(session: Session, names: set[str]) -> dict[str, int]:
+    limit = settings.ORIENTATION_MAX_DIMENSIONS
+    session.execute(_ASSIGN, {"names": sorted(names), "limit": limit})
+    rows = session.exec(
+        select(TraitDimension.name, TraitDimension.dimension).where(
+            col(TraitDimension.name).in_(names),
+            col(TraitDimension.dimension) < limit,
+        )
+    ).all()
+    return {name: dimension for name, dimension in rows if dimension is not None}
+
+
+def trait_dimensions(session: Session, names: Iterable[str]) -> dict[str, int]:
+    """
+    Dimensions of ``names``, assigning new ones to unseen names in the
+    session's transaction. Names left without a dimension are missing.
+    """
+    wanted = set(names)
+    pending: dict[str, int] = session.info.setdefault(_PENDING, {})
+    with _dimensions_lock:
+        found = {name: _dimensions[name] for name in wanted if name in _dimensions}
+    found.update(
+        (name, pending[name]) for name in wanted - found.keys() if name in pending
+    )
+    if missing := wanted - found.keys():
+        assigned = _assign_dimensions(session, missing)
+        pending.update(assigned)
+        found.update(assigned)
+    return found
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _cache_after_commit(session: OrmSession) -> None:
+    if pending := session.info.pop(_PENDING, None):
+        with _dimensions_lock:
+            _dimensions.update(pending)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def encode_traits(session: Session, traits: Sequence[OrientationTraitBase]) -> bytes:
+    dimensions = trait_dimensions(session, (trait.name for trait in traits))
+    vector = bytearray(max(dimensions.values(), default=-1) + 1)
+    for trait in traits:
+        if trait.name not in dimensions:
+            continue
+        # A name given twice keeps its highest value
+        dimension = dimensions[trait.name]
+        vector[dimension] = max(vector[dimension], trait.value)
+    return bytes(vector)
+
+
+def _to_matrix(vectors: Sequence[bytes], width: int) -> Matrix:
+    matrix = np.zeros((len(vectors), width), dtype=np.uint8)
+    for row, vector in enumerate(vectors):
+        matrix[row, : len(vector)] = np.frombuffer(vector[:width], dtype=np.uint8)
+    return matrix.astype(np.float32)
+
+
+def _squared_distances(
+    matrix: Matrix, norms: Matrix, query: Matrix
+) -> npt.NDArray[np.float32]:
+    # |m - q|^2 = |m|^2 - 2 m.q + |q|^2, a single matrix-vector product
+    distances: npt.NDArray[np.float32] = norms - 2 * (matrix @ query)
+    distances += query @ query
+    return distances
+
+
+def _nearest_clusters(points: Matrix, centroids: Matrix) -> npt.NDArray[np.intp]:
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    labels = np.empty(len(points), dtype=np.intp)
+    for start in range(0, len(points), _ASSIGN_CHUNK):
+        chunk = points[start : start + _ASSIGN_CHUNK]
+        # |p|^2 is the same for every centroid and doesn't change the argmin
+        labels[start : start + len(chunk)] = np.argmin(
+            centroid_norms - 2 * (chunk @ centroids.T), axis=1
+        )
+    return labels
+
+
+def _kmeans(points: Matrix, clusters: int, rng: np.random.Generator) -> Matrix:
+    sample = points[rng.choice(len(points), min(len(points), _KMEANS_SAMPLE), False)]
+    centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        labels = _nearest_clusters(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=clusters)
+        filled = counts > 0
+        # Empty clusters keep their centroid
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+@dataclass(frozen=True)
+class VectorSet:
+    """Orientation vectors searched exactly, or by cluster when ``offsets`` is set"""
+
+    ids: npt.NDArray[np.void]
+    matrix: Matrix
+    norms: Matrix
+    built_at: float
+    # Inverted file: rows are sorted by cluster, the rows of cluster i are
+    # offsets[i]:offsets[i + 1]
+    centroids: Matrix | None = None
+    offsets: npt.NDArray[np.intp] | None = None
+
+    @classmethod
+    def build(
+        cls, rows: Iterable[tuple[uuid.UUID, bytes]], *, ann_min_rows: int
+    ) -> "VectorSet":
+        ids: list[bytes] = []
+        vectors: list[bytes] = []
+        for id, vector in rows:
+            ids.append(id.bytes)
+            vectors.append(vector)
+        # Vectors stored before the limit was lowered may be longer
+        width = min(
+            max((len(vector) for vector in vectors), default=0),
+            settings.ORIENTATION_MAX_DIMENSIONS,
+        )
+        matrix = _to_matrix(vectors, width)
+        id_array = np.array(ids, dtype="V16")
+        centroids = offsets = None
+        if len(matrix) >= ann_min_rows and width:
+            rng = np.random.default_rng(0)
+            centroids = _kmeans(matrix, max(1, int(np.sqrt(len(matrix)))), rng)
+            labels = _nearest_clusters(matrix, centroids)
+            order = np.argsort(labels, kind="stable")
+            matrix, id_array = matrix[order], id_array[order]
+            offsets = np.searchsorted(
+                labels[order], np.arange(len(centroids) + 1)
+            ).astype(np.intp)
+        return cls(
+            ids=id_array,
+            matrix=matrix,
+            norms=(matrix * matrix).sum(axis=1),
+            built_at=time.monotonic(),
+            centroids=centroids,
+            offsets=offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query_vector(self, vector: bytes) -> Matrix:
+        # Dimensions added since the set was built are left out
+        query = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        clipped = vector[: len(query)]
+        query[: len(clipped)] = np.frombuffer(clipped, dtype=np.uint8)
+        return query
+
+    def search(
+        self,
+        vector: bytes,
+        k: int,
+        *,
+        exclude: uuid.UUID | None = None,
+        probes: int = 1,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """The ``k`` nearest ids and their euclidean distances, nearest first"""
+        if not len(self):
+            return []
+        query = self.query_vector(vector)
+        rows: npt.NDArray[np.intp] | slice = slice(None)
+        if self.centroids is not None and self.offsets is not None:
+            centroid_distances = _squared_distances(
+                self.centroids, (self.centroids * self.centroids).sum(axis=1), query
+            )
+            ranges = []
+            found = 0
+            # Probe further clusters while those probed hold too few vectors
+            for probed, cluster in enumerate(np.argsort(centroid_distances)):
+                if probed >= probes and found > k:
+                    break
+                start, end = self.offsets[cluster], self.offsets[cluster + 1]
+                ranges.append(np.arange(start, end, dtype=np.intp))
+                found += end - start
+            rows = np.concatenate(ranges)
+        ids = self.ids[rows]
+        distances = _squared_distances(self.matrix[rows], self.norms[rows], query)
+
+        # One more in case the query's own orientation is among them
+        count = min(k + 1, len(distances))
+        top = np.argpartition(distances, count - 1)[:count]
+        top = top[np.argsort(distances[top], kind="stable")]
+        matches = [
+            (uuid.UUID(bytes=ids[i].tobytes()), float(np.sqrt(max(distances[i], 0))))
+            for i in top
+        ]
+        return [(id, distance) for id, distance in matches if id != exclude][:k]
+
+
+class SimilarityIndex:
+    """The vector set of every orientation, searched by superusers"""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._vectors: VectorSet | None = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self) -> VectorSet:
+        with Session(self.engine) as session:
+            rows: Any = session.exec(
+                select(Orientation.id, Orientation.trait_vector).execution_options(
+                    yield_per=10_000
+                )
+            )
+            vectors = VectorSet.build(
+                rows, ann_min_rows=settings.ORIENTATION_ANN_MIN_ROWS
+            )
+        self._vectors = vectors
+        return vectors
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Couldn't refresh the orientation similarity index")
+        finally:
+            self._refreshing = False
+
+    def vectors(self) -> VectorSet:
+        vectors = self._vectors
+        if vectors is None:
+            with self._lock:
+                if self._vectors is None:
+                    return self.refresh()
+                return self._vectors
+        age = time.monotonic() - vectors.built_at
+        if age > settings.ORIENTATION_INDEX_REFRESH_SECONDS:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(
+                        target=self._refresh_in_background, daemon=True
+                    ).start()
+        return vectors
+
+    def search(
+        self, vector: bytes, k: int, *, exclude: uuid.UUID | None = None
+    ) -> list[tuple[uuid.UUID, float]]:
+        return self.vectors().search(
+            vector, k, exclude=exclude, probes=settings.ORIENTATION_ANN_PROBES
+        )
+
+    def clear(self) -> None:
+        self._vectors = None
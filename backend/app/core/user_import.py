@@ -0,0 +1,219 @@
+"""
+Create users in bulk from a CSV or NDJSON upload.
+
+``POST /users/import`` writes the upload to a temporary file as it arrives
+and hands it to a background job, whose progress ``GET /jobs/{id}`` reports.
+The job reads the file row by row and creates users ``USER_IMPORT_CHUNK_SIZE``
+at a time, one transaction per chunk:
+
+* emails that already exist are looked up with one ``= ANY()`` query and
+  skipped, as are repeats within the file, so importing a file again after
+  fixing the row a failed import stopped at picks up where it left off;
+* passwords are hashed in a pool of processes, as bcrypt is CPU bound and
+  holds the GIL. Rows without one get an unusable password and, when emails
+  are configured, an invite: the reset password email, to choose their own;
+* the rows are streamed with ``COPY`` into a temporary table and moved into
+  ``user`` with ``ON CONFLICT DO NOTHING``, so a user who signs up with the
+  same email meanwhile doesn't fail the chunk.
+
+CSV files need a header row naming the columns: ``email`` and optionally
+``full_name`` and ``password``. NDJSON files have one object per line with
+the same keys.
+"""
+
+import csv
+import json
+import logging
+import multiprocessing
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any
+
+import sqlalchemy as sa
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.core.jobs import JobFunction
+from app.core.security import UNUSABLE_PASSWORD, get_password_hash
+from app.models import Job, User, UserImport
+from app.utils import (
+    generate_password_reset_token,
+    generate_reset_password_email,
+    send_email,
+)
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("id", "email", "full_name", "hashed_password", "is_active", "is_superuser")
+
+
+def read_csv(file: IO[str]) -> Iterator[dict[str, Any]]:
+    for row in csv.DictReader(file):
+        # Empty cells are missing values, not empty strings
+        yield {key: value for key, value in row.items() if value}
+
+
+def read_ndjson(file: IO[str]) -> Iterator[dict[str, Any]]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS: dict[str, Callable[[IO[str]], Iterator[dict[str, Any]]]] = {
+    "text/csv": read_csv,
+    "application/x-ndjson": read_ndjson,
+}
+
+
+def parse(rows: Iterable[dict[str, Any]]) -> Iterator[UserImport]:
+    for number, row in enumerate(rows, start=1):
+        try:
+            yield UserImport.model_validate(row)
+        except ValidationError as e:
+            raise ValueError(f"Row {number}: {e}") from e
+
+
+def existing_emails(session: Session, emails: list[str]) -> set[str]:
+    return set(
+        session.exec(
+            select(User.email).where(
+                col(User.email) == sa.any_(sa.literal(emails, ARRAY(sa.String)))
+            )
+        ).all()
+    )
+
+
+def hash_passwords(pool: Executor, passwords: list[str]) -> list[str]:
+    return list(pool.map(get_password_hash, passwords, chunksize=16))
+
+
+def copy_users(session: Session, rows: Iterable[tuple[Any, ...]]) -> list[str]:
+    """Insert ``rows`` of ``COLUMNS`` whose email is free, returning their emails"""
+    session.execute(
+        text('CREATE TEMPORARY TABLE user_import AS SELECT * FROM "user" WITH NO DATA')
+    )
+    column_list = ", ".join(COLUMNS)
+    connection: Any = session.connection().connection.driver_connection
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY user_import ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+    inserted = list(
+        session.scalars(
+            text(
+                f'INSERT INTO "user" ({column_list}) '
+                f"SELECT {column_list} FROM user_import "
+                "ON CONFLICT (email) DO NOTHING RETURNING email"
+            )
+        )
+    )
+    session.execute(text("DROP TABLE user_import"))
+    return inserted
+
+
+def send_invites(emails: Iterable[str]) -> None:
+    for email in emails:
+        email_data = generate_reset_password_email(
+            email_to=email, email=email, token=generate_password_reset_token(email)
+        )
+        try:
+            send_email(
+                email_to=email,
+                subject=email_data.subject,
+                html_content=email_data.html_content,
+            )
+        except Exception:
+            # The user exists either way, and can still reset their password
+            logger.exception("Couldn't send the invite to %s", email)
+
+
+def import_users(
+    session: Session,
+    rows: Iterable[UserImport],
+    pool: Executor,
+    *,
+    chunk_size: int,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Create users from ``rows``, committing a chunk at a time, and return the
+    number created. Passwords are hashed in ``pool``; ``progress`` gets the
+    number of rows read so far before each commit.
+    """
+    rows = iter(rows)
+    read = created = 0
+    while chunk := list(islice(rows, chunk_size)):
+        read += len(chunk)
+        # The first row of an email wins
+        by_email: dict[str, UserImport] = {}
+        for row in chunk:
+            by_email.setdefault(row.email, row)
+        for email in existing_emails(session, list(by_email)):
+            del by_email[email]
+        new = list(by_email.values())
+
+        passwords = [row.password for row in new if row.password]
+        hashes = iter(hash_passwords(pool, passwords) if passwords else [])
+        inserted = copy_users(
+            session,
+            (
+                (
+                    uuid7(),
+                    row.email,
+                    row.full_name,
+                    next(hashes) if row.password else UNUSABLE_PASSWORD,
+                    True,
+                    False,
+                )
+                for row in new
+            ),
+        )
+        if progress is not None:
+            progress(read)
+        session.commit()
+
+        created += len(inserted)
+        if settings.emails_enabled:
+            invited = {row.email for row in new if not row.password}
+            send_invites(email for email in inserted if email in invited)
+    return created
+
+
+def import_users_job(path: Path, content_type: str) -> JobFunction:
+    """Import the file at ``path``, removing it once done"""
+    read_rows = READERS[content_type]
+
+    def run(session: Session, job: Job) -> None:
+        def progress(read: int) -> None:
+            job.processed = read
+            session.add(job)
+
+        with ExitStack() as stack:
+            stack.callback(path.unlink, missing_ok=True)
+            file = stack.enter_context(path.open(newline="", encoding="utf-8-sig"))
+            # Its processes start with the first password to hash. Spawned,
+            # as a process forked from one running threads can inherit locks
+            # that are never released
+            pool = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=settings.USER_IMPORT_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            )
+            created = import_users(
+                session,
+                parse(read_rows(file)),
+                pool,
+                chunk_size=settings.USER_IMPORT_CHUNK_SIZE,
+                progress=progress,
+            )
+            logger.info("Job %s created %d of %d users", job.id, created, job.processed)
+
+    return run
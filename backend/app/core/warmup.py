@@ -0,0 +1,123 @@
+"""
+Work each worker does once, before it accepts requests.
+
+Without it, the first requests a fresh worker serves pay for configuring the
+SQLAlchemy mappers, connecting to the database and rendering the OpenAPI
+document, which during a deploy adds up to seconds of latency. ``run`` is
+called from the app's lifespan, which uvicorn completes before it starts
+listening. ``preload`` does the steps that don't connect to the database once
+in the server process, when it imports the app before forking its workers
+(``app.server``), and the workers share the result.
+
+The OpenAPI document is read from ``OPENAPI_SCHEMA_FILE`` when set, as built
+into the image by ``python -m app.openapi``, so workers neither render nor
+compress it. A file that doesn't match the running app (another
+``PROJECT_NAME``, ``ENVIRONMENT`` or set of routes) is ignored.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import orjson
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import QueuePool
+
+from app.core.compression import PrecompressedDocument
+from app.core.config import settings
+from app.core.db import engine, replica_engines
+
+logger = logging.getLogger(__name__)
+
+
+def schema_matches(app: FastAPI, schema: dict[str, Any]) -> bool:
+    """Whether ``schema`` could have been generated from ``app``"""
+    paths = {
+        route.path_format
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.include_in_schema
+    }
+    info = schema.get("info", {})
+    return (
+        info.get("title") == app.title
+        and info.get("version") == app.version
+        and set(schema.get("paths", {})) == paths
+    )
+
+
+def load_openapi(app: FastAPI, document: PrecompressedDocument) -> None:
+    if settings.OPENAPI_SCHEMA_FILE:
+        path = Path(settings.OPENAPI_SCHEMA_FILE)
+        try:
+            body = document.load_files(path)
+        except FileNotFoundError:
+            logger.warning("No OpenAPI document at %s, rendering it", path)
+        else:
+            schema = orjson.loads(body)
+            if schema_matches(app, schema):
+                app.openapi_schema = schema
+                return
+            logger.warning(
+                "The OpenAPI document at %s doesn't match the app, rendering it",
+                path,
+            )
+    document.load()
+
+
+def fill_pool(db_engine: Engine, connections: int) -> None:
+    """Open up to ``connections`` connections and leave them in the pool"""
+    if isinstance(db_engine.pool, QueuePool):
+        # More than the pool keeps would be closed again on return
+        connections = min(connections, db_engine.pool.size())
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = db_engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def fill_pools() -> None:
+    for db_engine in (engine, *replica_engines):
+        try:
+            fill_pool(db_engine, settings.WARMUP_CONNECTIONS)
+        except OperationalError as e:
+            # Requests retry connecting, a worker shouldn't fail to start
+            logger.warning("Couldn't open connections to %s: %s", db_engine.url, e)
+
+
+def preload(app: FastAPI, openapi_document: PrecompressedDocument) -> None:
+    """The warm-up that can be shared by forked workers: no connections"""
+    configure_mappers()
+    load_openapi(app, openapi_document)
+
+
+def run(app: FastAPI, openapi_document: PrecompressedDocument) -> dict[str, float]:
+    """Run every warm-up step, returning how long each one took"""
+    steps: dict[str, Callable[[], None]] = {
+        "mappers": configure_mappers,
+        "connections": fill_pools,
+    }
+    # Already loaded when the server preloaded the app before forking
+    if not openapi_document.loaded:
+        steps["openapi"] = lambda: load_openapi(app, openapi_document)
+    timings = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    logger.info(
+        "Warmed up in %.0f ms (%s)",
+        1000 * sum(timings.values()),
+        ", ".join(f"{name} {1000 * s:.0f} ms" for name, s in timings.items()),
+    )
+    return timings
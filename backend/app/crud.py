@@ -2,7 +2,12 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import insert
+from sqlmodel import Session, col, delete, select, update
+
+from app.core import events, onboarding
+from app.core.ids import uuid7
+from app.core.similarity import encode_traits
 
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -27,7 +32,11 @@ from app.models import (
     QuestionnaireResponse,
     QuestionnaireResponseCreate,
     Answer,
+    AnswerCreate,
     AssignmentStatus,
+    DraftAnswer,
+    Job,
+    QuestionnaireDraft,
 )
 
 
@@ -41,6 +50,19 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     return db_obj
 
 
+def register_user(*, session: Session, user_create: UserCreate) -> User:
+    """Create a user along with their onboarding assignments, in one transaction"""
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+    )
+    session.add(db_obj)
+    session.flush()
+    onboarding.assign(session, db_obj.id)
+    session.commit()
+    session.refresh(db_obj)
+    return db_obj
+
+
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     user_data = user_in.model_dump(exclude_unset=True)
     extra_data = {}
@@ -84,7 +106,11 @@ def create_orientation(
     # Create the orientation without traits first
     orientation_data = orientation_in.model_dump(exclude={"traits"})
     db_orientation = Orientation.model_validate(
-        orientation_data, update={"owner_id": owner_id}
+        orientation_data,
+        update={
+            "owner_id": owner_id,
+            "trait_vector": encode_traits(session, orientation_in.traits),
+        },
     )
     session.add(db_orientation)
     session.flush()  # Flush to get the orientation ID
@@ -128,6 +154,7 @@ def update_orientation(
             session.add(db_trait)
         
         db_orientation.traits = new_traits
+        db_orientation.trait_vector = encode_traits(session, orientation_in.traits)
 
     session.add(db_orientation)
     session.commit()
@@ -199,6 +226,9 @@ def create_appointment(
 ) -> Appointment:
     db_appointment = Appointment.model_validate(appointment_in)
     session.add(db_appointment)
+    events.notify(
+        session, db_appointment.user_id, "appointment.created", db_appointment.id
+    )
     session.commit()
     session.refresh(db_appointment)
     return db_appointment
@@ -210,6 +240,9 @@ def create_questionnaire_assignment(
 ) -> QuestionnaireAssignment:
     db_assignment = QuestionnaireAssignment.model_validate(assignment_in)
     session.add(db_assignment)
+    events.notify(
+        session, db_assignment.user_id, "assignment.created", db_assignment.id
+    )
     session.commit()
     session.refresh(db_assignment)
     return db_assignment
@@ -231,6 +264,10 @@ def create_bulk_questionnaire_assignments(
         session.add(db_assignment)
         assignments.append(db_assignment)
     
+    events.notify_many(
+        session,
+        [(a.user_id, "assignment.created", a.id) for a in assignments],
+    )
     session.commit()
     
     # Refresh all assignments
@@ -240,10 +277,43 @@ def create_bulk_questionnaire_assignments(
     return assignments
 
 
+def mark_overdue_assignments(*, session: Session, now: datetime) -> int:
+    """Mark pending assignments due before ``now`` OVERDUE, returning how many"""
+    overdue = session.execute(
+        update(QuestionnaireAssignment)
+        .where(
+            col(QuestionnaireAssignment.status) == AssignmentStatus.PENDING,
+            col(QuestionnaireAssignment.due_date) < now,
+        )
+        .values(status=AssignmentStatus.OVERDUE)
+        .returning(
+            col(QuestionnaireAssignment.user_id), col(QuestionnaireAssignment.id)
+        )
+    ).all()
+    events.notify_many(
+        session,
+        [(user_id, "assignment.overdue", id) for user_id, id in overdue],
+    )
+    session.commit()
+    return len(overdue)
+
+
 # Questionnaire Response CRUD
 def create_questionnaire_response(
     *, session: Session, response_in: QuestionnaireResponseCreate, user_id: uuid.UUID
 ) -> QuestionnaireResponse:
+    db_response = add_questionnaire_response(
+        session=session, response_in=response_in, user_id=user_id
+    )
+    session.commit()
+    session.refresh(db_response)
+    return db_response
+
+
+def add_questionnaire_response(
+    *, session: Session, response_in: QuestionnaireResponseCreate, user_id: uuid.UUID
+) -> QuestionnaireResponse:
+    """Score and flush a response, leaving the commit to the caller"""
     # Calculate total score from answers
     total_score = sum(
         answer.likert_value for answer in response_in.answers if answer.likert_value is not None
@@ -261,16 +331,126 @@ def create_questionnaire_response(
     # Create the answers
     for answer_data in response_in.answers:
         db_answer = Answer.model_validate(
-            answer_data, update={"response_id": db_response.id}
+            answer_data,
+            update={
+                "response_id": db_response.id,
+                "completed_at": db_response.completed_at,
+            },
         )
         session.add(db_answer)
 
-    # Update the assignment status to COMPLETED
-    assignment = session.get(QuestionnaireAssignment, response_in.assignment_id)
+    complete_assignment(session=session, assignment_id=response_in.assignment_id)
+    session.flush()
+    return db_response
+
+
+def complete_assignment(*, session: Session, assignment_id: uuid.UUID) -> None:
+    """Mark an assignment COMPLETED and drop its draft, if any"""
+    assignment = session.get(QuestionnaireAssignment, assignment_id)
     if assignment:
         assignment.status = AssignmentStatus.COMPLETED
         session.add(assignment)
+    session.execute(
+        delete(QuestionnaireDraft).where(
+            col(QuestionnaireDraft.assignment_id) == assignment_id
+        )
+    )
+
+
+# Questionnaire Draft CRUD
+def save_draft_answers(
+    *, session: Session, assignment_id: uuid.UUID, answers: list[AnswerCreate]
+) -> QuestionnaireDraft:
+    """
+    Upsert answers into the assignment's draft and adjust its running score.
+
+    Callers lock the assignment, which serializes saves to one draft.
+    """
+    draft = session.get(QuestionnaireDraft, assignment_id)
+    if draft is None:
+        draft = QuestionnaireDraft(assignment_id=assignment_id)
+        session.add(draft)
+        session.flush()
+
+    saved = {
+        answer.question_id: answer
+        for answer in session.exec(
+            select(DraftAnswer).where(
+                DraftAnswer.assignment_id == assignment_id,
+                col(DraftAnswer.question_id).in_([a.question_id for a in answers]),
+            )
+        )
+    }
+    now = datetime.utcnow()
+    for answer_in in answers:
+        db_answer = saved.get(answer_in.question_id)
+        if db_answer is None:
+            db_answer = DraftAnswer(
+                assignment_id=assignment_id, question_id=answer_in.question_id
+            )
+            saved[answer_in.question_id] = db_answer
+            draft.answer_count += 1
+        else:
+            draft.total_score -= db_answer.likert_value or 0
+        draft.total_score += answer_in.likert_value or 0
+        db_answer.likert_value = answer_in.likert_value
+        db_answer.text_response = answer_in.text_response
+        db_answer.updated_at = now
+        session.add(db_answer)
 
+    draft.updated_at = now
+    session.add(draft)
+    session.commit()
+    session.refresh(draft)
+    return draft
+
+
+def finalize_draft(
+    *, session: Session, draft: QuestionnaireDraft, user_id: uuid.UUID
+) -> QuestionnaireResponse:
+    """Submit a draft as the assignment's response, with the score kept so far"""
+    db_response = QuestionnaireResponse(
+        assignment_id=draft.assignment_id,
+        user_id=user_id,
+        total_score=draft.total_score,
+    )
+    session.add(db_response)
+    session.flush()
+
+    draft_answers = session.exec(
+        select(DraftAnswer).where(DraftAnswer.assignment_id == draft.assignment_id)
+    ).all()
+    if draft_answers:
+        session.execute(
+            insert(Answer),
+            [
+                {
+                    "id": uuid7(),
+                    "completed_at": db_response.completed_at,
+                    "response_id": db_response.id,
+                    "question_id": answer.question_id,
+                    "likert_value": answer.likert_value,
+                    "text_response": answer.text_response,
+                }
+                for answer in draft_answers
+            ],
+        )
+
+    complete_assignment(session=session, assignment_id=draft.assignment_id)
     session.commit()
     session.refresh(db_response)
     return db_response
+
+
+def create_job(
+    *,
+    session: Session,
+    kind: str,
+    target_id: uuid.UUID | None = None,
+    created_by_id: uuid.UUID | None = None,
+) -> Job:
+    db_job = Job(kind=kind, target_id=target_id, created_by_id=created_by_id)
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
@@ -0,0 +1,165 @@
+"""
+Audit indexes against foreign keys and the filters queries actually use.
+
+    python -m app.index_audit                     # the models
+    python -m app.index_audit --database          # the migrated schema
+    python -m app.index_audit --statements q.sql  # plus logged statements
+
+Every foreign key needs an index led by its columns, otherwise joins from the
+parent side and ``ON DELETE CASCADE`` scan the whole child table. Statements
+are checked for WHERE clauses no index can drive. Run the test suite with
+``pytest --index-audit`` to audit every statement the routes execute.
+"""
+
+import argparse
+import re
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import Engine, MetaData, UniqueConstraint, inspect
+from sqlmodel import SQLModel
+
+from app.core.querylog import fingerprint
+
+# Table name -> column lists of its indexes, primary key and unique constraints
+IndexCatalog = dict[str, list[tuple[str, ...]]]
+
+_WHERE = re.compile(
+    r"\bWHERE\b(.*?)(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bOFFSET\b"
+    r"|\bRETURNING\b|\bFOR UPDATE\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_PREDICATE = re.compile(
+    r'"?(\w+)"?\."?(\w+)"?\s*(?:=|<|>|\bIN\b|\bBETWEEN\b)', re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class Finding:
+    table: str
+    columns: tuple[str, ...]
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.table}({', '.join(self.columns)}): {self.reason}"
+
+
+def metadata_catalog(metadata: MetaData) -> IndexCatalog:
+    catalog: IndexCatalog = {}
+    for table in metadata.sorted_tables:
+        indexed = catalog.setdefault(table.name, [])
+        indexed.append(tuple(column.name for column in table.primary_key))
+        for index in table.indexes:
+            indexed.append(tuple(column.name for column in index.columns))
+        for column in table.columns:
+            if column.unique:
+                indexed.append((column.name,))
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                indexed.append(tuple(constraint.columns.keys()))
+    return catalog
+
+
+def database_catalog(engine: Engine) -> IndexCatalog:
+    inspector = inspect(engine)
+    catalog: IndexCatalog = {}
+    for table in inspector.get_table_names():
+        indexed = catalog.setdefault(table, [])
+        indexed.append(tuple(inspector.get_pk_constraint(table)["constrained_columns"]))
+        for index in inspector.get_indexes(table):
+            indexed.append(tuple(c for c in index["column_names"] if c is not None))
+        for unique in inspector.get_unique_constraints(table):
+            indexed.append(tuple(unique["column_names"]))
+    return catalog
+
+
+def is_indexed(catalog: IndexCatalog, table: str, columns: Iterable[str]) -> bool:
+    """Whether an index can look up ``columns``, i.e. they lead one of its keys."""
+    wanted = set(columns)
+    return any(set(index[: len(wanted)]) == wanted for index in catalog.get(table, []))
+
+
+def audit_foreign_keys(metadata: MetaData, catalog: IndexCatalog) -> list[Finding]:
+    findings = []
+    for table in metadata.sorted_tables:
+        for foreign_key in table.foreign_key_constraints:
+            columns = tuple(foreign_key.column_keys)
+            if is_indexed(catalog, table.name, columns):
+                continue
+            reason = f"foreign key to {foreign_key.referred_table.name}"
+            if foreign_key.ondelete:
+                reason += f" (ON DELETE {foreign_key.ondelete})"
+            findings.append(Finding(table.name, columns, reason))
+    return findings
+
+
+def filtered_columns(statement: str) -> dict[str, set[str]]:
+    """Columns compared in the WHERE clauses of ``statement``, by table."""
+    filters: dict[str, set[str]] = {}
+    for clause in _WHERE.findall(statement):
+        for table, column in _PREDICATE.findall(clause):
+            filters.setdefault(table, set()).add(column)
+    return filters
+
+
+def audit_statements(
+    statements: Iterable[str], metadata: MetaData, catalog: IndexCatalog
+) -> list[Finding]:
+    """
+    Report filters that no index can drive.
+
+    One usable index per table is enough: the planner scans it and checks the
+    remaining predicates on the rows it returns.
+    """
+    findings: dict[tuple[str, tuple[str, ...]], Finding] = {}
+    for statement in {fingerprint(s) for s in statements}:
+        for table, columns in filtered_columns(statement).items():
+            if table not in metadata.tables:
+                continue
+            known = columns & set(metadata.tables[table].columns.keys())
+            if not known or any(is_indexed(catalog, table, [c]) for c in known):
+                continue
+            key = (table, tuple(sorted(known)))
+            findings.setdefault(
+                key, Finding(table, key[1], f"no index for filter in: {statement}")
+            )
+    return sorted(findings.values(), key=lambda f: (f.table, f.columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        action="store_true",
+        help="check the indexes that exist in the database instead of the models",
+    )
+    parser.add_argument(
+        "--statements",
+        type=Path,
+        help="file with one SQL statement per line, e.g. from the slow query log",
+    )
+    args = parser.parse_args()
+
+    if args.database:
+        from app.core.db import engine
+
+        catalog = database_catalog(engine)
+    else:
+        catalog = metadata_catalog(SQLModel.metadata)
+    findings = audit_foreign_keys(SQLModel.metadata, catalog)
+    if args.statements:
+        lines = args.statements.read_text().splitlines()
+        findings += audit_statements(
+            (line for line in lines if line.strip()), SQLModel.metadata, catalog
+        )
+
+    for finding in findings:
+        print(finding)
+    print(f"{len(findings)} missing index(es)", file=sys.stderr)
+    sys.exit(1 if findings else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
-import sentry_sdk
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
 
 from app.api.main import api_router
+from app.core import compression, events, metrics, querylog, warmup
 from app.core.config import settings
+from app.core.db import engine, replica_engines
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -12,13 +19,50 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    # Only imported when enabled, it takes longer to import than FastAPI
+    import sentry_sdk
+
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmup.run(app, openapi_document)
+    yield
+    await events.hub.close()
+
+
+openapi_url = f"{settings.API_V1_STR}/openapi.json"
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    openapi_url=openapi_url,
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=ORJSONResponse,
+)
+
+# FastAPI's own route serializes the OpenAPI document on every request; this
+# one serves it rendered and compressed once, at startup, or built into the
+# image (see app.core.warmup)
+openapi_document = compression.PrecompressedDocument(
+    lambda: orjson.dumps(app.openapi()), media_type="application/json"
 )
+app.router.routes = [
+    route for route in app.router.routes if getattr(route, "path", None) != openapi_url
+]
+
+
+def openapi(request: Request) -> Response:
+    return openapi_document.response(request)
+
+
+app.add_route(openapi_url, openapi, include_in_schema=False)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        compression.CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    )
 
 # Set all CORS enabled origins
 if settings.all_cors_origins:
@@ -31,3 +75,15 @@ if settings.all_cors_origins:
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+if settings.QUERY_RECORDER_ENABLED or settings.SLOW_QUERY_THRESHOLD_MS is not None:
+    for db_engine in (engine, *replica_engines):
+        querylog.instrument_engine(db_engine)
+if settings.QUERY_RECORDER_ENABLED:
+    app.add_middleware(querylog.QueryRecorderMiddleware)
+
+if settings.METRICS_ENABLED:
+    for db_engine in (engine, *replica_engines):
+        metrics.instrument_engine(db_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_route("/metrics", metrics.metrics_endpoint, include_in_schema=False)
@@ -1,12 +1,15 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import Optional, TYPE_CHECKING
+from typing import Annotated, Optional, TYPE_CHECKING
 
-from pydantic import EmailStr
+from pydantic import EmailStr, StringConstraints
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.core.ids import uuid7
+
 if TYPE_CHECKING:
     from typing import List
 
@@ -31,6 +34,18 @@ class AssignmentStatus(str, Enum):
     OVERDUE = "OVERDUE"
 
 
+class JobStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class BulkDeleteTarget(str, Enum):
+    USER = "USER"
+    QUESTIONNAIRE_TEMPLATE = "QUESTIONNAIRE_TEMPLATE"
+
+
 # Shared properties
 class UserBase(SQLModel):
     email: EmailStr = Field(unique=True, index=True, max_length=255)
@@ -51,6 +66,13 @@ class UserRegister(SQLModel):
     full_name: str | None = Field(default=None, max_length=255)
 
 
+# A row of a user import; users without a password are sent an invite
+class UserImport(SQLModel):
+    email: EmailStr = Field(max_length=255)
+    full_name: str | None = Field(default=None, max_length=255)
+    password: str | None = Field(default=None, min_length=8, max_length=40)
+
+
 # Properties to receive via API on update, all are optional
 class UserUpdate(UserBase):
     email: EmailStr | None = Field(default=None, max_length=255)  # type: ignore
@@ -69,14 +91,26 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     hashed_password: str
-    items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
-    orientations: list["Orientation"] = Relationship(back_populates="owner", cascade_delete=True)
-    created_questionnaires: list["QuestionnaireTemplate"] = Relationship(back_populates="created_by", cascade_delete=True)
-    appointments: list["Appointment"] = Relationship(back_populates="user", cascade_delete=True)
-    questionnaire_assignments: list["QuestionnaireAssignment"] = Relationship(back_populates="user", cascade_delete=True)
-    questionnaire_responses: list["QuestionnaireResponse"] = Relationship(back_populates="user", cascade_delete=True)
+    items: list["Item"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
+    orientations: list["Orientation"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
+    created_questionnaires: list["QuestionnaireTemplate"] = Relationship(
+        back_populates="created_by", cascade_delete=True, passive_deletes=True
+    )
+    appointments: list["Appointment"] = Relationship(
+        back_populates="user", cascade_delete=True, passive_deletes=True
+    )
+    questionnaire_assignments: list["QuestionnaireAssignment"] = Relationship(
+        back_populates="user", cascade_delete=True, passive_deletes=True
+    )
+    questionnaire_responses: list["QuestionnaireResponse"] = Relationship(
+        back_populates="user", cascade_delete=True, passive_deletes=True
+    )
 
 
 # Properties to return via API, id is always required
@@ -107,10 +141,10 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     title: str = Field(max_length=255)
     owner_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
     )
     owner: User | None = Relationship(back_populates="items")
 
@@ -131,6 +165,15 @@ class Message(SQLModel):
     message: str
 
 
+# What /utils/ready found: the database's port is open, it answers queries,
+# and it's migrated to the head revision
+class Readiness(SQLModel):
+    ready: bool
+    reachable: bool
+    database: bool
+    migrations: bool
+
+
 # JSON payload containing access token
 class Token(SQLModel):
     access_token: str
@@ -164,9 +207,20 @@ class OrientationTraitUpdate(OrientationTraitBase):
 
 
 class OrientationTrait(OrientationTraitBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    __table_args__ = (
+        # Trait filters and histograms are ranges of one name's values; the
+        # orientation id makes them index-only scans
+        sa.Index(
+            "ix_orientationtrait_name_value",
+            "name",
+            "value",
+            postgresql_include=["orientation_id"],
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     orientation_id: uuid.UUID = Field(
-        foreign_key="orientation.id", nullable=False, ondelete="CASCADE"
+        foreign_key="orientation.id", nullable=False, ondelete="CASCADE", index=True
     )
     orientation: Optional["Orientation"] = Relationship(back_populates="traits")
 
@@ -183,22 +237,26 @@ class OrientationBase(SQLModel):
 
 
 class OrientationCreate(OrientationBase):
-    traits: list[OrientationTraitCreate] = []
+    traits: list[OrientationTraitCreate] = Field(default=[], max_length=100)
 
 
 class OrientationUpdate(OrientationBase):
     title: str | None = Field(default=None, min_length=1, max_length=255)  # type: ignore
-    traits: list[OrientationTraitCreate] | None = None
+    traits: list[OrientationTraitCreate] | None = Field(default=None, max_length=100)
 
 
 class Orientation(OrientationBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     owner_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    # Trait values by TraitDimension, one byte each, see app.core.similarity
+    trait_vector: bytes = Field(
+        default=b"", sa_type=sa.LargeBinary, sa_column_kwargs={"server_default": ""}
     )
     owner: Optional["User"] = Relationship(back_populates="orientations")
     traits: list["OrientationTrait"] = Relationship(
-        back_populates="orientation", cascade_delete=True
+        back_populates="orientation", cascade_delete=True, passive_deletes=True
     )
 
 
@@ -213,6 +271,50 @@ class OrientationsPublic(SQLModel):
     count: int
 
 
+class TraitDimension(SQLModel, table=True):
+    name: str = Field(primary_key=True, max_length=255)
+    dimension: int | None = Field(
+        default=None,
+        sa_column=sa.Column(
+            sa.Integer, sa.Identity(start=0, minvalue=0), unique=True, nullable=False
+        ),
+    )
+
+
+class TraitStats(SQLModel):
+    name: str
+    count: int
+    average: float
+    median: float
+    minimum: int
+    maximum: int
+
+
+class TraitsStatsPublic(SQLModel):
+    data: list[TraitStats]
+
+
+class TraitHistogramBucket(SQLModel):
+    lower: int
+    upper: int
+    count: int
+
+
+class TraitHistogram(SQLModel):
+    name: str
+    count: int
+    buckets: list[TraitHistogramBucket]
+
+
+class SimilarOrientation(SQLModel):
+    orientation: OrientationPublic
+    distance: float
+
+
+class SimilarOrientationsPublic(SQLModel):
+    data: list[SimilarOrientation]
+
+
 # Question models (defined before QuestionnaireTemplate to avoid forward reference issues)
 class QuestionBase(SQLModel):
     question_text: str = Field(max_length=1000)
@@ -235,12 +337,14 @@ class QuestionUpdate(QuestionBase):
 
 
 class Question(QuestionBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     questionnaire_id: uuid.UUID = Field(
-        foreign_key="questionnairetemplate.id", nullable=False, ondelete="CASCADE"
+        foreign_key="questionnairetemplate.id", nullable=False, ondelete="CASCADE", index=True
     )
     questionnaire: Optional["QuestionnaireTemplate"] = Relationship(back_populates="questions")
-    answers: list["Answer"] = Relationship(back_populates="question", cascade_delete=True)
+    answers: list["Answer"] = Relationship(
+        back_populates="question", cascade_delete=True, passive_deletes=True
+    )
 
 
 class QuestionPublic(QuestionBase):
@@ -253,6 +357,13 @@ class QuestionnaireTemplateBase(SQLModel):
     title: str = Field(min_length=1, max_length=255)
     description: str | None = Field(default=None, max_length=1000)
     is_active: bool = True
+    # ONBOARDING_TEMPLATE_TAGS picks the templates assigned on signup by tag
+    tags: list[Annotated[str, StringConstraints(min_length=1, max_length=50)]] = Field(
+        default_factory=list,
+        sa_column=sa.Column(
+            postgresql.ARRAY(sa.String(50)), nullable=False, server_default="{}"
+        ),
+    )
 
 
 class QuestionnaireTemplateCreate(QuestionnaireTemplateBase):
@@ -265,15 +376,19 @@ class QuestionnaireTemplateUpdate(QuestionnaireTemplateBase):
 
 
 class QuestionnaireTemplate(QuestionnaireTemplateBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     created_by_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     created_by: Optional["User"] = Relationship(back_populates="created_questionnaires")
-    questions: list["Question"] = Relationship(back_populates="questionnaire", cascade_delete=True)
-    assignments: list["QuestionnaireAssignment"] = Relationship(back_populates="questionnaire", cascade_delete=True)
+    questions: list["Question"] = Relationship(
+        back_populates="questionnaire", cascade_delete=True, passive_deletes=True
+    )
+    assignments: list["QuestionnaireAssignment"] = Relationship(
+        back_populates="questionnaire", cascade_delete=True, passive_deletes=True
+    )
 
 
 class QuestionnaireTemplatePublic(QuestionnaireTemplateBase):
@@ -309,13 +424,30 @@ class AppointmentUpdate(AppointmentBase):
 
 
 class Appointment(AppointmentBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    __table_args__ = (
+        # A user's calendar window is one range scan already in list order
+        # (time, then id), and the index also serves the user_id foreign key
+        sa.Index(
+            "ix_appointment_user_id_appointment_datetime",
+            "user_id",
+            "appointment_datetime",
+            "id",
+        ),
+        # Windows over everyone's appointments (admin calendars, day views)
+        sa.Index(
+            "ix_appointment_appointment_datetime", "appointment_datetime", "id"
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     user_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user: Optional["User"] = Relationship(back_populates="appointments")
-    questionnaire_assignments: list["QuestionnaireAssignment"] = Relationship(back_populates="appointment", cascade_delete=True)
+    questionnaire_assignments: list["QuestionnaireAssignment"] = Relationship(
+        back_populates="appointment", cascade_delete=True, passive_deletes=True
+    )
 
 
 class AppointmentPublic(AppointmentBase):
@@ -329,6 +461,16 @@ class AppointmentsPublic(SQLModel):
     count: int
 
 
+class AppointmentWithUserPublic(AppointmentPublic):
+    user: UserPublic
+
+
+class AppointmentDayPublic(SQLModel):
+    day: date
+    data: list[AppointmentWithUserPublic]
+    count: int
+
+
 # Questionnaire Assignment models
 class QuestionnaireAssignmentBase(SQLModel):
     due_date: datetime | None = None
@@ -356,12 +498,21 @@ class QuestionnaireAssignmentUpdate(SQLModel):
 
 
 class QuestionnaireAssignment(QuestionnaireAssignmentBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    __table_args__ = (
+        # Most assignments aren't tied to an appointment
+        sa.Index(
+            "ix_questionnaireassignment_appointment_id",
+            "appointment_id",
+            postgresql_where=sa.text("appointment_id IS NOT NULL"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     questionnaire_id: uuid.UUID = Field(
-        foreign_key="questionnairetemplate.id", nullable=False, ondelete="CASCADE"
+        foreign_key="questionnairetemplate.id", nullable=False, ondelete="CASCADE", index=True
     )
     user_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
     )
     appointment_id: uuid.UUID | None = Field(
         default=None, foreign_key="appointment.id", ondelete="CASCADE"
@@ -370,7 +521,9 @@ class QuestionnaireAssignment(QuestionnaireAssignmentBase, table=True):
     questionnaire: Optional["QuestionnaireTemplate"] = Relationship(back_populates="assignments")
     user: Optional["User"] = Relationship(back_populates="questionnaire_assignments")
     appointment: Optional["Appointment"] = Relationship(back_populates="questionnaire_assignments")
-    response: Optional["QuestionnaireResponse"] = Relationship(back_populates="assignment", cascade_delete=True)
+    response: Optional["QuestionnaireResponse"] = Relationship(
+        back_populates="assignment", cascade_delete=True, passive_deletes=True
+    )
 
 
 class QuestionnaireAssignmentPublic(QuestionnaireAssignmentBase):
@@ -413,17 +566,29 @@ class QuestionnaireResponseUpdate(SQLModel):
 
 
 class QuestionnaireResponse(QuestionnaireResponseBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Partitioned by month of completion, see app.core.partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (completed_at)"}
+    # The partition key has to be part of the primary key; ids are still
+    # unique on their own and are what the ORM identifies rows by
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    # Unique constraints must include the partition key too, one response per
+    # assignment is enforced by create_response locking the assignment
     assignment_id: uuid.UUID = Field(
-        foreign_key="questionnaireassignment.id", nullable=False, ondelete="CASCADE", unique=True
+        foreign_key="questionnaireassignment.id", nullable=False, ondelete="CASCADE", index=True
     )
     user_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    completed_at: datetime = Field(
+        default_factory=datetime.utcnow, primary_key=True, index=True
     )
-    completed_at: datetime = Field(default_factory=datetime.utcnow)
     assignment: Optional["QuestionnaireAssignment"] = Relationship(back_populates="response")
     user: Optional["User"] = Relationship(back_populates="questionnaire_responses")
-    answers: list["Answer"] = Relationship(back_populates="response", cascade_delete=True)
+    answers: list["Answer"] = Relationship(
+        back_populates="response", cascade_delete=True, passive_deletes=True
+    )
 
 
 class QuestionnaireResponsePublic(QuestionnaireResponseBase):
@@ -441,12 +606,30 @@ class QuestionnaireResponsesPublic(SQLModel):
 
 # Answer models
 class Answer(AnswerBase, table=True):
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    response_id: uuid.UUID = Field(
-        foreign_key="questionnaireresponse.id", nullable=False, ondelete="CASCADE"
+    # Partitioned like its response, whose completed_at it copies
+    __table_args__ = (
+        sa.ForeignKeyConstraint(
+            ["response_id", "completed_at"],
+            ["questionnaireresponse.id", "questionnaireresponse.completed_at"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        # Covers score aggregation per response with an index-only scan
+        sa.Index(
+            "ix_answer_response_id",
+            "response_id",
+            "completed_at",
+            postgresql_include=["question_id", "likert_value"],
+        ),
+        {"postgresql_partition_by": "RANGE (completed_at)"},
     )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    completed_at: datetime = Field(primary_key=True)
+    response_id: uuid.UUID
     question_id: uuid.UUID = Field(
-        foreign_key="question.id", nullable=False, ondelete="CASCADE"
+        foreign_key="question.id", nullable=False, ondelete="CASCADE", index=True
     )
     response: Optional["QuestionnaireResponse"] = Relationship(back_populates="answers")
     question: Optional["Question"] = Relationship(back_populates="answers")
@@ -456,3 +639,150 @@ class AnswerPublic(AnswerBase):
     id: uuid.UUID
     question_id: uuid.UUID
     question: QuestionPublic
+
+
+# Draft of a long questionnaire, saved a few answers at a time and turned into
+# a response when finalized
+class QuestionnaireDraft(SQLModel, table=True):
+    assignment_id: uuid.UUID = Field(
+        foreign_key="questionnaireassignment.id", primary_key=True, ondelete="CASCADE"
+    )
+    # Kept up to date as answers are saved, so finalizing doesn't rescore
+    total_score: int = 0
+    answer_count: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    answers: list["DraftAnswer"] = Relationship(
+        back_populates="draft", cascade_delete=True, passive_deletes=True
+    )
+
+
+class DraftAnswer(AnswerBase, table=True):
+    assignment_id: uuid.UUID = Field(
+        foreign_key="questionnairedraft.assignment_id",
+        primary_key=True,
+        ondelete="CASCADE",
+    )
+    question_id: uuid.UUID = Field(
+        foreign_key="question.id", primary_key=True, ondelete="CASCADE", index=True
+    )
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    draft: QuestionnaireDraft | None = Relationship(back_populates="answers")
+
+
+class DraftAnswerPublic(AnswerBase):
+    question_id: uuid.UUID
+    updated_at: datetime
+
+
+class QuestionnaireDraftUpdate(SQLModel):
+    answers: list[AnswerCreate] = Field(min_length=1)
+
+
+class QuestionnaireDraftSummary(SQLModel):
+    assignment_id: uuid.UUID
+    total_score: int
+    answer_count: int
+    updated_at: datetime
+
+
+class QuestionnaireDraftPublic(QuestionnaireDraftSummary):
+    answers: list[DraftAnswerPublic]
+
+
+# Archived responses, partitioned by month of completion (see app.archive)
+class QuestionnaireResponseArchive(QuestionnaireResponseBase, table=True):
+    __table_args__ = {"postgresql_partition_by": "RANGE (completed_at)"}
+
+    id: uuid.UUID = Field(primary_key=True)
+    # The partition key has to be part of the primary key
+    completed_at: datetime = Field(primary_key=True)
+    assignment_id: uuid.UUID = Field(
+        foreign_key="questionnaireassignment.id",
+        nullable=False,
+        ondelete="CASCADE",
+        index=True,
+    )
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    answers: list["AnswerArchive"] = Relationship(
+        back_populates="response", cascade_delete=True, passive_deletes=True
+    )
+
+
+class AnswerArchive(AnswerBase, table=True):
+    __table_args__ = (
+        sa.ForeignKeyConstraint(
+            ["response_id", "completed_at"],
+            [
+                "questionnaireresponsearchive.id",
+                "questionnaireresponsearchive.completed_at",
+            ],
+            ondelete="CASCADE",
+        ),
+        sa.Index("ix_answerarchive_response_id", "response_id", "completed_at"),
+        {"postgresql_partition_by": "RANGE (completed_at)"},
+    )
+
+    id: uuid.UUID = Field(primary_key=True)
+    completed_at: datetime = Field(primary_key=True)
+    response_id: uuid.UUID
+    question_id: uuid.UUID = Field(
+        foreign_key="question.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    response: Optional["QuestionnaireResponseArchive"] = Relationship(
+        back_populates="answers"
+    )
+    question: Optional["Question"] = Relationship()
+
+
+class ResponseScoreStats(SQLModel):
+    count: int
+    archived: int
+    average: float | None
+    minimum: int | None
+    maximum: int | None
+
+
+# Background job models
+class JobBase(SQLModel):
+    kind: str = Field(max_length=50)
+    target_id: uuid.UUID | None = None
+    status: JobStatus = Field(default=JobStatus.PENDING)
+    processed: int = 0
+    error: str | None = Field(default=None, sa_type=sa.Text)
+
+
+class Job(JobBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    created_by_id: uuid.UUID | None = Field(
+        default=None, foreign_key="user.id", ondelete="SET NULL", index=True
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+
+class JobPublic(JobBase):
+    id: uuid.UUID
+    created_at: datetime
+    finished_at: datetime | None
+
+
+# Result of a response submission, replayed for retries with the same
+# Idempotency-Key header
+class IdempotencyKey(SQLModel, table=True):
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    status_code: int | None = None
+    response_body: bytes | None = Field(default=None, sa_type=sa.LargeBinary)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+
+class BulkDeleteCreate(SQLModel):
+    target: BulkDeleteTarget
+    target_id: uuid.UUID
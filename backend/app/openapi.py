@@ -0,0 +1,31 @@
+"""
+Build the OpenAPI document into files, for workers to serve as is.
+
+    python -m app.openapi openapi/openapi.json
+
+Writes the document and its zstd, brotli and gzip compressed versions
+(``.zst``, ``.br``, ``.gz`` next to it). Point ``OPENAPI_SCHEMA_FILE`` at the
+document and workers load these files at startup instead of rendering and
+compressing it. The document depends on ``PROJECT_NAME`` and
+``ENVIRONMENT``, so build it with the values the app runs with; workers
+ignore a document that doesn't match their routes.
+"""
+
+import argparse
+from pathlib import Path
+
+from app.main import app, openapi_document
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args()
+
+    openapi_document.save(args.output)
+    print(f"{app.title} OpenAPI document ({len(app.openapi()['paths'])} paths)")
+    print(f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Mark pending assignments past their due date OVERDUE.
+
+    python -m app.overdue
+
+Run it periodically, e.g. from cron. The users of the marked assignments get
+an ``assignment.overdue`` event on their event streams.
+"""
+
+import argparse
+import logging
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app import crud
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.parse_args()
+
+    from app.core.db import engine
+
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        marked = crud.mark_overdue_assignments(session=session, now=now)
+    print(f"Marked {marked} assignments due before {now:%Y-%m-%d %H:%M} overdue")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
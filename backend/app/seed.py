@@ -0,0 +1,479 @@
+"""
+Bulk-load synthetic data at production scale.
+
+    python -m app.seed --users 100000 --assignments-per-user 5 --questions 10
+
+Rows are streamed straight from generators into ``COPY ... FROM STDIN``, so
+memory stays flat regardless of volume. Every id and random choice is derived
+from ``--seed`` and the row's position, which makes runs reproducible and lets
+each table be generated independently of the others. Use a different
+``--seed`` to load another batch into the same database.
+"""
+
+import argparse
+import hashlib
+import logging
+import random
+import time
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, cast
+
+import psycopg
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.core.partitions import PARTITIONED_TABLES, ensure_monthly_partitions
+from app.core.security import get_password_hash
+from app.core.similarity import trait_dimensions
+from app.models import AssignmentStatus, ScaleType, User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_PASSWORD = "seed-password"
+INITIAL_ASSESSMENT_TITLE = "Initial Assessment"
+TRAIT_NAMES = (
+    "openness",
+    "conscientiousness",
+    "extraversion",
+    "agreeableness",
+    "neuroticism",
+    "resilience",
+    "curiosity",
+    "empathy",
+    "focus",
+    "optimism",
+)
+# Fixed so the same seed always produces the same timestamps
+EPOCH = datetime(2025, 1, 1)
+# Assignments are spread over a year and due a week after being assigned
+SPAN = timedelta(days=365)
+DUE_AFTER = timedelta(days=7)
+
+
+@dataclass
+class SeedConfig:
+    users: int = 1000
+    orientations_per_user: int = 1
+    traits_per_orientation: int = 5
+    templates: int = 10
+    questions: int = 20
+    assignments_per_user: int = 3
+    completed_ratio: float = 0.6
+    seed: int = 0
+
+
+def entity_uuid(seed: int, kind: str, *index: int) -> uuid.UUID:
+    key = ":".join((str(seed), kind, *map(str, index))).encode()
+    return uuid.UUID(bytes=hashlib.blake2b(key, digest_size=16).digest(), version=4)
+
+
+def entity_rng(seed: int, kind: str, *index: int) -> random.Random:
+    key = ":".join((str(seed), kind, *map(str, index))).encode()
+    return random.Random(int.from_bytes(hashlib.blake2b(key, digest_size=8).digest()))
+
+
+def copy_rows(
+    cursor: psycopg.Cursor[Any],
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    count = 0
+    start = time.perf_counter()
+    with cursor.copy(f'COPY "{table}" ({column_list}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Loaded %d rows into %s in %.1fs (%.0f rows/s)",
+        count,
+        table,
+        elapsed,
+        count / elapsed if elapsed else 0,
+    )
+    return count
+
+
+def drop_foreign_keys(
+    cursor: psycopg.Cursor[Any], tables: Sequence[str]
+) -> list[tuple[str, str, str]]:
+    """
+    Drop the foreign keys of ``tables``, returning what is needed to restore them.
+
+    Checking a foreign key row by row costs an index probe per row, while
+    adding it back afterwards validates the whole table with a single join.
+    """
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)"
+        " FROM pg_constraint"
+        " WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])"
+        # Constraints cloned for partitions go away with their parent
+        " AND conparentid = 0",
+        ([f'"{table}"' for table in tables],),
+    )
+    foreign_keys = [(table, name, definition) for table, name, definition in cursor]
+    for table, name, _ in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    return foreign_keys
+
+
+def restore_foreign_keys(
+    cursor: psycopg.Cursor[Any], foreign_keys: Sequence[tuple[str, str, str]]
+) -> None:
+    for table, name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+
+class SeedGenerator:
+    def __init__(
+        self,
+        config: SeedConfig,
+        superuser_id: uuid.UUID,
+        dimensions: dict[str, int] | None = None,
+    ) -> None:
+        self.config = config
+        self.superuser_id = superuser_id
+        self.hashed_password = get_password_hash(SEED_PASSWORD)
+        # Trait dimensions of the target database, see app.core.similarity
+        self.dimensions = dimensions or {
+            name: dimension for dimension, name in enumerate(TRAIT_NAMES)
+        }
+
+    def user_id(self, u: int) -> uuid.UUID:
+        return entity_uuid(self.config.seed, "user", u)
+
+    def template_id(self, t: int) -> uuid.UUID:
+        return entity_uuid(self.config.seed, "template", t)
+
+    def question_id(self, t: int, q: int) -> uuid.UUID:
+        return entity_uuid(self.config.seed, "question", t, q)
+
+    def users(self) -> Iterator[tuple[Any, ...]]:
+        for u in range(self.config.users):
+            yield (
+                self.user_id(u),
+                f"seed{self.config.seed}-user{u}@example.com",
+                True,
+                False,
+                f"Seed User {u}",
+                self.hashed_password,
+            )
+
+    def traits(self, u: int, o: int) -> list[tuple[str, int]]:
+        rng = entity_rng(self.config.seed, "orientation", u, o)
+        names = rng.sample(TRAIT_NAMES, self.config.traits_per_orientation)
+        return [(name, rng.randint(0, 100)) for name in names]
+
+    def trait_vector(self, traits: Sequence[tuple[str, int]]) -> bytes:
+        # Names past ORIENTATION_MAX_DIMENSIONS have none, as in encode_traits
+        known = [(name, value) for name, value in traits if name in self.dimensions]
+        dimensions = [self.dimensions[name] for name, _ in known]
+        vector = bytearray(max(dimensions, default=-1) + 1)
+        for name, value in known:
+            vector[self.dimensions[name]] = value
+        return bytes(vector)
+
+    def orientations(self) -> Iterator[tuple[Any, ...]]:
+        for u in range(self.config.users):
+            for o in range(self.config.orientations_per_user):
+                yield (
+                    entity_uuid(self.config.seed, "orientation", u, o),
+                    self.user_id(u),
+                    f"Orientation {o} of user {u}",
+                    None,
+                    None,
+                    self.trait_vector(self.traits(u, o)),
+                )
+
+    def orientation_traits(self) -> Iterator[tuple[Any, ...]]:
+        for u in range(self.config.users):
+            for o in range(self.config.orientations_per_user):
+                orientation_id = entity_uuid(self.config.seed, "orientation", u, o)
+                for t, (name, value) in enumerate(self.traits(u, o)):
+                    yield (
+                        entity_uuid(self.config.seed, "trait", u, o, t),
+                        orientation_id,
+                        name,
+                        value,
+                        None,
+                    )
+
+    def templates(self) -> Iterator[tuple[Any, ...]]:
+        for t in range(self.config.templates):
+            created_at = EPOCH + timedelta(days=t)
+            yield (
+                self.template_id(t),
+                self.superuser_id,
+                INITIAL_ASSESSMENT_TITLE if t == 0 else f"Seed template {t}",
+                f"Synthetic template {t}",
+                True,
+                # Assigned to users who sign up, as ONBOARDING_TEMPLATE_TAGS
+                # selects by default
+                ["onboarding"] if t == 0 else [],
+                created_at,
+                created_at,
+            )
+
+    def questions(self) -> Iterator[tuple[Any, ...]]:
+        for t in range(self.config.templates):
+            for q in range(self.config.questions):
+                yield (
+                    self.question_id(t, q),
+                    self.template_id(t),
+                    f"Question {q} of template {t}",
+                    q,
+                    True,
+                    ScaleType.LIKERT_5.value,
+                )
+
+    def _assignments(self) -> Iterator[tuple[int, int, int, bool, random.Random]]:
+        """Yield (user, assignment, template, completed, rng) for every assignment."""
+        for u in range(self.config.users):
+            for a in range(self.config.assignments_per_user):
+                rng = entity_rng(self.config.seed, "assignment", u, a)
+                template = rng.randrange(self.config.templates)
+                completed = rng.random() < self.config.completed_ratio
+                yield u, a, template, completed, rng
+
+    def _assigned_at(self, rng: random.Random) -> datetime:
+        return EPOCH + timedelta(minutes=rng.randrange(SPAN // timedelta(minutes=1)))
+
+    def assignments(self) -> Iterator[tuple[Any, ...]]:
+        for u, a, t, completed, rng in self._assignments():
+            assigned_at = self._assigned_at(rng)
+            yield (
+                entity_uuid(self.config.seed, "assignment", u, a),
+                self.template_id(t),
+                self.user_id(u),
+                None,
+                assigned_at,
+                assigned_at + DUE_AFTER,
+                (
+                    AssignmentStatus.COMPLETED
+                    if completed
+                    else AssignmentStatus.PENDING
+                ).value,
+                False,
+            )
+
+    def _likert_values(self, u: int, a: int) -> list[int]:
+        rng = entity_rng(self.config.seed, "answers", u, a)
+        return [rng.randint(1, 5) for _ in range(self.config.questions)]
+
+    def _completed_at(self, u: int, a: int, rng: random.Random) -> datetime:
+        """Some time between the assignment and its due date"""
+        # Drawn from the assignment's rng as in assignments(), so it matches
+        assigned_at = self._assigned_at(rng)
+        own = entity_rng(self.config.seed, "completed", u, a)
+        return assigned_at + timedelta(
+            minutes=own.randrange(1, DUE_AFTER // timedelta(minutes=1))
+        )
+
+    def responses(self) -> Iterator[tuple[Any, ...]]:
+        for u, a, _, completed, rng in self._assignments():
+            if not completed:
+                continue
+            completed_at = self._completed_at(u, a, rng)
+            yield (
+                entity_uuid(self.config.seed, "response", u, a),
+                entity_uuid(self.config.seed, "assignment", u, a),
+                self.user_id(u),
+                completed_at,
+                sum(self._likert_values(u, a)),
+                None,
+            )
+
+    def answers(self) -> Iterator[tuple[Any, ...]]:
+        for u, a, t, completed, rng in self._assignments():
+            if not completed:
+                continue
+            response_id = entity_uuid(self.config.seed, "response", u, a)
+            completed_at = self._completed_at(u, a, rng)
+            for q, value in enumerate(self._likert_values(u, a)):
+                yield (
+                    entity_uuid(self.config.seed, "answer", u, a, q),
+                    response_id,
+                    completed_at,
+                    self.question_id(t, q),
+                    value,
+                    None,
+                )
+
+
+def seed(db_engine: Engine, config: SeedConfig) -> dict[str, int]:
+    if config.traits_per_orientation > len(TRAIT_NAMES):
+        raise ValueError(f"At most {len(TRAIT_NAMES)} traits per orientation")
+    with Session(db_engine) as session:
+        init_db(session)
+        superuser = session.exec(
+            select(User).where(User.email == settings.FIRST_SUPERUSER)
+        ).one()
+        superuser_id = superuser.id
+        dimensions = trait_dimensions(session, TRAIT_NAMES)
+        session.commit()
+
+    generator = SeedGenerator(config, superuser_id, dimensions)
+    tables: list[tuple[str, Sequence[str], Iterable[Sequence[Any]]]] = [
+        (
+            "user",
+            (
+                "id",
+                "email",
+                "is_active",
+                "is_superuser",
+                "full_name",
+                "hashed_password",
+            ),
+            generator.users(),
+        ),
+        (
+            "orientation",
+            ("id", "owner_id", "title", "description", "notes", "trait_vector"),
+            generator.orientations(),
+        ),
+        (
+            "orientationtrait",
+            ("id", "orientation_id", "name", "value", "description"),
+            generator.orientation_traits(),
+        ),
+        (
+            "questionnairetemplate",
+            (
+                "id",
+                "created_by_id",
+                "title",
+                "description",
+                "is_active",
+                "tags",
+                "created_at",
+                "updated_at",
+            ),
+            generator.templates(),
+        ),
+        (
+            "question",
+            (
+                "id",
+                "questionnaire_id",
+                "question_text",
+                "order",
+                "is_required",
+                "scale_type",
+            ),
+            generator.questions(),
+        ),
+        (
+            "questionnaireassignment",
+            (
+                "id",
+                "questionnaire_id",
+                "user_id",
+                "appointment_id",
+                "assigned_at",
+                "due_date",
+                "status",
+                "reminder_sent",
+            ),
+            generator.assignments(),
+        ),
+        (
+            "questionnaireresponse",
+            (
+                "id",
+                "assignment_id",
+                "user_id",
+                "completed_at",
+                "total_score",
+                "manual_score_override",
+            ),
+            generator.responses(),
+        ),
+        (
+            "answer",
+            (
+                "id",
+                "response_id",
+                "completed_at",
+                "question_id",
+                "likert_value",
+                "text_response",
+            ),
+            generator.answers(),
+        ),
+    ]
+    # COPY routes rows into the monthly partitions, they have to exist first
+    with db_engine.begin() as partition_connection:
+        for table in PARTITIONED_TABLES:
+            ensure_monthly_partitions(
+                partition_connection, table, EPOCH, EPOCH + SPAN + DUE_AFTER
+            )
+    # Everything runs in one transaction: DDL is transactional in Postgres, so
+    # a failed load leaves neither partial data nor missing constraints behind
+    counts: dict[str, int] = {}
+    connection = db_engine.raw_connection()
+    try:
+        driver_connection = cast(psycopg.Connection[Any], connection.driver_connection)
+        with driver_connection.cursor() as cursor:
+            cursor.execute("SET LOCAL synchronous_commit TO off")
+            # Dropping constraints needs exclusive locks; fail instead of queueing
+            # behind open transactions (and blocking everyone queued after us)
+            cursor.execute("SET LOCAL lock_timeout TO '10s'")
+            foreign_keys = drop_foreign_keys(cursor, [table for table, *_ in tables])
+            for table, columns, rows in tables:
+                counts[table] = copy_rows(cursor, table, columns, rows)
+            start = time.perf_counter()
+            restore_foreign_keys(cursor, foreign_keys)
+            logger.info(
+                "Validated %d foreign keys in %.1fs",
+                len(foreign_keys),
+                time.perf_counter() - start,
+            )
+            # Fresh statistics so the planner sees the new volumes immediately
+            for table in counts:
+                cursor.execute(f'ANALYZE "{table}"')
+        connection.commit()
+    finally:
+        connection.close()
+    return counts
+
+
+def main() -> None:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument(
+        "--orientations-per-user", type=int, default=defaults.orientations_per_user
+    )
+    parser.add_argument(
+        "--traits-per-orientation", type=int, default=defaults.traits_per_orientation
+    )
+    parser.add_argument("--templates", type=int, default=defaults.templates)
+    parser.add_argument("--questions", type=int, default=defaults.questions)
+    parser.add_argument(
+        "--assignments-per-user", type=int, default=defaults.assignments_per_user
+    )
+    parser.add_argument(
+        "--completed-ratio", type=float, default=defaults.completed_ratio
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    config = SeedConfig(**vars(args))
+    logger.info("Seeding %s", config)
+    start = time.perf_counter()
+    counts = seed(engine, config)
+    logger.info(
+        "Loaded %d rows in %.1fs", sum(counts.values()), time.perf_counter() - start
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Run the app in production: gunicorn with uvicorn workers, sized to the container.
+
+    python -m app.server
+    python -m app.server --bind 0.0.0.0:8000 --dry-run
+
+Starts ``WORKERS_PER_CPU`` workers per CPU the process may use, which in a
+container is its CPU quota (cgroup v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``)
+rather than the host's CPU count, unless ``WEB_CONCURRENCY`` sets the count.
+
+Every worker has its own connection pool plus the LISTEN connection of its
+events hub, so together they could open more connections than Postgres
+allows. The pools are shrunk, overflow first, until all the workers fit in
+``POSTGRES_MAX_CONNECTIONS``, and there are never more workers than that
+budget allows for one pooled connection each.
+
+With ``SERVER_PRELOAD`` the app is imported once, before forking, and the
+workers share its modules and the OpenAPI document copy-on-write; the
+objects are frozen out of the garbage collector's reach so collections in a
+worker don't touch, and so copy, the shared pages. Workers are replaced
+after ``WORKER_MAX_REQUESTS`` requests, plus a random part of the jitter so
+they don't all restart at once, finishing their requests first.
+
+``--dry-run`` prints the sizing without starting the server.
+"""
+
+import argparse
+import gc
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from gunicorn.app.base import BaseApplication  # type: ignore[import-untyped]
+from gunicorn.arbiter import Arbiter  # type: ignore[import-untyped]
+from gunicorn.workers.base import Worker  # type: ignore[import-untyped]
+
+from app.core.config import settings
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpus(root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs allowed by the cgroup's quota, None when it has none"""
+    # cgroup v2: "<quota> <period>", or "max <period>" without a quota
+    cpu_max = _read(root / "cpu.max")
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    # cgroup v1: a quota of -1 means none
+    for controller in ("cpu", "cpu,cpuacct"):
+        quota_us = _read(root / controller / "cpu.cfs_quota_us")
+        period_us = _read(root / controller / "cpu.cfs_period_us")
+        if quota_us is not None and period_us is not None:
+            if int(quota_us) <= 0:
+                return None
+            return int(quota_us) / int(period_us)
+    return None
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """CPUs this process may use: its affinity, capped by the cgroup quota"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus: float = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpus(root)
+    return min(cpus, quota) if quota is not None else cpus
+
+
+@dataclass(frozen=True)
+class Sizing:
+    cpus: float
+    workers: int
+    pool_size: int
+    max_overflow: int
+
+    @property
+    def connections(self) -> int:
+        """Most connections the workers can hold, LISTEN ones included"""
+        return self.workers * (self.pool_size + self.max_overflow + 1)
+
+
+def size(cpus: float) -> Sizing:
+    workers = settings.WEB_CONCURRENCY or max(1, round(cpus * settings.WORKERS_PER_CPU))
+    # Each worker needs at least its LISTEN connection and one pooled one
+    workers = max(1, min(workers, settings.POSTGRES_MAX_CONNECTIONS // 2))
+    pooled = max(1, settings.POSTGRES_MAX_CONNECTIONS // workers - 1)
+    pool_size = max(1, min(settings.POSTGRES_POOL_SIZE, pooled))
+    max_overflow = max(0, min(settings.POSTGRES_MAX_OVERFLOW, pooled - pool_size))
+    return Sizing(cpus, workers, pool_size, max_overflow)
+
+
+def after_fork(server: Arbiter, worker: Worker) -> None:  # noqa: ARG001
+    from app.core.db import engine, replica_engines
+
+    # A pool must not hand out connections opened by another process. Drop
+    # any inherited ones without closing them, which would close them for
+    # the server process too
+    for db_engine in (engine, *replica_engines):
+        db_engine.dispose(close=False)
+
+
+class Server(BaseApplication):  # type: ignore[misc]
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from app.core import warmup
+        from app.main import app, openapi_document
+
+        if self.cfg.preload_app:
+            warmup.preload(app, openapi_document)
+            gc.collect()
+            gc.freeze()
+        return app
+
+
+def options(sizing: Sizing, bind: str) -> dict[str, Any]:
+    return {
+        "bind": bind,
+        "workers": sizing.workers,
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": settings.SERVER_PRELOAD,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.WORKER_GRACEFUL_TIMEOUT,
+        # uvicorn's default, as with fastapi run
+        "keepalive": 5,
+        "accesslog": "-",
+        # Worker heartbeats in memory rather than on the container's disk
+        "worker_tmp_dir": "/dev/shm" if Path("/dev/shm").is_dir() else None,
+        "post_fork": after_fork,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bind", default="0.0.0.0:8000")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    sizing = size(available_cpus())
+    # Before the app is imported, so its engines are created with these
+    settings.POSTGRES_POOL_SIZE = sizing.pool_size
+    settings.POSTGRES_MAX_OVERFLOW = sizing.max_overflow
+    print(
+        f"{sizing.workers} workers for {sizing.cpus:g} CPUs, "
+        f"pool of {sizing.pool_size}+{sizing.max_overflow} connections each, "
+        f"at most {sizing.connections} of {settings.POSTGRES_MAX_CONNECTIONS}"
+    )
+    if not args.dry_run:
+        Server(options(sizing, args.bind)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Where a worker's startup time goes.
+
+    python -m app.startup
+    python -m app.startup --top 20 --no-warm-up
+
+Imports ``--module`` in a fresh interpreter with ``python -X importtime`` and
+summarizes what it reports: the total, the packages that took longest to
+import their own modules, and the slowest modules. Then runs the warm-up a
+worker does before accepting requests (``app.core.warmup``) and times each
+step; that part needs the database, ``--no-warm-up`` skips it.
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    module: str
+    # Microseconds, as -X importtime reports them
+    self_us: int
+    cumulative_us: int
+
+
+def import_times(module: str) -> list[ImportTime]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise SystemExit(f"Couldn't import {module}:\n{result.stderr[-2000:]}")
+    times = []
+    for line in result.stderr.splitlines():
+        # import time:      1584 |     103783 |     numpy
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        times.append(ImportTime(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return times
+
+
+def package_times(times: list[ImportTime]) -> dict[str, int]:
+    """Self time summed by top level package, and by module for ``app``"""
+    packages: dict[str, int] = defaultdict(int)
+    for entry in times:
+        parts = entry.module.split(".")
+        package = ".".join(parts[:3]) if parts[0] == "app" else parts[0]
+        packages[package] += entry.self_us
+    return packages
+
+
+def print_table(title: str, rows: list[tuple[str, int]]) -> None:
+    print(f"\n{title}")
+    for name, us in rows:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-warm-up", dest="warm_up", action="store_false")
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    total = next(e.cumulative_us for e in times if e.module == args.module)
+    print(f"import {args.module}: {total / 1000:.0f} ms, {len(times)} modules")
+    packages = sorted(package_times(times).items(), key=lambda p: -p[1])
+    print_table("Packages (own modules only)", packages[: args.top])
+    slowest = sorted(times, key=lambda e: -e.self_us)[: args.top]
+    print_table("Modules", [(e.module, e.self_us) for e in slowest])
+
+    if args.warm_up:
+        from app.core import warmup
+        from app.main import app, openapi_document
+
+        timings = warmup.run(app, openapi_document)
+        print_table(
+            "Warm-up", [(name, int(s * 1_000_000)) for name, s in timings.items()]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import QuestionnaireAssignment, QuestionnaireTemplate, User
+from app.tests.utils.questionnaire import (
+    create_random_assignment,
+    create_random_questionnaire_template,
+    create_random_response,
+)
+from app.tests.utils.user import create_random_user
+
+# Jobs run in background threads, on their own connections
+pytestmark = pytest.mark.commits
+
+
+def test_bulk_delete_questionnaire_template(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "BULK_DELETE_BATCH_SIZE", 2)
+    template = create_random_questionnaire_template(db)
+    template_id = template.id
+    for _ in range(3):
+        assignment = create_random_assignment(db, questionnaire_id=template_id)
+        create_random_response(db, assignment=assignment)
+
+    r = client.post(
+        f"{settings.API_V1_STR}/jobs/bulk-delete",
+        headers=superuser_token_headers,
+        json={"target": "QUESTIONNAIRE_TEMPLATE", "target_id": str(template_id)},
+    )
+    assert r.status_code == 202
+    job = r.json()
+    assert job["kind"] == "bulk_delete_questionnaire_template"
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/{job['id']}", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["status"] == "SUCCEEDED"
+    assert content["finished_at"]
+    # 9 answers, 3 responses, 3 assignments, 3 questions and the template
+    assert content["processed"] == 19
+    db.expire_all()
+    assert db.get(QuestionnaireTemplate, template_id) is None
+    assert not db.exec(
+        select(QuestionnaireAssignment).where(
+            QuestionnaireAssignment.questionnaire_id == template_id
+        )
+    ).all()
+
+
+def test_bulk_delete_user(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    create_random_response(db, assignment=create_random_assignment(db, user_id=user_id))
+
+    r = client.post(
+        f"{settings.API_V1_STR}/jobs/bulk-delete",
+        headers=superuser_token_headers,
+        json={"target": "USER", "target_id": str(user_id)},
+    )
+    assert r.status_code == 202
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/{r.json()['id']}", headers=superuser_token_headers
+    )
+    assert r.json()["status"] == "SUCCEEDED"
+    db.expire_all()
+    assert db.get(User, user_id) is None
+
+
+def test_bulk_delete_self(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    superuser = db.exec(
+        select(User).where(User.email == settings.FIRST_SUPERUSER)
+    ).one()
+    r = client.post(
+        f"{settings.API_V1_STR}/jobs/bulk-delete",
+        headers=superuser_token_headers,
+        json={"target": "USER", "target_id": str(superuser.id)},
+    )
+    assert r.status_code == 403
+
+
+def test_bulk_delete_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/jobs/bulk-delete",
+        headers=superuser_token_headers,
+        json={"target": "USER", "target_id": str(uuid.uuid4())},
+    )
+    assert r.status_code == 404
+    assert r.json() == {"detail": "Delete target not found"}
+
+
+def test_bulk_delete_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/jobs/bulk-delete",
+        headers=normal_user_token_headers,
+        json={"target": "USER", "target_id": str(uuid.uuid4())},
+    )
+    assert r.status_code == 403
+
+
+def test_read_job_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/{uuid.uuid4()}", headers=superuser_token_headers
+    )
+    assert r.status_code == 404
+    assert r.json() == {"detail": "Job not found"}
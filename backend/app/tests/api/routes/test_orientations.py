@@ -0,0 +1,124 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import OrientationCreate, OrientationTraitCreate
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def test_read_orientations_filtered_by_traits(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    openness, focus = random_lower_string(), random_lower_string()
+    owner = create_random_user(db)
+    created = {
+        values: crud.create_orientation(
+            session=db,
+            orientation_in=OrientationCreate(
+                title=random_lower_string(),
+                traits=[
+                    OrientationTraitCreate(name=openness, value=values[0]),
+                    OrientationTraitCreate(name=focus, value=values[1]),
+                ],
+            ),
+            owner_id=owner.id,
+        ).id
+        for values in [(80, 10), (71, 60), (70, 90)]
+    }
+    url = f"{settings.API_V1_STR}/orientations/"
+
+    r = client.get(
+        url, headers=superuser_token_headers, params={"trait": f"{openness}>70"}
+    )
+    assert r.status_code == 200
+    assert r.json()["count"] == 2
+    assert {o["id"] for o in r.json()["data"]} == {
+        str(created[80, 10]),
+        str(created[71, 60]),
+    }
+
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={"trait": [f"{openness} >= 70", f"{focus}<=60"]},
+    )
+    assert {o["id"] for o in r.json()["data"]} == {
+        str(created[80, 10]),
+        str(created[71, 60]),
+    }
+
+    # Users only get their own
+    r = client.get(
+        url, headers=normal_user_token_headers, params={"trait": f"{openness}>0"}
+    )
+    assert r.json() == {"data": [], "count": 0}
+
+    for invalid in (f"{openness}~70", f"{openness}>101", ">70"):
+        r = client.get(url, headers=superuser_token_headers, params={"trait": invalid})
+        assert r.status_code == 422
+
+
+def test_read_trait_stats_and_histogram(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    name, other = random_lower_string(), random_lower_string()
+    owner = create_random_user(db)
+    for value in (5, 12, 18, 100):
+        crud.create_orientation(
+            session=db,
+            orientation_in=OrientationCreate(
+                title=random_lower_string(),
+                traits=[
+                    OrientationTraitCreate(name=name, value=value),
+                    OrientationTraitCreate(name=other, value=value // 2),
+                ],
+            ),
+            owner_id=owner.id,
+        )
+    url = f"{settings.API_V1_STR}/orientations/traits"
+
+    r = client.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    stats = {s["name"]: s for s in r.json()["data"]}
+    assert stats[name] == {
+        "name": name,
+        "count": 4,
+        "average": 33.75,
+        "median": 15.0,
+        "minimum": 5,
+        "maximum": 100,
+    }
+    r = client.get(url, headers=superuser_token_headers, params={"trait": f"{name}<50"})
+    assert {s["name"]: s["maximum"] for s in r.json()["data"]} == {
+        name: 18,
+        other: 9,
+    }
+
+    r = client.get(
+        f"{url}/{name}/histogram", headers=superuser_token_headers, params={"width": 10}
+    )
+    assert r.status_code == 200
+    histogram = r.json()
+    assert histogram["count"] == 4
+    assert len(histogram["buckets"]) == 11
+    assert histogram["buckets"][0] == {"lower": 0, "upper": 9, "count": 1}
+    assert histogram["buckets"][1] == {"lower": 10, "upper": 19, "count": 2}
+    assert histogram["buckets"][10] == {"lower": 100, "upper": 100, "count": 1}
+
+    r = client.get(
+        f"{url}/{name}/histogram",
+        headers=superuser_token_headers,
+        params={"width": 50, "trait": f"{other}>5"},
+    )
+    assert [b["count"] for b in r.json()["buckets"]] == [2, 0, 1]
+
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 403
@@ -0,0 +1,498 @@
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app import crud
+from app.core import idempotency
+from app.core.config import settings
+from app.models import (
+    Appointment,
+    AppointmentPublic,
+    AppointmentStatus,
+    AssignmentStatus,
+    QuestionnaireAssignment,
+    QuestionnaireAssignmentPublic,
+    QuestionnaireResponse,
+)
+from app.tests.utils.questionnaire import (
+    create_random_appointment,
+    create_random_assignment,
+    create_random_questionnaire_template,
+    response_payload,
+)
+from app.tests.utils.user import create_random_user
+
+
+def test_create_questionnaire_template(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    data = {
+        "title": "Sleep quality",
+        "questions": [
+            {"question_text": "How well did you sleep?", "order": 0},
+            {"question_text": "How rested do you feel?", "order": 1},
+        ],
+    }
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/templates",
+        headers=superuser_token_headers,
+        json=data,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["title"] == data["title"]
+    assert [q["order"] for q in content["questions"]] == [0, 1]
+
+
+def test_create_questionnaire_template_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/templates",
+        headers=normal_user_token_headers,
+        json={"title": "Forbidden"},
+    )
+    assert r.status_code == 403
+
+
+def test_create_assignment_template_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/assignments",
+        headers=superuser_token_headers,
+        json={"questionnaire_id": str(uuid.uuid4()), "user_id": str(user.id)},
+    )
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Questionnaire template not found"
+
+
+def test_read_my_assignments(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    assignment = create_random_assignment(db, user_id=user.id)
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/assignments/me",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert str(assignment.id) in [a["id"] for a in content["data"]]
+    assert all(a["user_id"] == str(user.id) for a in content["data"])
+
+
+def test_read_assignments_pages_after_last_id(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    template = create_random_questionnaire_template(db, num_questions=1)
+    created = [
+        str(create_random_assignment(db, questionnaire_id=template.id).id)
+        for _ in range(3)
+    ]
+    url = f"{settings.API_V1_STR}/questionnaires/assignments"
+    params: dict[str, Any] = {"questionnaire_id": str(template.id), "limit": 2}
+
+    r = client.get(url, headers=superuser_token_headers, params=params)
+    assert r.status_code == 200
+    first_page = [a["id"] for a in r.json()["data"]]
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={**params, "after": first_page[-1]},
+    )
+    assert r.status_code == 200
+    second_page = [a["id"] for a in r.json()["data"]]
+
+    # Ids are time ordered, pages come in creation order
+    assert first_page + second_page == created
+    assert r.json()["count"] == 3
+
+
+def test_list_pages_match_public_models(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    # Hot lists are built from row tuples, not from their response models
+    template = create_random_questionnaire_template(db, num_questions=3)
+    assignment = create_random_assignment(db, questionnaire_id=template.id)
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/assignments",
+        headers=superuser_token_headers,
+        params={"questionnaire_id": str(template.id)},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    db.refresh(assignment)
+    assert r.json() == {
+        "data": [
+            QuestionnaireAssignmentPublic.model_validate(assignment).model_dump(
+                mode="json"
+            )
+        ],
+        "count": 1,
+    }
+
+    appointment = create_random_appointment(
+        db,
+        user_id=assignment.user_id,
+        appointment_datetime=datetime(2031, 5, 4, 9, 30, 15, 250),
+    )
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/appointments",
+        headers=superuser_token_headers,
+        params={"from": "2031-05-04T09:30:15.000250", "to": "2031-05-04T09:30:16"},
+    )
+    assert r.status_code == 200
+    assert r.json()["data"] == [
+        AppointmentPublic.model_validate(appointment).model_dump(mode="json")
+    ]
+
+
+def test_read_assignment_of_other_user(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    assignment = create_random_assignment(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/assignments/{assignment.id}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 403
+
+
+def test_submit_response(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    template = create_random_questionnaire_template(db, num_questions=3)
+    assignment = create_random_assignment(
+        db, user_id=user.id, questionnaire_id=template.id
+    )
+    data = {
+        "assignment_id": str(assignment.id),
+        "answers": [
+            {"question_id": str(question.id), "likert_value": value}
+            for question, value in zip(template.questions, [1, 2, 4], strict=True)
+        ],
+    }
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/responses",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["total_score"] == 7
+    assert len(content["answers"]) == 3
+    db.expire_all()
+    db_assignment = db.get(QuestionnaireAssignment, assignment.id)
+    assert db_assignment
+    assert db_assignment.status == AssignmentStatus.COMPLETED
+
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/responses",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Assignment already completed"
+
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/responses/{content['id']}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["total_score"] == 7
+
+
+def test_submit_response_for_other_user(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    assignment = create_random_assignment(db)
+    r = client.post(
+        f"{settings.API_V1_STR}/questionnaires/responses",
+        headers=normal_user_token_headers,
+        json={"assignment_id": str(assignment.id), "answers": []},
+    )
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Not your assignment"
+
+
+def _submission(db: Session) -> dict[str, Any]:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    template = create_random_questionnaire_template(db, num_questions=2)
+    assignment = create_random_assignment(
+        db, user_id=user.id, questionnaire_id=template.id
+    )
+    return response_payload(template, assignment)
+
+
+def test_submit_response_retry_replays_result(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    data = _submission(db)
+    url = f"{settings.API_V1_STR}/questionnaires/responses"
+    headers = {**normal_user_token_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post(url, headers=headers, json=data)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    # From this worker's memory, then from the table as another worker would
+    for _ in range(2):
+        r = client.post(url, headers=headers, json=data)
+        assert r.status_code == 200
+        assert r.headers["Idempotent-Replayed"] == "true"
+        assert r.content == first.content
+        idempotency.cache.clear()
+
+    r = client.post(url, headers=headers, json={**data, "answers": data["answers"][:1]})
+    assert r.status_code == 422
+
+    count = db.exec(
+        select(func.count())
+        .select_from(QuestionnaireResponse)
+        .where(QuestionnaireResponse.assignment_id == uuid.UUID(data["assignment_id"]))
+    ).one()
+    assert count == 1
+
+
+# Concurrent requests can't share the test's connection
+@pytest.mark.commits
+def test_concurrent_duplicate_submissions_create_one_response(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    data = _submission(db)
+    url = f"{settings.API_V1_STR}/questionnaires/responses"
+    headers = {**normal_user_token_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(
+                lambda _: client.post(url, headers=headers, json=data), range(4)
+            )
+        )
+
+    assert [r.status_code for r in results] == [200] * 4
+    assert len({r.json()["id"] for r in results}) == 1
+    assert sum("Idempotent-Replayed" in r.headers for r in results) == 3
+
+
+def test_failed_submission_does_not_use_up_key(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    data = _submission(db)
+    url = f"{settings.API_V1_STR}/questionnaires/responses"
+    headers = {**normal_user_token_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    r = client.post(
+        url,
+        headers=headers,
+        json={**data, "assignment_id": str(create_random_assignment(db).id)},
+    )
+    assert r.status_code == 403
+
+    r = client.post(url, headers=headers, json=data)
+    assert r.status_code == 200
+    assert "Idempotent-Replayed" not in r.headers
+
+
+def test_draft_answers_are_saved_then_finalized(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    data = _submission(db)
+    answers = data["answers"]
+    url = f"{settings.API_V1_STR}/questionnaires/assignments/{data['assignment_id']}"
+
+    r = client.patch(
+        f"{url}/draft", headers=normal_user_token_headers, json={"answers": answers[:1]}
+    )
+    assert r.status_code == 200
+    assert r.json()["total_score"] == 3
+    assert r.json()["answer_count"] == 1
+
+    # Answering the first question again replaces its answer
+    r = client.patch(
+        f"{url}/draft",
+        headers=normal_user_token_headers,
+        json={
+            "answers": [
+                {**answers[0], "likert_value": 5},
+                {**answers[1], "text_response": "Sometimes"},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    assert r.json()["total_score"] == 8
+    assert r.json()["answer_count"] == 2
+
+    r = client.get(f"{url}/draft", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    saved = {a["question_id"]: a for a in r.json()["answers"]}
+    assert saved[answers[0]["question_id"]]["likert_value"] == 5
+    assert saved[answers[1]["question_id"]]["text_response"] == "Sometimes"
+
+    r = client.post(f"{url}/draft/finalize", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    content = r.json()
+    assert content["total_score"] == 8
+    assert len(content["answers"]) == 2
+
+    # The draft is gone and the assignment frozen
+    r = client.get(f"{url}/draft", headers=normal_user_token_headers)
+    assert r.status_code == 404
+    r = client.patch(
+        f"{url}/draft", headers=normal_user_token_headers, json={"answers": answers}
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Assignment already completed"
+
+
+def test_draft_rejects_questions_of_other_questionnaires(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    data = _submission(db)
+    other = create_random_questionnaire_template(db, num_questions=1)
+    url = f"{settings.API_V1_STR}/questionnaires/assignments/{data['assignment_id']}"
+
+    r = client.patch(
+        f"{url}/draft",
+        headers=normal_user_token_headers,
+        json={
+            "answers": [{"question_id": str(other.questions[0].id), "likert_value": 1}]
+        },
+    )
+    assert r.status_code == 400
+    r = client.post(f"{url}/draft/finalize", headers=normal_user_token_headers)
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Draft not found"
+
+
+def _appointments_on(
+    db: Session, user_id: uuid.UUID, day: date, hours: list[int]
+) -> list[Appointment]:
+    return [
+        create_random_appointment(
+            db,
+            user_id=user_id,
+            title=f"Session at {hour}",
+            appointment_datetime=datetime.combine(day, datetime.min.time())
+            + timedelta(hours=hour),
+        )
+        for hour in hours
+    ]
+
+
+def _unused_day() -> date:
+    return date(2100, 1, 1) + timedelta(days=random.randrange(100_000))
+
+
+def test_read_appointments_in_window(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    day = _unused_day()
+    # Created out of time order
+    late, early, next_day = _appointments_on(db, user.id, day, [15, 9, 33])
+    _appointments_on(db, create_random_user(db).id, day, [10])
+    url = f"{settings.API_V1_STR}/questionnaires/appointments"
+    window = {"from": f"{day}T00:00:00Z", "to": f"{day}T20:00:00+02:00"}
+
+    r = client.get(url, headers=normal_user_token_headers, params=window)
+    assert r.status_code == 200
+    assert [a["id"] for a in r.json()["data"]] == [str(early.id), str(late.id)]
+    assert r.json()["count"] == 2
+
+    r = client.get(
+        url,
+        headers=normal_user_token_headers,
+        params={**window, "status": AppointmentStatus.CANCELLED.value},
+    )
+    assert r.json()["count"] == 0
+    r = client.get(
+        url,
+        headers=normal_user_token_headers,
+        params={"from": f"{day}T10:00:00", "limit": 1, "skip": 1},
+    )
+    assert [a["id"] for a in r.json()["data"]] == [str(next_day.id)]
+
+    r = client.get(
+        url,
+        headers=normal_user_token_headers,
+        params={**window, "after": str(early.id)},
+    )
+    assert r.status_code == 400
+
+
+def test_read_appointment_day(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    day = _unused_day()
+    user, other_user = create_random_user(db), create_random_user(db)
+    # Tokyo is 9 hours ahead of UTC all year: its day starts at 15:00 UTC
+    _, second, first = _appointments_on(db, user.id, day, [-10, 3, -9])
+    (third,) = _appointments_on(db, other_user.id, day, [14])
+    url = f"{settings.API_V1_STR}/questionnaires/appointments/day/{day}"
+
+    r = client.get(url, headers=superuser_token_headers, params={"tz": "Asia/Tokyo"})
+    assert r.status_code == 200
+    content = r.json()
+    assert [a["id"] for a in content["data"]] == [
+        str(first.id),
+        str(second.id),
+        str(third.id),
+    ]
+    assert content["data"][0]["user"]["email"] == user.email
+
+    r = client.get(
+        url, headers=superuser_token_headers, params={"user_id": str(other_user.id)}
+    )
+    assert [a["id"] for a in r.json()["data"]] == [str(third.id)]
+    r = client.get(url, headers=superuser_token_headers, params={"tz": "Mars/Olympus"})
+    assert r.status_code == 422
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 403
+
+
+# The feed is streamed from a session of its own
+@pytest.mark.commits
+def test_read_appointment_calendar(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    day = _unused_day()
+    (appointment,) = _appointments_on(db, user.id, day, [9])
+    appointment.title = "Check-in, week 1; bring notes"
+    appointment.description = "Long description " * 10
+    db.add(appointment)
+    db.commit()
+
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/appointments/calendar.ics",
+        headers=normal_user_token_headers,
+        params={"from": str(day), "to": str(day + timedelta(days=1))},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/calendar")
+    lines = r.text.split("\r\n")
+    assert lines[0] == "BEGIN:VCALENDAR"
+    assert lines[-2:] == ["END:VCALENDAR", ""]
+    assert lines.count("BEGIN:VEVENT") == 1
+    assert f"DTSTART:{day:%Y%m%d}T090000Z" in lines
+    assert "SUMMARY:Check-in\\, week 1\\; bring notes" in lines
+    assert all(len(line.encode()) <= 75 for line in lines)
@@ -1,12 +1,14 @@
+import json
 import uuid
 from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app import crud
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import UNUSABLE_PASSWORD, verify_password
 from app.models import User, UserCreate
 from app.tests.utils.utils import random_email, random_lower_string
 
@@ -484,3 +486,130 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+# The import job runs in a background thread, on its own connection
+@pytest.mark.commits
+def test_import_users_csv(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "USER_IMPORT_CHUNK_SIZE", 2)
+    with_password, invited = random_email(), random_email()
+    password = random_lower_string()
+    upload = "\n".join(
+        [
+            "email,full_name,password",
+            f"{with_password},Imported User,{password}",
+            f"{settings.FIRST_SUPERUSER},,{random_lower_string()}",
+            f"{invited},,",
+            f"{with_password},Repeated,{random_lower_string()}",
+        ]
+    )
+
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers={**superuser_token_headers, "Content-Type": "text/csv"},
+        content=upload,
+    )
+    assert r.status_code == 202
+    job = r.json()
+    assert job["kind"] == "user_import"
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/{job['id']}", headers=superuser_token_headers
+    )
+    content = r.json()
+    assert content["status"] == "SUCCEEDED"
+    assert content["processed"] == 4
+
+    imported = crud.get_user_by_email(session=db, email=with_password)
+    assert imported
+    assert imported.full_name == "Imported User"
+    assert verify_password(password, imported.hashed_password)
+    pending = crud.get_user_by_email(session=db, email=invited)
+    assert pending
+    assert pending.full_name is None
+    assert pending.hashed_password == UNUSABLE_PASSWORD
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": invited, "password": UNUSABLE_PASSWORD},
+    )
+    assert r.status_code == 400
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    assert verify_password(settings.FIRST_SUPERUSER_PASSWORD, superuser.hashed_password)
+
+    for user in (imported, pending):
+        db.delete(user)
+    db.commit()
+
+
+@pytest.mark.commits
+def test_import_users_ndjson_stops_at_an_invalid_row(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "USER_IMPORT_CHUNK_SIZE", 1)
+    imported = random_email()
+    upload = "\n".join(
+        json.dumps(row)
+        for row in (
+            {"email": imported, "full_name": "First"},
+            {"email": "not an email"},
+            {"email": random_email()},
+        )
+    )
+
+    monkeypatch.setattr(settings, "SMTP_HOST", "smtp.example.com")
+    monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "admin@example.com")
+    with patch("app.core.user_import.send_email") as send_email:
+        r = client.post(
+            f"{settings.API_V1_STR}/users/import",
+            headers={**superuser_token_headers, "Content-Type": "application/x-ndjson"},
+            content=upload,
+        )
+    assert r.status_code == 202
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/{r.json()['id']}",
+        headers=superuser_token_headers,
+    )
+    content = r.json()
+    assert content["status"] == "FAILED"
+    assert content["error"].startswith("Row 2: ")
+    # The chunk before the invalid row was committed, and its user invited
+    assert content["processed"] == 1
+    user = crud.get_user_by_email(session=db, email=imported)
+    assert user
+    send_email.assert_called_once()
+    assert send_email.call_args.kwargs["email_to"] == imported
+
+    db.delete(user)
+    db.commit()
+
+
+def test_import_users_unsupported_type(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers={**superuser_token_headers, "Content-Type": "application/json"},
+        content="[]",
+    )
+    assert r.status_code == 415
+
+
+def test_import_users_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers={**normal_user_token_headers, "Content-Type": "text/csv"},
+        content="email\n",
+    )
+    assert r.status_code == 403
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import profiler, readiness
+from app.core.config import settings
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _idle(stop: threading.Event) -> None:
+    stop.wait()
+
+
+@pytest.fixture
+def busy_and_idle_threads() -> Generator[None, None, None]:
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_spin, args=(stop,), name="spinner"),
+        threading.Thread(target=_idle, args=(stop,), name="sleeper"),
+    ]
+    for thread in threads:
+        thread.start()
+    # Let the idle thread settle into its wait before sampling starts
+    time.sleep(0.1)
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_profile_disabled(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/profile",
+        headers=superuser_token_headers,
+        params={"seconds": 0.1},
+    )
+    assert r.status_code == 404
+    assert r.json() == {"detail": "Profiler is disabled"}
+
+
+def test_profile_requires_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/profile",
+        headers=normal_user_token_headers,
+        params={"seconds": 0.1},
+    )
+    assert r.status_code == 403
+
+
+def test_profile_returns_collapsed_stacks(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+    busy_and_idle_threads: None,  # noqa: ARG001
+) -> None:
+    monkeypatch.setattr(settings, "PROFILER_ENABLED", True)
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/profile",
+        headers=superuser_token_headers,
+        params={"seconds": 0.2, "mode": "wall"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-disposition"].endswith('-wall.collapsed"')
+    lines = r.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(line.startswith("spinner;") for line in lines)
+    assert any(line.startswith("sleeper;") for line in lines)
+
+
+def test_cpu_mode_skips_idle_threads(busy_and_idle_threads: None) -> None:  # noqa: ARG001
+    stacks = profiler.sample(0.3, interval=0.005, mode="cpu")
+    assert any("_spin (app.tests.api.routes.test_utils:" in s for s in stacks)
+    assert not any("_idle (app.tests.api.routes.test_utils:" in s for s in stacks)
+
+
+def test_concurrent_profiles_are_rejected() -> None:
+    with profiler._lock:
+        with pytest.raises(profiler.ProfilerBusyError):
+            profiler.sample(0.01)
+
+
+def test_ready(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/ready/")
+    assert r.status_code == 200
+    assert r.json() == {
+        "ready": True,
+        "reachable": True,
+        "database": True,
+        "migrations": True,
+    }
+
+    monkeypatch.setattr(readiness, "migration_heads", lambda: frozenset({"next"}))
+    r = client.get(f"{settings.API_V1_STR}/utils/ready/")
+    assert r.status_code == 503
+    assert r.json()["migrations"] is False
+    # Whereas the process itself is fine
+    r = client.get(f"{settings.API_V1_STR}/utils/health-check/")
+    assert r.status_code == 200
@@ -2,26 +2,68 @@ from collections.abc import Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, delete
+from sqlmodel import Session
 
+from app.api.deps import get_db
+from app.core import security
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
-from app.models import Item, User
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
 
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "commits: the test's writes are committed, for code that reads them "
+        "from other connections (background jobs, LISTEN, concurrent requests)",
+    )
+
+
 @pytest.fixture(scope="session", autouse=True)
-def db() -> Generator[Session, None, None]:
+def initial_data() -> None:
+    # The fewest bcrypt rounds: hashing at the production cost made up most
+    # of the suite's CPU time
+    security.pwd_context.update(bcrypt__rounds=4)
     with Session(engine) as session:
         init_db(session)
-        yield session
-        statement = delete(Item)
-        session.execute(statement)
-        statement = delete(User)
-        session.execute(statement)
-        session.commit()
+
+
+@pytest.fixture
+def db(request: pytest.FixtureRequest) -> Generator[Session, None, None]:
+    """
+    A session whose writes are rolled back after the test, and which the
+    app's requests during the test share.
+
+    Everything runs in one transaction on one connection: commits, in the
+    test or in a route, release a savepoint instead, so each sees the other's
+    rows. Tests marked ``commits`` get a plain session instead, and clean up
+    after themselves or use rows no other test looks for.
+    """
+    if request.node.get_closest_marker("commits"):
+        with Session(engine) as session:
+            yield session
+        return
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+
+        def shared_db() -> Generator[Session, None, None]:
+            with Session(
+                connection, join_transaction_mode="create_savepoint"
+            ) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = shared_db
+        try:
+            with Session(
+                connection, join_transaction_mode="create_savepoint"
+            ) as session:
+                yield session
+        finally:
+            del app.dependency_overrides[get_db]
+            transaction.rollback()
 
 
 @pytest.fixture(scope="module")
@@ -36,7 +78,9 @@ def superuser_token_headers(client: TestClient) -> dict[str, str]:
 
 
 @pytest.fixture(scope="module")
-def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]:
-    return authentication_token_from_email(
-        client=client, email=settings.EMAIL_TEST_USER, db=db
-    )
+def normal_user_token_headers(client: TestClient) -> dict[str, str]:
+    # Committed, the token outlives the tests' transactions
+    with Session(engine) as session:
+        return authentication_token_from_email(
+            client=client, email=settings.EMAIL_TEST_USER, db=session
+        )
@@ -0,0 +1,74 @@
+from sqlmodel import Session, select
+
+from app.core import querylog
+from app.core.bulk_delete import bulk_delete, cascade_paths
+from app.models import (
+    Answer,
+    QuestionnaireAssignment,
+    QuestionnaireResponse,
+    QuestionnaireTemplate,
+    User,
+)
+from app.tests.utils.questionnaire import (
+    create_random_assignment,
+    create_random_questionnaire_template,
+    create_random_response,
+)
+
+
+def test_cascade_paths_are_deepest_first() -> None:
+    table = QuestionnaireTemplate.__table__  # type: ignore[attr-defined]
+    paths = cascade_paths(table)
+    tables = [path[0].table.name for path in paths]
+
+    assert tables.index("answer") < tables.index("questionnaireresponse")
+    assert tables.index("questionnaireresponse") < tables.index(
+        "questionnaireassignment"
+    )
+    assert tables.index("answerarchive") < tables.index("questionnaireresponsearchive")
+    assert all(path[-1].referred_table is table for path in paths)
+
+
+def test_bulk_delete_reports_progress_per_batch(db: Session) -> None:
+    template = create_random_questionnaire_template(db, num_questions=2)
+    template_id = template.id
+    for _ in range(2):
+        assignment = create_random_assignment(db, questionnaire_id=template_id)
+        create_random_response(db, assignment=assignment)
+    progress: list[int] = []
+
+    deleted = bulk_delete(
+        db,
+        QuestionnaireTemplate.__table__,  # type: ignore[attr-defined]
+        template_id,
+        batch_size=3,
+        progress=progress.append,
+    )
+
+    assert deleted == 4 + 2 + 2 + 2 + 1
+    assert progress == sorted(progress)
+    assert progress[-1] == deleted
+    assert db.get(QuestionnaireTemplate, template_id) is None
+
+
+def test_orm_delete_leaves_children_to_the_database(db: Session) -> None:
+    assignment = create_random_assignment(db)
+    response = create_random_response(db, assignment=assignment)
+    user_id, response_id = assignment.user_id, response.id
+    user = db.get(User, user_id)
+
+    with querylog.record_queries() as recorder:
+        db.delete(user)
+        db.commit()
+
+    # No collection is loaded before the DELETE, the foreign keys cascade
+    assert list(recorder.fingerprints) == [
+        'DELETE FROM "user" WHERE "user".id = ?::UUID'
+    ]
+    assert db.get(QuestionnaireResponse, response_id) is None
+    assert not db.exec(select(Answer).where(Answer.response_id == response_id)).all()
+    assert not db.exec(
+        select(QuestionnaireAssignment).where(
+            QuestionnaireAssignment.user_id == user_id
+        )
+    ).all()
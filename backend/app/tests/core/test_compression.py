@@ -0,0 +1,123 @@
+import zlib
+from collections.abc import Iterator
+
+import brotli  # type: ignore[import-untyped]
+import orjson
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate
+from app.core.config import settings
+from app.main import app
+
+DECODERS = {
+    "zstd": lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body),
+    "br": brotli.decompress,
+    "gzip": lambda body: zlib.decompress(body, 31),
+}
+
+
+def test_negotiate() -> None:
+    assert negotiate("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate("gzip, br;q=0.9") == "gzip"
+    assert negotiate("br;q=0.5, gzip;q=0.5") == "br"
+    assert negotiate("zstd;q=0, *") == "br"
+    assert negotiate("GZIP") == "gzip"
+    assert negotiate("deflate, identity") is None
+    assert negotiate("br;q=0, gzip;q=0") is None
+    assert negotiate("") is None
+
+
+def _app() -> FastAPI:
+    test_app = FastAPI()
+    test_app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @test_app.get("/large")
+    def large() -> dict[str, list[int]]:
+        return {"data": list(range(1000))}
+
+    @test_app.get("/small")
+    def small() -> dict[str, int]:
+        return {"data": 1}
+
+    @test_app.get("/stream")
+    def stream() -> StreamingResponse:
+        def lines() -> Iterator[bytes]:
+            for i in range(100):
+                yield f"line {i}\n".encode() * 10
+
+        return StreamingResponse(lines(), media_type="text/calendar")
+
+    @test_app.get("/events")
+    def events() -> StreamingResponse:
+        return StreamingResponse(
+            iter([b"data: x\n\n" * 100]), media_type="text/event-stream"
+        )
+
+    @test_app.get("/encoded")
+    def encoded() -> PlainTextResponse:
+        return PlainTextResponse(
+            zlib.compress(b"x" * 1000), headers={"Content-Encoding": "deflate"}
+        )
+
+    return test_app
+
+
+def test_responses_are_compressed_above_threshold() -> None:
+    client = TestClient(_app())
+    expected = orjson.dumps({"data": list(range(1000))})
+    for encoding, decode in DECODERS.items():
+        with client.stream("GET", "/large", headers={"Accept-Encoding": encoding}) as r:
+            body = b"".join(r.iter_raw())
+        assert r.headers["content-encoding"] == encoding
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert int(r.headers["content-length"]) == len(body) < len(expected)
+        assert decode(body) == expected
+
+    r = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.content == expected
+
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+
+    r = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+    r = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "deflate"
+    assert r.content == b"x" * 1000
+
+
+def test_streams_are_compressed_per_chunk() -> None:
+    client = TestClient(_app())
+    expected = b"".join(f"line {i}\n".encode() * 10 for i in range(100))
+    for encoding, decode in DECODERS.items():
+        with client.stream(
+            "GET", "/stream", headers={"Accept-Encoding": encoding}
+        ) as r:
+            chunks = list(r.iter_raw())
+        assert r.headers["content-encoding"] == encoding
+        assert "content-length" not in r.headers
+        assert decode(b"".join(chunks)) == expected
+        if encoding == "gzip":
+            # Every chunk is flushed, so the first one decodes on its own
+            first = zlib.decompressobj(31).decompress(chunks[0])
+            assert first and expected.startswith(first)
+
+
+def test_openapi_document_is_precompressed(client: TestClient) -> None:
+    url = f"{settings.API_V1_STR}/openapi.json"
+    for encoding, decode in DECODERS.items():
+        with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as r:
+            body = b"".join(r.iter_raw())
+        assert r.status_code == 200
+        assert r.headers["content-encoding"] == encoding
+        assert orjson.loads(decode(body)) == app.openapi()
+
+    r = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.json() == app.openapi()
@@ -0,0 +1,138 @@
+import asyncio
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app import crud
+from app.core import events
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    AssignmentStatus,
+    QuestionnaireAssignment,
+    QuestionnaireAssignmentBulkCreate,
+    QuestionnaireAssignmentCreate,
+)
+from app.tests.utils.questionnaire import create_random_questionnaire_template
+from app.tests.utils.user import create_random_user
+
+# Events are only delivered to LISTEN connections on commit
+pytestmark = pytest.mark.commits
+
+
+def receive_after(user_id: uuid.UUID, write: Callable[[Session], None]) -> bytes:
+    """The first event streamed to ``user_id`` once ``write`` has run"""
+
+    async def scenario() -> bytes:
+        chunks = events.stream(str(user_id))
+        try:
+            assert (await anext(chunks)).endswith(b": connected\n\n")
+
+            def run_write() -> None:
+                with Session(engine) as session:
+                    write(session)
+
+            await asyncio.to_thread(run_write)
+            return await asyncio.wait_for(anext(chunks), 5)
+        finally:
+            await chunks.aclose()
+            await events.hub.close()
+
+    return asyncio.run(scenario())
+
+
+def test_committed_assignment_is_streamed_to_its_user(db: Session) -> None:
+    user = create_random_user(db)
+    other_user = create_random_user(db)
+    template = create_random_questionnaire_template(db, num_questions=1)
+    created: list[uuid.UUID] = []
+
+    def write(session: Session) -> None:
+        events.notify(session, user.id, "assignment.created", uuid.uuid4())
+        session.rollback()
+        for user_id in (other_user.id, user.id):
+            assignment = crud.create_questionnaire_assignment(
+                session=session,
+                assignment_in=QuestionnaireAssignmentCreate(
+                    questionnaire_id=template.id, user_id=user_id
+                ),
+            )
+            created.append(assignment.id)
+
+    chunk = receive_after(user.id, write)
+    assert chunk == (
+        b"event: assignment.created\n"
+        b'data: {"type": "assignment.created", "id": "%s"}\n\n'
+        % str(created[1]).encode()
+    )
+
+
+def test_malformed_notifications_are_skipped(db: Session) -> None:
+    user = create_random_user(db)
+    event_id = uuid.uuid4()
+
+    def write(session: Session) -> None:
+        for payload in ("not json", '{"unexpected": "keys"}'):
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": events.CHANNEL, "payload": payload},
+            )
+        events.notify(session, user.id, "assignment.created", event_id)
+        session.commit()
+
+    chunk = receive_after(user.id, write)
+    assert str(event_id).encode() in chunk
+
+
+def test_bulk_assignments_and_overdue_sweep_are_streamed(db: Session) -> None:
+    user = create_random_user(db)
+    template = create_random_questionnaire_template(db, num_questions=1)
+
+    def bulk_assign(session: Session) -> None:
+        crud.create_bulk_questionnaire_assignments(
+            session=session,
+            assignment_in=QuestionnaireAssignmentBulkCreate(
+                questionnaire_id=template.id,
+                user_ids=[create_random_user(session).id, user.id],
+                due_date=datetime.utcnow() - timedelta(days=1),
+            ),
+        )
+
+    assert receive_after(user.id, bulk_assign).startswith(
+        b"event: assignment.created\n"
+    )
+
+    def sweep(session: Session) -> None:
+        assert crud.mark_overdue_assignments(session=session, now=datetime.utcnow())
+
+    assert receive_after(user.id, sweep).startswith(b"event: assignment.overdue\n")
+    statuses = db.exec(
+        select(QuestionnaireAssignment.status).where(
+            QuestionnaireAssignment.user_id == user.id
+        )
+    ).all()
+    assert statuses == [AssignmentStatus.OVERDUE]
+
+
+def test_full_stream_queue_keeps_latest_events() -> None:
+    hub = events.EventHub("")
+
+    async def scenario() -> list[str | None]:
+        queue: asyncio.Queue[events.Event] = asyncio.Queue(maxsize=2)
+        hub._subscribers["user"].add(queue)
+        for i in range(3):
+            hub.publish(events.Event(user_id="user", type="test", id=str(i)))
+        hub.broadcast("resync")
+        return [queue.get_nowait().id for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["2", None]
+
+
+def test_event_stream_requires_login(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/questionnaires/events/me")
+    assert r.status_code == 401
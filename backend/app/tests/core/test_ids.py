@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.ids import uuid7, uuid7_time
+
+
+def test_uuid7_layout() -> None:
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(uuid7_time(value) - datetime.now(timezone.utc)) < timedelta(seconds=1)
+
+
+def test_uuid7_is_strictly_increasing() -> None:
+    # Many ids per millisecond exercise the counter and its overflow
+    values = [uuid7() for _ in range(20_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_time_rejects_other_versions() -> None:
+    with pytest.raises(ValueError):
+        uuid7_time(uuid.uuid4())
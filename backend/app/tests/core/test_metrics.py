@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select, text
+
+from app.api.deps import SessionDep
+from app.core.db import engine
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    instrument_engine,
+    metrics_endpoint,
+    registry,
+)
+
+
+def test_histogram_render() -> None:
+    local_registry = Registry()
+    histogram = Histogram(
+        "latency_seconds", "Latency.", ("route",), local_registry, buckets=(0.1, 1)
+    )
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 5)
+    output = local_registry.render()
+    assert "# TYPE latency_seconds histogram" in output
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'latency_seconds_count{route="/a"} 3' in output
+    assert 'latency_seconds_sum{route="/a"} 5.55' in output
+
+
+def test_counter_merges_thread_shards() -> None:
+    local_registry = Registry()
+    counter = Counter("hits_total", "Hits.", ("route",), local_registry)
+
+    def hit() -> None:
+        for _ in range(1000):
+            counter.inc(("/a",))
+
+    threads = [threading.Thread(target=hit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 'hits_total{route="/a"} 4000' in local_registry.render()
+
+
+def test_middleware_records_route_template_and_db_statements() -> None:
+    test_app = FastAPI()
+
+    @test_app.get("/things/{thing_id}")
+    def read_thing(thing_id: int, session: SessionDep) -> int:
+        session.exec(select(1)).one()
+        session.exec(select(2)).one()
+        return thing_id
+
+    instrument_engine(engine)
+    test_app.add_middleware(MetricsMiddleware)
+    test_app.add_route("/metrics", metrics_endpoint)
+    registry.clear()
+
+    with TestClient(test_app) as client:
+        assert client.get("/things/1").status_code == 200
+        assert client.get("/things/2").status_code == 200
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    output = response.text
+    labels = 'method="GET",route="/things/{thing_id}"'
+    assert f'http_requests_total{{{labels},status="200"}} 2' in output
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in output
+    assert f"http_request_db_statements_sum{{{labels}}} 4" in output
+    assert f"http_request_threadpool_wait_seconds_count{{{labels}}} 2" in output
+    assert f"http_response_size_bytes_sum{{{labels}}} 2" in output
+
+
+def test_middleware_records_failed_db_statements() -> None:
+    test_app = FastAPI()
+
+    @test_app.get("/fails")
+    def fail(session: SessionDep) -> None:
+        with pytest.raises(DBAPIError):
+            session.exec(text("SELECT 1 / 0")).one()
+        session.rollback()
+        session.exec(select(1)).one()
+
+    instrument_engine(engine)
+    test_app.add_middleware(MetricsMiddleware)
+    test_app.add_route("/metrics", metrics_endpoint)
+    registry.clear()
+
+    with TestClient(test_app) as client:
+        assert client.get("/fails").status_code == 200
+        output = client.get("/metrics").text
+
+    labels = 'method="GET",route="/fails"'
+    assert f"http_request_db_statements_sum{{{labels}}} 2" in output
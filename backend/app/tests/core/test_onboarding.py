@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, delete, select, update
+
+from app import crud
+from app.core import onboarding
+from app.core.config import settings
+from app.models import (
+    QuestionnaireAssignment,
+    QuestionnaireTemplate,
+    QuestionnaireTemplateUpdate,
+    User,
+)
+from app.tests.utils.questionnaire import create_random_questionnaire_template
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+@pytest.fixture(autouse=True)
+def registry() -> onboarding.OnboardingRegistry:
+    # Templates cached by earlier tests were rolled back
+    onboarding.registry.clear()
+    return onboarding.registry
+
+
+def signup(client: TestClient) -> str:
+    email = random_email()
+    r = client.post(
+        f"{settings.API_V1_STR}/users/signup",
+        json={"email": email, "password": random_lower_string()},
+    )
+    assert r.status_code == 200
+    return email
+
+
+def test_signup_assigns_onboarding_templates(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    tagged = create_random_questionnaire_template(db, tags=["onboarding", "intake"])
+    listed = create_random_questionnaire_template(db)
+    create_random_questionnaire_template(db, tags=["onboarding"], is_active=False)
+    create_random_questionnaire_template(db, tags=["intake"])
+    monkeypatch.setattr(settings, "ONBOARDING_TEMPLATE_IDS", [listed.id])
+
+    email = signup(client)
+
+    user = db.exec(select(User).where(User.email == email)).one()
+    assignments = db.exec(
+        select(QuestionnaireAssignment).where(
+            QuestionnaireAssignment.user_id == user.id
+        )
+    ).all()
+    assert {a.questionnaire_id for a in assignments} == {tagged.id, listed.id}
+    for assignment in assignments:
+        assert assignment.due_date
+        assert assignment.due_date - assignment.assigned_at == timedelta(
+            days=settings.ONBOARDING_DUE_DAYS
+        )
+
+
+def test_registry_is_cached_until_a_template_changes(
+    db: Session, registry: onboarding.OnboardingRegistry
+) -> None:
+    template = create_random_questionnaire_template(db)
+    assert template.id not in registry.templates(db)
+
+    # Written around the ORM, so this worker doesn't notice
+    db.execute(
+        update(QuestionnaireTemplate)
+        .where(col(QuestionnaireTemplate.id) == template.id)
+        .values(tags=["onboarding"])
+    )
+    assert template.id not in registry.templates(db)
+
+    db.expire(template)
+    crud.update_questionnaire_template(
+        session=db,
+        db_questionnaire=template,
+        questionnaire_in=QuestionnaireTemplateUpdate(description="Welcome"),
+    )
+    assert template.id in registry.templates(db)
+
+
+def test_registry_expires(
+    db: Session,
+    registry: onboarding.OnboardingRegistry,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    template = create_random_questionnaire_template(db)
+    registry.templates(db)
+    db.execute(
+        update(QuestionnaireTemplate)
+        .where(col(QuestionnaireTemplate.id) == template.id)
+        .values(tags=["onboarding"])
+    )
+    monkeypatch.setattr(settings, "ONBOARDING_CACHE_SECONDS", 0.0)
+    assert template.id in registry.templates(db)
+
+
+def test_cached_templates_removed_since_are_skipped(
+    db: Session, registry: onboarding.OnboardingRegistry
+) -> None:
+    kept, deactivated, deleted = (
+        create_random_questionnaire_template(db, tags=["onboarding"]).id
+        for _ in range(3)
+    )
+    assert {kept, deactivated, deleted} <= set(registry.templates(db))
+    # By another worker, which leaves this one's registry as it is
+    db.execute(
+        update(QuestionnaireTemplate)
+        .where(col(QuestionnaireTemplate.id) == deactivated)
+        .values(is_active=False)
+    )
+    db.execute(
+        delete(QuestionnaireTemplate).where(col(QuestionnaireTemplate.id) == deleted)
+    )
+    user = create_random_user(db)
+
+    assignments = onboarding.assign(db, user.id, now=datetime(2026, 1, 1))
+
+    assigned = db.exec(
+        select(QuestionnaireAssignment.questionnaire_id).where(
+            col(QuestionnaireAssignment.id).in_(assignments)
+        )
+    ).all()
+    assert kept in assigned
+    assert deactivated not in assigned
+    assert deleted not in assigned
+
+
+def test_signup_is_one_transaction(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    create_random_questionnaire_template(db, tags=["onboarding"])
+
+    def fail(*_args: object, **_kwargs: object) -> list[object]:
+        raise RuntimeError("assignment failed")
+
+    monkeypatch.setattr(onboarding, "assign", fail)
+    email = random_email()
+    with pytest.raises(RuntimeError):
+        client.post(
+            f"{settings.API_V1_STR}/users/signup",
+            json={"email": email, "password": random_lower_string()},
+        )
+    assert db.exec(select(User).where(User.email == email)).first() is None
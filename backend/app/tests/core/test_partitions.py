@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Any
+
+import pytest
+from sqlmodel import Session, text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    ensure_monthly_partitions,
+    ensure_partitions_ahead,
+    is_partition,
+    month_start,
+    months,
+    next_month,
+    partition_name,
+)
+from app.tests.utils.questionnaire import (
+    create_random_assignment,
+    create_random_response,
+)
+
+# Partitions are created on another connection, which would wait on the test's
+pytestmark = pytest.mark.commits
+
+
+def test_months_cover_the_range() -> None:
+    assert list(months(datetime(2024, 11, 20), datetime(2025, 2, 1))) == [
+        datetime(2024, 11, 1),
+        datetime(2024, 12, 1),
+        datetime(2025, 1, 1),
+    ]
+    assert list(months(datetime(2025, 1, 1), datetime(2025, 1, 1))) == []
+
+
+def test_partition_names() -> None:
+    name = partition_name("answerarchive", datetime(2024, 3, 1))
+
+    assert name == "answerarchive_p202403"
+    assert is_partition(name)
+    assert is_partition("answer_default")
+    assert not is_partition("answerarchive")
+
+
+def scanned_relations(session: Session, statement: str, **params: Any) -> set[str]:
+    plan = session.execute(
+        text(f"EXPLAIN (FORMAT JSON) {statement}"), params
+    ).scalar_one()
+    relations: set[str] = set()
+
+    def visit(node: dict[str, Any]) -> None:
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            visit(child)
+
+    visit(plan[0]["Plan"])
+    return relations
+
+
+def test_partitions_are_created_ahead(db: Session) -> None:
+    ensure_partitions_ahead(db.connection())
+    db.commit()
+    last = add_months(datetime.utcnow(), settings.PARTITION_MONTHS_AHEAD)
+
+    for table in PARTITIONED_TABLES:
+        assert db.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"),
+            {"name": partition_name(table, last)},
+        ).scalar_one()
+
+
+def test_time_window_scans_one_partition(db: Session) -> None:
+    month = month_start(datetime.utcnow())
+
+    assert scanned_relations(
+        db,
+        "SELECT sum(likert_value) FROM answer"
+        " WHERE completed_at >= :start AND completed_at < :end",
+        start=month,
+        end=next_month(month),
+    ) == {partition_name("answer", month)}
+
+
+def test_response_answers_scan_one_partition(db: Session) -> None:
+    response = create_random_response(db, assignment=create_random_assignment(db))
+
+    # The composite foreign key lets answers of a response be found by the
+    # partition key as well
+    assert scanned_relations(
+        db,
+        "SELECT * FROM questionnaireresponse r"
+        " JOIN answer a ON a.response_id = r.id AND a.completed_at = r.completed_at"
+        " WHERE r.id = :id AND r.completed_at = :completed_at",
+        id=response.id,
+        completed_at=response.completed_at,
+    ) == {
+        partition_name("questionnaireresponse", response.completed_at),
+        partition_name("answer", response.completed_at),
+    }
+
+
+def test_partition_is_not_created_over_default_rows(db: Session) -> None:
+    response = create_random_response(db, assignment=create_random_assignment(db))
+    month = datetime(2099, 5, 1)
+
+    with engine.connect() as connection:
+        connection.execute(
+            text("UPDATE questionnaireresponse SET completed_at = :at WHERE id = :id"),
+            {"at": month, "id": response.id},
+        )
+        created = ensure_monthly_partitions(
+            connection, "questionnaireresponse", month, next_month(month)
+        )
+        assert created == []
+        # Answers followed their response into the default partition
+        assert connection.execute(
+            text("SELECT count(*) FROM answer_default WHERE response_id = :id"),
+            {"id": response.id},
+        ).scalar_one() == len(response.answers)
+        connection.rollback()
@@ -0,0 +1,145 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, select, text
+
+from app import crud
+from app.api.deps import SessionDep
+from app.core import querylog
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Orientation, OrientationCreate, OrientationTraitCreate
+from app.tests.utils.questionnaire import (
+    create_random_assignment,
+    create_random_questionnaire_template,
+)
+from app.tests.utils.user import create_random_user
+
+
+def test_fingerprint_collapses_literals_and_lists() -> None:
+    a = querylog.fingerprint(
+        "SELECT * FROM item WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND title = 'x'"
+    )
+    b = querylog.fingerprint(
+        "SELECT *  FROM item\n WHERE id IN (%(id_1_1)s) AND title = 'y''s'"
+    )
+    assert a == b == "SELECT * FROM item WHERE id IN (?+) AND title = ?"
+    assert querylog.fingerprint("SELECT 1 LIMIT 10") == "SELECT ? LIMIT ?"
+
+
+def test_savepoints_are_not_counted() -> None:
+    recorder = querylog.QueryRecorder()
+    for statement in (
+        "SAVEPOINT sa_savepoint_1",
+        "SELECT 1",
+        "RELEASE SAVEPOINT sa_savepoint_1",
+        "ROLLBACK TO SAVEPOINT sa_savepoint_2",
+    ):
+        recorder.record(statement, 0.001)
+    assert recorder.count == 1
+
+
+# Reads the orientations back on a connection of its own
+@pytest.mark.commits
+def test_lazy_relationship_loop_is_flagged_as_n_plus_one(
+    db: Session, caplog: pytest.LogCaptureFixture
+) -> None:
+    owner_id = create_random_user(db).id
+    for _ in range(3):
+        crud.create_orientation(
+            session=db,
+            orientation_in=OrientationCreate(
+                title="Orientation",
+                traits=[OrientationTraitCreate(name="openness", value=50)],
+            ),
+            owner_id=owner_id,
+        )
+
+    querylog.instrument_engine(engine)
+    with (
+        Session(engine) as session,
+        caplog.at_level(logging.WARNING, logger=querylog.logger.name),
+        querylog.record_queries(n_plus_one_threshold=2) as recorder,
+    ):
+        orientations = session.exec(
+            select(Orientation).where(Orientation.owner_id == owner_id)
+        ).all()
+        for orientation in orientations:
+            assert len(orientation.traits) == 1
+
+    assert recorder.count == 4
+    assert len(recorder.n_plus_one) == 1
+    assert "Possible N+1" in caplog.text
+
+
+def test_failed_statements_are_recorded() -> None:
+    querylog.instrument_engine(engine)
+    with Session(engine) as session, querylog.record_queries() as recorder:
+        with pytest.raises(DBAPIError):
+            session.exec(text("SELECT 1 / 0"))  # type: ignore[call-overload]
+        session.rollback()
+        session.exec(select(1)).one()
+
+    assert recorder.count == 2
+
+
+def test_slow_query_is_logged_with_plan(
+    db: Session,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    querylog.instrument_engine(engine)
+    with caplog.at_level(logging.WARNING, logger=querylog.logger.name):
+        db.exec(text("SELECT * FROM generate_series(1, 3)"))  # type: ignore[call-overload]
+    assert "Slow query" in caplog.text
+    assert "Function Scan on generate_series" in caplog.text
+    # The EXPLAIN ran in a savepoint and left the session usable
+    assert db.exec(select(1)).one() == 1
+    db.rollback()
+
+
+def test_middleware_records_budget_violation() -> None:
+    test_app = FastAPI()
+
+    @test_app.get("/things")
+    @querylog.query_budget(1)
+    def read_things(session: SessionDep) -> int:
+        session.exec(select(1)).one()
+        return session.exec(select(2)).one()
+
+    querylog.instrument_engine(engine)
+    test_app.add_middleware(querylog.QueryRecorderMiddleware)
+    with TestClient(test_app) as client:
+        assert client.get("/things").status_code == 200
+
+    violations = list(querylog.budget_violations)
+    querylog.budget_violations.clear()
+    assert len(violations) == 1
+    assert violations[0].route == "GET /things"
+    assert violations[0].count == 2
+    assert violations[0].budget == 1
+
+
+def test_assignment_list_stays_within_budget(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    # Assignments of one template, so the page holds all of them
+    template = create_random_questionnaire_template(db)
+    created = {
+        str(create_random_assignment(db, questionnaire_id=template.id).id)
+        for _ in range(5)
+    }
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/assignments",
+        headers=superuser_token_headers,
+        params={"questionnaire_id": str(template.id)},
+    )
+    assert r.status_code == 200
+    data = r.json()["data"]
+    assert {a["id"] for a in data} == created
+    assert all(len(a["questionnaire"]["questions"]) == 3 for a in data)
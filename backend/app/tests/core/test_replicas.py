@@ -0,0 +1,199 @@
+import threading
+import time
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event
+from sqlmodel import Session, select
+
+from app.api import deps
+from app.core.config import settings
+from app.core.db import engine
+from app.core.replicas import (
+    Replica,
+    ReplicaRouter,
+    ReplicaStatus,
+    RoutingSession,
+    parse_lsn,
+    record_session_writes,
+)
+from app.models import Item, User
+from app.tests.utils.user import create_random_user
+
+# Replicas read through connections of their own
+pytestmark = pytest.mark.commits
+
+
+@pytest.fixture()
+def replica_engine() -> Generator[Engine, None, None]:
+    # A second engine on the test database stands in for a replica that is
+    # never behind
+    replica = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    yield replica
+    replica.dispose()
+
+
+def count_queries(target: Engine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(target, "before_cursor_execute")
+    def record(
+        conn: Any,  # noqa: ARG001
+        cursor: Any,  # noqa: ARG001
+        statement: str,
+        *args: Any,  # noqa: ARG001
+    ) -> None:
+        statements.append(statement)
+
+    return statements
+
+
+def test_parse_lsn_orders_wal_positions() -> None:
+    assert parse_lsn("0/16B3748") == 0x16B3748
+    assert parse_lsn("1/0") > parse_lsn("0/FFFFFFFF")
+
+
+def test_choose_skips_unfit_replicas(
+    replica_engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    router = ReplicaRouter([engine, replica_engine])
+    statuses = [
+        ReplicaStatus(healthy=True, replay_lsn=100, lag_seconds=0.5),
+        ReplicaStatus(healthy=True, replay_lsn=300, lag_seconds=0.1),
+    ]
+    for replica, status in zip(router.replicas, statuses, strict=True):
+        monkeypatch.setattr(replica, "status", lambda status=status: status)
+
+    router.record_write("user", 200)
+    assert router.choose("user") is replica_engine
+    assert router.choose(None) in (engine, replica_engine)
+
+    monkeypatch.setattr(settings, "REPLICA_MAX_LAG_SECONDS", 0.05)
+    assert router.choose(None) is None
+
+
+def test_write_tracking_expires(monkeypatch: pytest.MonkeyPatch) -> None:
+    router = ReplicaRouter([])
+    monkeypatch.setattr(settings, "REPLICA_WRITE_TRACKING_SECONDS", 0.0)
+    router.record_write("user", 200)
+    assert router.last_write("user") == 0
+
+
+def test_unreachable_replica_is_unhealthy(caplog: pytest.LogCaptureFixture) -> None:
+    unreachable = create_engine(
+        "postgresql+psycopg://postgres:x@127.0.0.1:1/app",
+        connect_args={"connect_timeout": 1},
+    )
+    router = ReplicaRouter([unreachable])
+    assert router.choose(None) is None
+    assert not router.replicas[0].status().healthy
+    assert "is unavailable" in caplog.text
+
+
+def test_status_is_checked_outside_the_lock(
+    replica_engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    replica = Replica(replica_engine)
+    checking, release = threading.Event(), threading.Event()
+
+    def slow_check() -> ReplicaStatus:
+        checking.set()
+        release.wait(5)
+        return ReplicaStatus(healthy=True, replay_lsn=1)
+
+    monkeypatch.setattr(replica, "_check", slow_check)
+    checker = threading.Thread(target=replica.status)
+    checker.start()
+    try:
+        assert checking.wait(5)
+        # Another request gets the last known status instead of waiting
+        assert replica.status() == ReplicaStatus(healthy=False)
+    finally:
+        release.set()
+        checker.join()
+    assert replica.status() == ReplicaStatus(healthy=True, replay_lsn=1)
+
+
+def test_routing_session_moves_to_primary_on_flush(
+    db: Session, replica_engine: Engine
+) -> None:
+    user = create_random_user(db)
+    router = ReplicaRouter([replica_engine])
+    replica_queries = count_queries(replica_engine)
+
+    with RoutingSession(engine, router) as session:
+        session.info["user_id"] = str(user.id)
+        assert session.exec(select(User).where(User.id == user.id)).one()
+        assert 'FROM "user"' in replica_queries[-1]
+        assert session.get_bind() is replica_engine
+        reads = len(replica_queries)
+
+        session.add(Item(title="Routed", owner_id=user.id))
+        session.commit()
+        assert session.get_bind() is engine
+        record_session_writes(session, router)
+
+    assert len(replica_queries) == reads
+    assert router.last_write(str(user.id)) > 0
+
+
+def test_marked_routes_read_from_replica_until_it_has_the_users_write(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    replica_engine: Engine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(deps, "replica_router", ReplicaRouter([replica_engine]))
+    # Keep the replica's position from before the write below
+    monkeypatch.setattr(settings, "REPLICA_CHECK_INTERVAL_SECONDS", 3600.0)
+    replica_queries = count_queries(replica_engine)
+    url = f"{settings.API_V1_STR}/questionnaires/assignments/me"
+
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 200
+    reads = len(replica_queries)
+    assert reads > 1
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": "Replica Reader"},
+    )
+    assert r.status_code == 200
+    assert len(replica_queries) == reads
+
+    # The replica's last known position predates the write
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert len(replica_queries) == reads
+
+    monkeypatch.setattr(settings, "REPLICA_CHECK_INTERVAL_SECONDS", 0.0)
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert len(replica_queries) > reads
+
+
+@pytest.mark.skipif(
+    not settings.REPLICA_DATABASE_URIS, reason="REPLICA_DATABASE_URIS is not set"
+)
+def test_configured_replica_catches_up_with_write(db: Session) -> None:
+    user = create_random_user(db)
+    router = ReplicaRouter(
+        [create_engine(str(uri)) for uri in settings.REPLICA_DATABASE_URIS]
+    )
+    with Session(engine) as session:
+        session.info["user_id"] = str(user.id)
+        item = Item(title="Replicated", owner_id=user.id)
+        session.add(item)
+        session.commit()
+        record_session_writes(session, router)
+        item_id = item.id
+
+    deadline = time.monotonic() + 10
+    while (replica := router.choose(str(user.id))) is None:
+        assert time.monotonic() < deadline, "replica didn't replay the write"
+        time.sleep(0.1)
+    with Session(replica) as session:
+        assert session.get(Item, item_id)
@@ -0,0 +1,192 @@
+import uuid
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlmodel import Session, select
+
+from app import crud
+from app.api.routes import orientations
+from app.core import similarity
+from app.core.config import settings
+from app.core.similarity import VectorSet, encode_traits, trait_dimensions
+from app.models import (
+    Orientation,
+    OrientationCreate,
+    OrientationTraitCreate,
+    OrientationUpdate,
+    TraitDimension,
+    User,
+)
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+# The similarity index loads vectors on its own connection
+pytestmark = pytest.mark.commits
+
+
+def create_orientation(
+    db: Session, owner_id: uuid.UUID, traits: dict[str, int]
+) -> Orientation:
+    return crud.create_orientation(
+        session=db,
+        orientation_in=OrientationCreate(
+            title=random_lower_string(),
+            traits=[
+                OrientationTraitCreate(name=name, value=value)
+                for name, value in traits.items()
+            ],
+        ),
+        owner_id=owner_id,
+    )
+
+
+def test_traits_are_encoded_by_dimension(db: Session) -> None:
+    first, second = random_lower_string(), random_lower_string()
+    orientation = create_orientation(
+        db, create_random_user(db).id, {second: 30, first: 70}
+    )
+    dimensions = trait_dimensions(db, [first, second])
+    assert db.get(TraitDimension, first)
+
+    vector = orientation.trait_vector
+    assert len(vector) == max(dimensions.values()) + 1
+    assert vector[dimensions[first]] == 70
+    assert vector[dimensions[second]] == 30
+    assert sum(vector) == 100
+
+    orientation = crud.update_orientation(
+        session=db,
+        db_orientation=orientation,
+        orientation_in=OrientationUpdate(
+            traits=[OrientationTraitCreate(name=first, value=5)]
+        ),
+    )
+    assert orientation.trait_vector == encode_traits(
+        db, [OrientationTraitCreate(name=first, value=5)]
+    )
+
+
+def test_dimensions_are_cached_once_committed(db: Session) -> None:
+    name = random_lower_string()
+    trait_dimensions(db, [name])
+    db.rollback()
+    assert name not in similarity._dimensions
+    assert not db.get(TraitDimension, name)
+
+    dimension = trait_dimensions(db, [name])[name]
+    db.commit()
+    assert similarity._dimensions[name] == dimension
+
+
+def test_unique_trait_names_dont_widen_the_index(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    taken = len(db.exec(select(TraitDimension)).all())
+    monkeypatch.setattr(settings, "ORIENTATION_MAX_DIMENSIONS", taken + 3)
+    owner_id = create_random_user(db).id
+    rows = [
+        (o.id, o.trait_vector)
+        for o in (
+            create_orientation(
+                db, owner_id, {random_lower_string(): 50 for _ in range(100)}
+            )
+            for _ in range(12)
+        )
+    ]
+    assert len(db.exec(select(TraitDimension)).all()) == taken + 3
+    assert all(len(vector) <= taken + 3 for _, vector in rows)
+
+    # Nor do vectors stored before the limit was lowered
+    rows.append((uuid.uuid4(), bytes(taken + 50)))
+    vector_set = VectorSet.build(rows, ann_min_rows=len(rows) + 1)
+    assert vector_set.matrix.shape[1] <= taken + 3
+
+    with pytest.raises(ValidationError):
+        OrientationCreate(
+            title=random_lower_string(),
+            traits=[OrientationTraitCreate(name=str(i), value=1) for i in range(101)],
+        )
+
+
+def test_vector_set_search_is_exact_then_approximate() -> None:
+    rng = np.random.default_rng(7)
+    ids = [uuid.uuid4() for _ in range(4000)]
+    # Clustered data, like orientations sharing a profile
+    centers = rng.integers(0, 101, (20, 12))
+    vectors = [
+        bytes(
+            np.clip(centers[i % 20] + rng.integers(-8, 9, 12), 0, 100).astype(np.uint8)
+        )
+        for i in range(len(ids))
+    ]
+    rows = list(zip(ids, vectors, strict=True))
+    exact = VectorSet.build(rows, ann_min_rows=len(rows) + 1)
+    approximate = VectorSet.build(rows, ann_min_rows=0)
+    assert approximate.offsets is not None
+
+    matches = exact.search(vectors[0], 10, exclude=ids[0])
+    assert len(matches) == 10
+    assert ids[0] not in [id for id, _ in matches]
+    distances = [distance for _, distance in matches]
+    assert distances == sorted(distances)
+    query = np.frombuffer(vectors[0], dtype=np.uint8).astype(float)
+    nearest = np.frombuffer(dict(rows)[matches[0][0]], dtype=np.uint8)
+    assert distances[0] == pytest.approx(np.linalg.norm(query - nearest), rel=1e-5)
+
+    recalled = 0
+    for i in range(0, len(ids), 100):
+        expected = {id for id, _ in exact.search(vectors[i], 10)}
+        found = {id for id, _ in approximate.search(vectors[i], 10, probes=4)}
+        recalled += len(expected & found)
+    assert recalled / (10 * len(range(0, len(ids), 100))) > 0.9
+
+    # Vectors from dimensions added later are cut to the known ones
+    assert exact.search(vectors[0] + b"\x64", 1)[0][0] == ids[0]
+
+
+def test_read_similar_orientations(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    name = random_lower_string()
+    user = db.exec(select(User).where(User.email == settings.EMAIL_TEST_USER)).one()
+    query = create_orientation(db, user.id, {name: 50})
+    near = create_orientation(db, user.id, {name: 55})
+    far = create_orientation(db, user.id, {name: 90})
+    other = create_orientation(db, create_random_user(db).id, {name: 51})
+    orientations.similarity_index.refresh()
+
+    r = client.get(
+        f"{settings.API_V1_STR}/orientations/{query.id}/similar",
+        headers=superuser_token_headers,
+        params={"k": 100},
+    )
+    assert r.status_code == 200
+    ids = [match["orientation"]["id"] for match in r.json()["data"]]
+    assert ids.index(str(other.id)) < ids.index(str(near.id)) < ids.index(str(far.id))
+    assert str(query.id) not in ids
+
+    # Users only compare against their own orientations
+    r = client.get(
+        f"{settings.API_V1_STR}/orientations/{query.id}/similar",
+        headers=normal_user_token_headers,
+        params={"k": 1},
+    )
+    assert r.status_code == 200
+    (match,) = r.json()["data"]
+    assert match["orientation"]["id"] == str(near.id)
+    assert match["distance"] == 5.0
+
+    # Deleted orientations drop out before the index is rebuilt
+    db.delete(other)
+    db.commit()
+    r = client.get(
+        f"{settings.API_V1_STR}/orientations/{query.id}/similar",
+        headers=superuser_token_headers,
+        params={"k": 100},
+    )
+    assert str(other.id) not in [m["orientation"]["id"] for m in r.json()["data"]]
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+
+from app.core import warmup
+from app.core.compression import PrecompressedDocument
+from app.core.config import settings
+from app.main import app, openapi_document
+
+
+def _unrendered() -> bytes:
+    raise AssertionError("The document was rendered")
+
+
+def test_openapi_is_loaded_from_built_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "openapi.json"
+    openapi_document.save(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "openapi.json",
+        "openapi.json.br",
+        "openapi.json.gz",
+        "openapi.json.zst",
+    ]
+    monkeypatch.setattr(settings, "OPENAPI_SCHEMA_FILE", str(path))
+
+    document = PrecompressedDocument(_unrendered, media_type="application/json")
+    warmup.load_openapi(app, document)
+    assert document.body(None) == path.read_bytes()
+    assert document.body("br") == (tmp_path / "openapi.json.br").read_bytes()
+
+    # A document built for another app is rendered again
+    other = FastAPI(title="Other")
+    rendered = PrecompressedDocument(
+        lambda: orjson.dumps(other.openapi()), media_type="application/json"
+    )
+    warmup.load_openapi(other, rendered)
+    assert orjson.loads(rendered.body(None))["info"]["title"] == "Other"
+
+    monkeypatch.setattr(settings, "OPENAPI_SCHEMA_FILE", str(tmp_path / "missing"))
+    warmup.load_openapi(other, rendered)
+    assert orjson.loads(rendered.body(None))["info"]["title"] == "Other"
+
+
+def test_fill_pool_leaves_connections_in_pool() -> None:
+    db_engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), pool_size=2)
+    try:
+        warmup.fill_pool(db_engine, 5)
+        # Capped at the pool size, more would be closed again
+        assert db_engine.pool.checkedin() == 2  # type: ignore[attr-defined]
+    finally:
+        db_engine.dispose()
@@ -0,0 +1,129 @@
+"""
+Pytest plugin giving each test process a database of its own, so the suite
+can run in parallel with pytest-xdist (``pytest -n auto``).
+
+Migrating a database takes seconds while cloning one is a file copy. A
+template, ``<POSTGRES_DB>_test_template``, is migrated with Alembic and given
+the initial data once. Each process then creates ``<POSTGRES_DB>_test_<worker>``
+from it with ``CREATE DATABASE ... TEMPLATE`` and drops it when done.
+
+The template is rebuilt when its fingerprint, kept as the database's comment,
+no longer matches: the migrations' heads and the settings the initial data
+is created from. Listed first in ``addopts``, as the other plugins import the
+engine, which has to be created for the worker's database.
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Connection, make_url
+
+from app.core import readiness
+from app.core.config import settings
+
+BACKEND = Path(__file__).parents[2]
+# Any constant key, held while the template is checked, built and cloned
+LOCK = 4_808_201
+
+TEMPLATE = f"{settings.POSTGRES_DB}_test_template"
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+DATABASE = f"{settings.POSTGRES_DB}_test_{WORKER}"
+
+# Before anything creates an engine, and for subprocesses the tests start
+settings.POSTGRES_DB = DATABASE
+os.environ["POSTGRES_DB"] = DATABASE
+
+
+def _url(database: str) -> URL:
+    return make_url(str(settings.SQLALCHEMY_DATABASE_URI)).set(database=database)
+
+
+def _runs_tests(config: pytest.Config) -> bool:
+    # The xdist controller only hands out tests, its workers run them
+    return hasattr(config, "workerinput") or config.getoption("dist", "no") == "no"
+
+
+def fingerprint() -> str:
+    """What the template is built from: migrations and initial data"""
+    parts = [
+        *sorted(readiness.migration_heads()),
+        settings.FIRST_SUPERUSER,
+        settings.FIRST_SUPERUSER_PASSWORD,
+    ]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _template_fingerprint(connection: Connection) -> str | None:
+    return connection.execute(
+        text(
+            "SELECT shobj_description(oid, 'pg_database') FROM pg_database "
+            "WHERE datname = :name"
+        ),
+        {"name": TEMPLATE},
+    ).scalar()
+
+
+def _drop(connection: Connection, database: str) -> None:
+    # DROP DATABASE ... WITH (FORCE) needs Postgres 13
+    connection.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = :name"
+        ),
+        {"name": database},
+    )
+    connection.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+
+
+def _build_template(connection: Connection, template_fingerprint: str) -> None:
+    _drop(connection, TEMPLATE)
+    connection.execute(text(f'CREATE DATABASE "{TEMPLATE}"'))
+    env = {**os.environ, "POSTGRES_DB": TEMPLATE}
+    for args in (["alembic", "upgrade", "head"], ["app.initial_data"]):
+        subprocess.run(
+            [sys.executable, "-m", *args],
+            cwd=BACKEND,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+    # Last, so a template whose build failed is built again
+    connection.execute(
+        text(f"COMMENT ON DATABASE \"{TEMPLATE}\" IS '{template_fingerprint}'")
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if not _runs_tests(config):
+        return
+    admin = create_engine(_url("postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK})
+        try:
+            expected = fingerprint()
+            if _template_fingerprint(connection) != expected:
+                _build_template(connection, expected)
+            _drop(connection, DATABASE)
+            connection.execute(
+                text(f'CREATE DATABASE "{DATABASE}" TEMPLATE "{TEMPLATE}"')
+            )
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK})
+    admin.dispose()
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    if not _runs_tests(config):
+        return
+    from app.core.db import engine
+
+    engine.dispose()
+    admin = create_engine(_url("postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        _drop(connection, DATABASE)
+    admin.dispose()
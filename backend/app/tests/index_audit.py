@@ -0,0 +1,55 @@
+"""
+Pytest plugin that audits the SQL the test suite runs for missing indexes.
+
+    pytest --index-audit
+"""
+
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from app.core.db import engine
+from app.index_audit import audit_foreign_keys, audit_statements, metadata_catalog
+
+_statements: set[str] = set()
+
+
+def _collect(
+    conn: Any,  # noqa: ARG001
+    cursor: Any,  # noqa: ARG001
+    statement: str,
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    _statements.add(statement)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--index-audit",
+        action="store_true",
+        help="report foreign keys and WHERE filters that no index covers",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("--index-audit"):
+        event.listen(engine, "before_cursor_execute", _collect)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    if not config.getoption("--index-audit"):
+        return
+    catalog = metadata_catalog(SQLModel.metadata)
+    findings = audit_foreign_keys(SQLModel.metadata, catalog) + audit_statements(
+        _statements, SQLModel.metadata, catalog
+    )
+    terminalreporter.section("index audit")
+    terminalreporter.line(
+        f"{len(_statements)} distinct statements, {len(findings)} missing index(es)"
+    )
+    for finding in findings:
+        terminalreporter.line(str(finding))
@@ -0,0 +1,33 @@
+"""
+Pytest plugin that fails a test when one of its requests runs more SQL
+statements than the route's declared ``query_budget``.
+"""
+
+from collections.abc import Generator
+
+import pytest
+
+from app.core import querylog
+from app.core.db import engine
+from app.main import app
+
+
+def pytest_configure() -> None:
+    querylog.instrument_engine(engine)
+    if not any(
+        middleware.cls is querylog.QueryRecorderMiddleware
+        for middleware in app.user_middleware
+    ):
+        app.add_middleware(querylog.QueryRecorderMiddleware)
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets() -> Generator[None, None, None]:
+    querylog.budget_violations.clear()
+    yield
+    violations = list(querylog.budget_violations)
+    if violations:
+        pytest.fail(
+            "Query budget exceeded:\n" + "\n".join(str(v) for v in violations),
+            pytrace=False,
+        )
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.archive import archive_responses
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    Answer,
+    AnswerArchive,
+    QuestionnaireResponse,
+    QuestionnaireResponseArchive,
+)
+from app.tests.utils.questionnaire import (
+    create_random_assignment,
+    create_random_questionnaire_template,
+    create_random_response,
+)
+
+# The archive moves rows on connections of its own
+pytestmark = pytest.mark.commits
+
+
+def test_archive_moves_old_responses(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    template = create_random_questionnaire_template(db, num_questions=2)
+    responses = []
+    for completed_at in (datetime(1999, 3, 15), datetime(2099, 1, 1)):
+        assignment = create_random_assignment(db, questionnaire_id=template.id)
+        response = create_random_response(db, assignment=assignment)
+        response.completed_at = completed_at
+        response.manual_score_override = 10
+        db.add(response)
+        db.commit()
+        responses.append(response.id)
+    old_id, recent_id = responses
+
+    archived = archive_responses(engine, datetime(1999, 4, 1), batch_size=1)
+
+    assert archived == 1
+    db.expire_all()
+    assert db.get(QuestionnaireResponse, old_id) is None
+    assert not db.exec(select(Answer).where(Answer.response_id == old_id)).all()
+    assert db.get(QuestionnaireResponse, recent_id)
+    archived_response = db.exec(
+        select(QuestionnaireResponseArchive).where(
+            QuestionnaireResponseArchive.id == old_id
+        )
+    ).one()
+    assert archived_response.completed_at == datetime(1999, 3, 15)
+    assert archived_response.total_score == 6
+    assert (
+        len(
+            db.exec(
+                select(AnswerArchive).where(AnswerArchive.response_id == old_id)
+            ).all()
+        )
+        == 2
+    )
+
+    # Archived responses stay readable and counted
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/responses/{old_id}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["total_score"] == 6
+    assert len(r.json()["answers"]) == 2
+
+    r = client.get(
+        f"{settings.API_V1_STR}/questionnaires/templates/{template.id}/scores",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == {
+        "count": 2,
+        "archived": 1,
+        "average": 10.0,
+        "minimum": 10,
+        "maximum": 10,
+    }
+
+
+def test_archive_without_old_responses() -> None:
+    assert archive_responses(engine, datetime(1970, 1, 1), batch_size=10) == 0
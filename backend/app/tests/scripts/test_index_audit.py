@@ -0,0 +1,66 @@
+import sqlalchemy as sa
+from sqlmodel import SQLModel
+
+from app.core.db import engine
+from app.index_audit import (
+    Finding,
+    audit_foreign_keys,
+    audit_statements,
+    database_catalog,
+    filtered_columns,
+    metadata_catalog,
+)
+
+
+def test_models_index_every_foreign_key() -> None:
+    catalog = metadata_catalog(SQLModel.metadata)
+    assert audit_foreign_keys(SQLModel.metadata, catalog) == []
+
+
+def test_migrations_index_every_foreign_key() -> None:
+    catalog = database_catalog(engine)
+    assert audit_foreign_keys(SQLModel.metadata, catalog) == []
+
+
+def test_unindexed_foreign_key_is_reported() -> None:
+    metadata = sa.MetaData()
+    sa.Table("parent", metadata, sa.Column("id", sa.Integer, primary_key=True))
+    sa.Table(
+        "child",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("parent_id", sa.ForeignKey("parent.id", ondelete="CASCADE")),
+    )
+
+    findings = audit_foreign_keys(metadata, metadata_catalog(metadata))
+
+    assert findings == [
+        Finding("child", ("parent_id",), "foreign key to parent (ON DELETE CASCADE)")
+    ]
+
+
+def test_filtered_columns_are_read_from_where_clauses() -> None:
+    statement = (
+        'SELECT item.id FROM item JOIN "user" ON "user".id = item.owner_id '
+        'WHERE "user".email = %(email_1)s AND item.owner_id IN (%(id_1)s) '
+        "ORDER BY item.title LIMIT %(param_1)s"
+    )
+    assert filtered_columns(statement) == {"user": {"email"}, "item": {"owner_id"}}
+
+
+def test_filter_without_usable_index_is_reported() -> None:
+    catalog = metadata_catalog(SQLModel.metadata)
+    statements = [
+        "SELECT count(*) FROM questionnaireassignment"
+        " WHERE questionnaireassignment.status = %(status_1)s",
+        # Served by the user_id index, the status check runs on its rows
+        "SELECT count(*) FROM questionnaireassignment"
+        " WHERE questionnaireassignment.user_id = %(user_id_1)s::UUID"
+        " AND questionnaireassignment.status = %(status_1)s",
+    ]
+
+    findings = audit_statements(statements, SQLModel.metadata, catalog)
+
+    assert [(f.table, f.columns) for f in findings] == [
+        ("questionnaireassignment", ("status",))
+    ]
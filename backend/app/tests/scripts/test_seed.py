@@ -0,0 +1,106 @@
+import random
+from datetime import datetime
+
+from sqlmodel import Session, col, delete, func, select
+
+from app.core.db import engine
+from app.models import (
+    Answer,
+    Orientation,
+    QuestionnaireAssignment,
+    QuestionnaireResponse,
+    QuestionnaireTemplate,
+    User,
+)
+from app.seed import SeedConfig, SeedGenerator, entity_uuid, seed
+
+
+def test_seed_generator_is_deterministic() -> None:
+    config = SeedConfig(users=5, seed=3)
+    superuser_id = entity_uuid(0, "superuser")
+    first = SeedGenerator(config, superuser_id)
+    second = SeedGenerator(config, superuser_id)
+
+    assert list(first.assignments()) == list(second.assignments())
+    assert list(first.answers()) == list(second.answers())
+
+
+def test_seed_generator_scores_match_answers() -> None:
+    generator = SeedGenerator(SeedConfig(users=5, seed=3), entity_uuid(0, "super"))
+
+    totals: dict[object, int] = {}
+    completed: dict[object, datetime] = {}
+    for _, response_id, completed_at, _, value, _ in generator.answers():
+        totals[response_id] = totals.get(response_id, 0) + value
+        completed[response_id] = completed_at
+    responses = list(generator.responses())
+    assert {row[0]: row[4] for row in responses} == totals
+    # Answers are partitioned by the completion time of their response
+    assert {row[0]: row[3] for row in responses} == completed
+
+
+def test_seed_generator_completes_responses_before_the_due_date() -> None:
+    generator = SeedGenerator(SeedConfig(users=5, seed=3), entity_uuid(0, "super"))
+
+    assignments = {row[0]: (row[4], row[5]) for row in generator.assignments()}
+    responses = list(generator.responses())
+    assert responses
+    for _, assignment_id, _, completed_at, _, _ in responses:
+        assigned_at, due_date = assignments[assignment_id]
+        assert assigned_at < completed_at <= due_date
+
+
+def test_seed_loads_configured_cardinalities(db: Session) -> None:
+    config = SeedConfig(
+        users=4,
+        templates=2,
+        questions=3,
+        assignments_per_user=2,
+        completed_ratio=1.0,
+        seed=random.randrange(1_000_000, 2**31),
+    )
+    user_ids = [entity_uuid(config.seed, "user", u) for u in range(config.users)]
+    template_ids = [
+        entity_uuid(config.seed, "template", t) for t in range(config.templates)
+    ]
+    # Seeding briefly takes exclusive locks, release the ones this session holds
+    db.commit()
+    try:
+        counts = seed(engine, config)
+
+        assert counts["user"] == 4
+        assert counts["questionnaireassignment"] == 8
+        assert counts["answer"] == 24
+        user = db.get(User, user_ids[0])
+        assert user
+        assert user.email == f"seed{config.seed}-user0@example.com"
+        assert (
+            db.exec(
+                select(func.count())
+                .select_from(Orientation)
+                .where(col(Orientation.owner_id).in_(user_ids))
+            ).one()
+            == config.users
+        )
+        assert (
+            db.exec(
+                select(func.count())
+                .select_from(Answer)
+                .join(QuestionnaireResponse)
+                .where(col(QuestionnaireResponse.user_id).in_(user_ids))
+            ).one()
+            == 24
+        )
+    finally:
+        db.execute(
+            delete(QuestionnaireAssignment).where(
+                col(QuestionnaireAssignment.user_id).in_(user_ids)
+            )
+        )
+        db.execute(
+            delete(QuestionnaireTemplate).where(
+                col(QuestionnaireTemplate.id).in_(template_ids)
+            )
+        )
+        db.execute(delete(User).where(col(User.id).in_(user_ids)))
+        db.commit()
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.db import engine
+from app.server import Sizing, available_cpus, cgroup_cpus, size
+
+
+def test_cgroup_cpu_quota(tmp_path: Path) -> None:
+    assert cgroup_cpus(tmp_path) is None
+
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpus(tmp_path) == 1.5
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpus(tmp_path) is None
+
+    v1 = tmp_path / "v1" / "cpu,cpuacct"
+    v1.mkdir(parents=True)
+    (v1 / "cpu.cfs_period_us").write_text("100000\n")
+    (v1 / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpus(v1.parent) is None
+    (v1 / "cpu.cfs_quota_us").write_text("50000\n")
+    assert cgroup_cpus(v1.parent) == 0.5
+    assert available_cpus(v1.parent) == 0.5
+
+
+def test_workers_fit_in_connection_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "WORKERS_PER_CPU", 2.0)
+    monkeypatch.setattr(settings, "POSTGRES_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "POSTGRES_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "POSTGRES_MAX_CONNECTIONS", 80)
+
+    assert size(0.25) == Sizing(0.25, 1, 5, 10)
+    assert size(2) == Sizing(2, 4, 5, 10)
+    # Overflow is given up first, then the pool
+    assert size(4) == Sizing(4, 8, 5, 4)
+    assert size(16) == Sizing(16, 32, 1, 0)
+    # and workers when even that doesn't fit
+    assert size(64).workers == 40
+    for cpus in (1, 3, 4, 6, 16, 64):
+        assert size(cpus).connections <= 80
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    assert size(64).workers == 3
+
+
+def test_engine_uses_pool_settings() -> None:
+    assert engine.pool.size() == settings.POSTGRES_POOL_SIZE  # type: ignore[attr-defined]
@@ -0,0 +1,111 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import (
+    AnswerCreate,
+    Appointment,
+    AppointmentCreate,
+    QuestionCreate,
+    QuestionnaireAssignment,
+    QuestionnaireAssignmentCreate,
+    QuestionnaireResponse,
+    QuestionnaireResponseCreate,
+    QuestionnaireTemplate,
+    QuestionnaireTemplateCreate,
+)
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_questionnaire_template(
+    db: Session,
+    *,
+    num_questions: int = 3,
+    tags: list[str] | None = None,
+    is_active: bool = True,
+) -> QuestionnaireTemplate:
+    creator = create_random_user(db)
+    template_in = QuestionnaireTemplateCreate(
+        title=random_lower_string(),
+        description=random_lower_string(),
+        tags=tags or [],
+        is_active=is_active,
+        questions=[
+            QuestionCreate(question_text=random_lower_string(), order=i)
+            for i in range(num_questions)
+        ],
+    )
+    return crud.create_questionnaire_template(
+        session=db, questionnaire_in=template_in, created_by_id=creator.id
+    )
+
+
+def create_random_assignment(
+    db: Session,
+    *,
+    user_id: uuid.UUID | None = None,
+    questionnaire_id: uuid.UUID | None = None,
+) -> QuestionnaireAssignment:
+    if user_id is None:
+        user_id = create_random_user(db).id
+    if questionnaire_id is None:
+        questionnaire_id = create_random_questionnaire_template(db).id
+    assignment_in = QuestionnaireAssignmentCreate(
+        questionnaire_id=questionnaire_id, user_id=user_id
+    )
+    return crud.create_questionnaire_assignment(session=db, assignment_in=assignment_in)
+
+
+def create_random_response(
+    db: Session, *, assignment: QuestionnaireAssignment
+) -> QuestionnaireResponse:
+    template = db.get(QuestionnaireTemplate, assignment.questionnaire_id)
+    assert template
+    response_in = QuestionnaireResponseCreate(
+        assignment_id=assignment.id,
+        answers=[
+            AnswerCreate(question_id=question.id, likert_value=3)
+            for question in template.questions
+        ],
+    )
+    return crud.create_questionnaire_response(
+        session=db, response_in=response_in, user_id=assignment.user_id
+    )
+
+
+def response_payload(
+    template: QuestionnaireTemplate,
+    assignment: QuestionnaireAssignment,
+    *,
+    likert_value: int = 3,
+) -> dict[str, Any]:
+    """The JSON body submitting an answer to every question of ``template``"""
+    return {
+        "assignment_id": str(assignment.id),
+        "answers": [
+            {"question_id": str(question.id), "likert_value": likert_value}
+            for question in template.questions
+        ],
+    }
+
+
+def create_random_appointment(
+    db: Session,
+    *,
+    user_id: uuid.UUID | None = None,
+    appointment_datetime: datetime | None = None,
+    title: str | None = None,
+) -> Appointment:
+    if user_id is None:
+        user_id = create_random_user(db).id
+    appointment_in = AppointmentCreate(
+        user_id=user_id,
+        appointment_datetime=appointment_datetime or datetime(2031, 5, 4, 9, 30),
+        title=title or random_lower_string(),
+        description=random_lower_string(),
+    )
+    return crud.create_appointment(session=db, appointment_in=appointment_in)
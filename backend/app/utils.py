@@ -4,9 +4,7 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
 
 from app.core import security
@@ -23,6 +21,9 @@ class EmailData:
 
 
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
+    # Imported on first use, most workers never send an email
+    from jinja2 import Template
+
     template_str = (
         Path(__file__).parent / "email-templates" / "build" / template_name
     ).read_text()
@@ -37,6 +38,8 @@ def send_email(
     html_content: str = "",
 ) -> None:
     assert settings.emails_enabled, "no provided configuration for email variables"
+    import emails  # type: ignore
+
     message = emails.Message(
         subject=subject,
         html=html_content,
@@ -0,0 +1,26 @@
+from collections.abc import Generator
+
+import pytest
+from sqlmodel import Session
+
+from app.core.db import engine, init_db
+from app.models import QuestionnaireTemplate, User
+from app.tests.utils.questionnaire import create_random_questionnaire_template
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture(scope="session")
+def db() -> Generator[Session, None, None]:
+    with Session(engine) as session:
+        init_db(session)
+        yield session
+
+
+@pytest.fixture(scope="session")
+def template(db: Session) -> QuestionnaireTemplate:
+    return create_random_questionnaire_template(db, num_questions=20)
+
+
+@pytest.fixture(scope="session")
+def user(db: Session) -> User:
+    return create_random_user(db)
@@ -0,0 +1,165 @@
+"""
+Memory and time needed to delete a questionnaire template with its data.
+
+    python -m benchmarks.delete --users 25000 --output delete.json
+
+Loads a fresh batch with ``app.seed`` (one template per strategy, so each
+template carries about ``users * assignments-per-user / 3`` assignments) and
+deletes one template with each strategy:
+
+* ``orm_loaded``: children loaded into the session before ``session.delete``,
+  which is what cascading relationships without ``passive_deletes`` did
+* ``orm``: ``session.delete`` leaving the cascade to the foreign keys
+* ``bulk``: the batched deletion run by bulk-delete jobs
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select
+
+from app.core.bulk_delete import bulk_delete
+from app.core.db import engine
+from app.models import (
+    Answer,
+    Question,
+    QuestionnaireAssignment,
+    QuestionnaireResponse,
+    QuestionnaireTemplate,
+)
+from app.seed import SeedConfig, entity_uuid, seed
+from benchmarks.report import git_revision, write_report
+
+
+def delete_orm_loaded(session: Session, template_id: uuid.UUID) -> None:
+    template = session.exec(
+        select(QuestionnaireTemplate)
+        .where(QuestionnaireTemplate.id == template_id)
+        .options(
+            selectinload(QuestionnaireTemplate.questions).selectinload(  # type: ignore[arg-type]
+                Question.answers  # type: ignore[arg-type]
+            ),
+            selectinload(QuestionnaireTemplate.assignments)  # type: ignore[arg-type]
+            .selectinload(QuestionnaireAssignment.response)  # type: ignore[arg-type]
+            .selectinload(QuestionnaireResponse.answers),  # type: ignore[arg-type]
+        )
+    ).one()
+    session.delete(template)
+    session.commit()
+
+
+def delete_orm(session: Session, template_id: uuid.UUID) -> None:
+    session.delete(session.get(QuestionnaireTemplate, template_id))
+    session.commit()
+
+
+def delete_bulk(session: Session, template_id: uuid.UUID) -> None:
+    bulk_delete(
+        session,
+        QuestionnaireTemplate.__table__,  # type: ignore[attr-defined]
+        template_id,
+        batch_size=5000,
+    )
+
+
+STRATEGIES: dict[str, Callable[[Session, uuid.UUID], None]] = {
+    "orm_loaded": delete_orm_loaded,
+    "orm": delete_orm,
+    "bulk": delete_bulk,
+}
+
+
+def count_rows(session: Session, template_id: uuid.UUID) -> int:
+    assignments = session.exec(
+        select(func.count())
+        .select_from(QuestionnaireAssignment)
+        .where(QuestionnaireAssignment.questionnaire_id == template_id)
+    ).one()
+    responses = session.exec(
+        select(func.count())
+        .select_from(QuestionnaireResponse)
+        .join(QuestionnaireAssignment)
+        .where(QuestionnaireAssignment.questionnaire_id == template_id)
+    ).one()
+    answers = session.exec(
+        select(func.count())
+        .select_from(Answer)
+        .join(Question)
+        .where(Question.questionnaire_id == template_id)
+    ).one()
+    questions = session.exec(
+        select(func.count())
+        .select_from(Question)
+        .where(Question.questionnaire_id == template_id)
+    ).one()
+    return 1 + questions + assignments + responses + answers
+
+
+def measure(config: SeedConfig) -> dict[str, Any]:
+    seed(engine, config)
+    results: dict[str, Any] = {}
+    for t, (name, strategy) in enumerate(STRATEGIES.items()):
+        template_id = entity_uuid(config.seed, "template", t)
+        with Session(engine) as session:
+            rows = count_rows(session, template_id)
+        with Session(engine) as session:
+            tracemalloc.start()
+            start = time.perf_counter()
+            strategy(session, template_id)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results[name] = {
+            "rows": rows,
+            "duration_s": round(elapsed, 3),
+            "peak_memory_mb": round(peak / 2**20, 2),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--assignments-per-user", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=random.randrange(1000, 2**31))
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    config = SeedConfig(
+        users=args.users,
+        orientations_per_user=0,
+        templates=len(STRATEGIES),
+        questions=args.questions,
+        assignments_per_user=args.assignments_per_user,
+        seed=args.seed,
+    )
+    results = measure(config)
+    print(f"{'strategy':<12}{'rows':>10}{'duration s':>12}{'peak MB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<12}{result['rows']:>10}{result['duration_s']:>12}"
+            f"{result['peak_memory_mb']:>10}"
+        )
+    if args.output:
+        write_report(
+            {
+                "revision": git_revision(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "config": vars(config),
+                "strategies": results,
+            },
+            args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()
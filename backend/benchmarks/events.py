@@ -0,0 +1,227 @@
+"""
+Fan-out latency of the event stream with many idle subscribers.
+
+    python -m benchmarks.events --subscribers 10000 --users 1000 --output events.json
+
+Logs in users seeded by ``python -m benchmarks.seed`` and opens
+``--subscribers`` streams on ``/questionnaires/events/me``, spread over them.
+Once every stream is connected, each round commits one notification per user
+straight to the database and times how long every stream takes to receive
+it. The report has the time each stream took to open and the per-stream
+delivery latency of the rounds.
+
+Streams are plain sockets rather than httpx requests, whose connection pool
+gets slower with every open connection and would be the bottleneck. Each one
+is a file descriptor: raise the open file limit first (e.g.
+``ulimit -n 65536``), for the backend too.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from sqlmodel import Session
+
+from app.core import events
+from app.core.db import engine
+from benchmarks.report import build_report, write_report
+from benchmarks.seed import BENCHMARK_PASSWORD, benchmark_email
+
+API_PREFIX = "/api/v1"
+
+
+class Subscriber:
+    def __init__(self, user_id: str, token: str) -> None:
+        self.user_id = user_id
+        self.token = token
+        self.connected = asyncio.Event()
+        self.open_seconds: float | None = None
+        # Event id -> when it arrived
+        self.received: dict[str, float] = {}
+
+    async def run(
+        self, base_url: str, opening: asyncio.Semaphore, arrivals: "Arrivals"
+    ) -> None:
+        """Open the stream and read it until cancelled"""
+        url = urlsplit(base_url)
+        # Streams authenticate with the database while opening; opening them
+        # all at once would just time out waiting for the connection pool
+        async with opening:
+            start = time.perf_counter()
+            reader, writer = await asyncio.open_connection(url.hostname, url.port)
+            writer.write(
+                f"GET {API_PREFIX}/questionnaires/events/me HTTP/1.1\r\n"
+                f"Host: {url.netloc}\r\n"
+                f"Authorization: Bearer {self.token}\r\n"
+                "Accept: text/event-stream\r\n\r\n".encode()
+            )
+            status = await reader.readline()
+            if b" 200 " not in status:
+                writer.close()
+                raise RuntimeError(status.decode().strip())
+            # The body is chunked; chunk sizes are lines of their own and are
+            # skipped along with the other lines that aren't events
+            while (line := await reader.readline()) != b": connected\n":
+                if not line:
+                    raise RuntimeError("Stream closed before connecting")
+            self.open_seconds = time.perf_counter() - start
+            self.connected.set()
+
+        try:
+            while line := await reader.readline():
+                if line.startswith(b"data: "):
+                    event_id = json.loads(line.removeprefix(b"data: "))["id"]
+                    self.received[event_id] = time.perf_counter()
+                    arrivals.add()
+        finally:
+            writer.close()
+
+
+class Arrivals:
+    """Counts the streams that got the event of the current round"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.expected = 0
+        self.all_arrived = asyncio.Event()
+
+    def expect(self, count: int) -> None:
+        self.count = 0
+        self.expected = count
+        self.all_arrived.clear()
+
+    def add(self) -> None:
+        self.count += 1
+        if self.count == self.expected:
+            self.all_arrived.set()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> Subscriber:
+    r = await client.post(
+        f"{API_PREFIX}/login/access-token",
+        data={"username": email, "password": password},
+    )
+    r.raise_for_status()
+    token = r.json()["access_token"]
+    r = await client.get(
+        f"{API_PREFIX}/users/me", headers={"Authorization": f"Bearer {token}"}
+    )
+    r.raise_for_status()
+    return Subscriber(r.json()["id"], token)
+
+
+def publish(user_ids: list[str], event_id: uuid.UUID) -> float:
+    with Session(engine) as session:
+        events.notify_many(
+            session,
+            [(uuid.UUID(user_id), "benchmark", event_id) for user_id in user_ids],
+        )
+        session.commit()
+    return time.perf_counter()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout
+    ) as client:
+
+        async def limited_login(index: int) -> Subscriber:
+            async with semaphore:
+                return await login(
+                    client, benchmark_email(args.prefix, index), BENCHMARK_PASSWORD
+                )
+
+        users = await asyncio.gather(*(limited_login(i) for i in range(args.users)))
+
+    subscribers = [
+        Subscriber(users[i % len(users)].user_id, users[i % len(users)].token)
+        for i in range(args.subscribers)
+    ]
+    arrivals = Arrivals()
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(subscriber.run(args.base_url, semaphore, arrivals))
+        for subscriber in subscribers
+    ]
+
+    async def connected(subscriber: Subscriber, task: asyncio.Task[None]) -> None:
+        waiter = asyncio.create_task(subscriber.connected.wait())
+        await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if subscriber.open_seconds is None:
+            errors["open"] += 1
+        else:
+            samples["open"].append(subscriber.open_seconds)
+
+    await asyncio.gather(
+        *(connected(s, t) for s, t in zip(subscribers, tasks, strict=True))
+    )
+    live = [s for s in subscribers if s.connected.is_set()]
+    print(
+        f"{len(live)} of {args.subscribers} streams connected"
+        f" in {time.perf_counter() - start:.1f}s"
+    )
+
+    user_ids = sorted({user.user_id for user in users})
+    for _ in range(args.rounds):
+        await asyncio.sleep(args.pause)
+        event_id = uuid.uuid4()
+        arrivals.expect(len(live))
+        sent = await asyncio.to_thread(publish, user_ids, event_id)
+        try:
+            await asyncio.wait_for(arrivals.all_arrived.wait(), args.timeout)
+        except TimeoutError:
+            pass
+        for subscriber in live:
+            arrived = subscriber.received.get(str(event_id))
+            if arrived is None:
+                errors["deliver"] += 1
+            else:
+                samples["deliver"].append(max(0.0, arrived - sent))
+
+    elapsed = time.perf_counter() - start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    return build_report(samples, dict(errors), elapsed, config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--prefix", default="bench")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pause", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, default=Path("events-report.json"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report(report, args.output)
+    for step, summary in report["steps"].items():
+        print(
+            f"{step}: {summary['count']} ok, {summary['errors']} errors, "
+            f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, "
+            f"p99 {summary['p99_ms']} ms"
+        )
+    print(f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+EXPLAIN ANALYZE the statements behind the "mine" routes and cascade deletes.
+
+    python -m benchmarks.explain --output before.json
+    alembic upgrade head
+    python -m benchmarks.explain --output after.json
+    python -m benchmarks.explain --compare before.json after.json
+
+Run it against a database loaded with ``python -m app.seed`` so the planner
+sees production-like volumes. Everything runs in a transaction that is rolled
+back, including the DELETE used to time the foreign-key cascades.
+"""
+
+import argparse
+import json
+import statistics
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, Executable, delete, func
+from sqlmodel import col, select
+
+from app.core import onboarding
+from app.core.db import engine
+from app.models import (
+    Answer,
+    Appointment,
+    Item,
+    Orientation,
+    OrientationTrait,
+    Question,
+    QuestionnaireAssignment,
+    QuestionnaireResponse,
+    User,
+)
+from benchmarks.report import git_revision, write_report
+
+
+def pick_user(connection: Connection) -> uuid.UUID:
+    """A participant with responses, orientations and assignments."""
+    user_id = connection.execute(
+        select(QuestionnaireResponse.user_id)
+        .join(Orientation, col(Orientation.owner_id) == QuestionnaireResponse.user_id)
+        .limit(1)
+    ).scalar()
+    if user_id is None:
+        raise SystemExit("No seeded participants found, run python -m app.seed first")
+    return user_id
+
+
+def statements(
+    connection: Connection, user_id: uuid.UUID
+) -> Iterator[tuple[str, Executable]]:
+    """Statements issued by the routes (including their selectin loads)."""
+    template_ids = (
+        connection.execute(
+            select(QuestionnaireAssignment.questionnaire_id)
+            .where(QuestionnaireAssignment.user_id == user_id)
+            .distinct()
+        )
+        .scalars()
+        .all()
+    )
+    response_ids = (
+        connection.execute(
+            select(QuestionnaireResponse.id).where(
+                QuestionnaireResponse.user_id == user_id
+            )
+        )
+        .scalars()
+        .all()
+    )
+    orientation_ids = (
+        connection.execute(
+            select(Orientation.id).where(Orientation.owner_id == user_id)
+        )
+        .scalars()
+        .all()
+    )
+
+    yield (
+        "assignments_me_count",
+        select(func.count())
+        .select_from(QuestionnaireAssignment)
+        .where(QuestionnaireAssignment.user_id == user_id),
+    )
+    yield (
+        "assignments_me_page",
+        select(QuestionnaireAssignment)
+        .where(QuestionnaireAssignment.user_id == user_id)
+        .limit(100),
+    )
+    yield (
+        "assignment_questions",
+        select(Question).where(col(Question.questionnaire_id).in_(template_ids)),
+    )
+    yield (
+        "assignments_by_template_count",
+        select(func.count())
+        .select_from(QuestionnaireAssignment)
+        .where(QuestionnaireAssignment.questionnaire_id == template_ids[0]),
+    )
+    yield (
+        "responses_me_count",
+        select(func.count())
+        .select_from(QuestionnaireResponse)
+        .where(QuestionnaireResponse.user_id == user_id),
+    )
+    yield (
+        "responses_me_page",
+        select(QuestionnaireResponse)
+        .where(QuestionnaireResponse.user_id == user_id)
+        .limit(100),
+    )
+    yield (
+        "response_answers",
+        select(Answer).where(col(Answer.response_id).in_(response_ids)),
+    )
+    yield (
+        "response_scores",
+        select(Answer.response_id, func.sum(Answer.likert_value))
+        .where(col(Answer.response_id).in_(response_ids))
+        .group_by(col(Answer.response_id)),
+    )
+    yield (
+        "orientations_me",
+        select(Orientation).where(Orientation.owner_id == user_id).limit(100),
+    )
+    yield (
+        "orientation_traits",
+        select(OrientationTrait).where(
+            col(OrientationTrait.orientation_id).in_(orientation_ids)
+        ),
+    )
+    yield "items_me", select(Item).where(Item.owner_id == user_id).limit(100)
+    yield (
+        "appointments_me",
+        select(Appointment).where(Appointment.user_id == user_id).limit(100),
+    )
+    yield (
+        "signup_template",
+        onboarding.policy(),
+    )
+    yield "delete_user_cascade", delete(User).where(col(User.id) == user_id)
+
+
+def _scans(plan: dict[str, Any]) -> Iterator[str]:
+    relation, index = plan.get("Relation Name"), plan.get("Index Name")
+    if relation or index:
+        yield (
+            plan["Node Type"]
+            + (f" on {relation}" if relation else "")
+            + (f" using {index}" if index else "")
+        )
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+def explain(connection: Connection, statement: Executable) -> dict[str, Any]:
+    sql = statement.compile(  # type: ignore[attr-defined]
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    result = connection.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"
+    ).scalar_one()
+    return result[0]  # type: ignore[no-any-return]
+
+
+def measure(repeat: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with engine.connect() as connection:
+        user_id = pick_user(connection)
+        for name, statement in statements(connection, user_id):
+            timings = []
+            for _ in range(repeat):
+                # Roll back after every run so the DELETE finds its rows again
+                savepoint = connection.begin_nested()
+                explained = explain(connection, statement)
+                savepoint.rollback()
+                # Includes the time spent in triggers, i.e. the cascades
+                timings.append(explained["Execution Time"])
+            plan = explained["Plan"]
+            slowest = max(
+                explained.get("Triggers", []), key=lambda t: t["Time"], default=None
+            )
+            results[name] = {
+                "execution_ms": round(statistics.median(timings), 3),
+                "shared_blocks": plan.get("Shared Hit Blocks", 0)
+                + plan.get("Shared Read Blocks", 0),
+                "scans": sorted(set(_scans(plan))),
+                "slowest_trigger": (
+                    f"{slowest['Trigger Name']} ({slowest['Time']:.1f} ms)"
+                    if slowest
+                    else None
+                ),
+            }
+    return results
+
+
+def compare(before: dict[str, Any], after: dict[str, Any]) -> str:
+    lines = [f"{before.get('revision')} -> {after.get('revision')}"]
+    header = f"{'statement':<32}{'execution ms':>28}{'shared blocks':>26}"
+    lines += [header, "-" * len(header)]
+    for name in before["statements"]:
+        if name not in after["statements"]:
+            continue
+        old, new = before["statements"][name], after["statements"][name]
+        a, b = old["execution_ms"], new["execution_ms"]
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        timing = f"{a:>9} -> {b:<9} {change:>7}"
+        blocks = f"{old['shared_blocks']:>9} -> {new['shared_blocks']:<9}"
+        lines.append(f"{name:<32}{timing:>28}{blocks:>26}")
+        for scan in new["scans"]:
+            if scan not in old["scans"]:
+                lines.append(f"    + {scan}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        before, after = (json.loads(path.read_text()) for path in args.compare)
+        print(compare(before, after))
+        return
+
+    report: dict[str, Any] = {
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "statements": measure(args.repeat),
+    }
+    if args.output:
+        write_report(report, args.output)
+    for name, result in report["statements"].items():
+        print(
+            f"{name:<32}{result['execution_ms']:>10} ms  {', '.join(result['scans'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
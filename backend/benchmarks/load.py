@@ -0,0 +1,225 @@
+"""
+Scripted asyncio/httpx load scenarios against a running backend.
+
+Participants sign up, log in, fetch their assignments and submit a response.
+Admins page through templates and export every assignment. Seed the database
+with ``python -m benchmarks.seed`` first so the lists have realistic sizes.
+
+    python -m benchmarks.load --participants 200 --concurrency 20 --output report.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.report import build_report, write_report
+
+API_PREFIX = "/api/v1"
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def request(
+        self, client: httpx.AsyncClient, step: str, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, f"{API_PREFIX}{url}", **kwargs)
+        except httpx.HTTPError:
+            self.errors[step] += 1
+            return None
+        self.samples[step].append(time.perf_counter() - start)
+        if response.is_error:
+            self.errors[step] += 1
+            return None
+        return response
+
+
+async def login(
+    client: httpx.AsyncClient, recorder: Recorder, email: str, password: str
+) -> dict[str, str] | None:
+    r = await recorder.request(
+        client,
+        "login",
+        "POST",
+        "/login/access-token",
+        data={"username": email, "password": password},
+    )
+    if r is None:
+        return None
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def participant_flow(
+    client: httpx.AsyncClient, recorder: Recorder, rng: random.Random
+) -> None:
+    email = f"load-{uuid.uuid4().hex}@example.com"
+    password = uuid.uuid4().hex
+    r = await recorder.request(
+        client,
+        "signup",
+        "POST",
+        "/users/signup",
+        json={"email": email, "password": password},
+    )
+    if r is None:
+        return
+    headers = await login(client, recorder, email, password)
+    if headers is None:
+        return
+    r = await recorder.request(
+        client,
+        "assignments_me",
+        "GET",
+        "/questionnaires/assignments/me",
+        headers=headers,
+    )
+    if r is None:
+        return
+    for summary in r.json()["data"]:
+        if summary["status"] != "PENDING":
+            continue
+        r = await recorder.request(
+            client,
+            "assignment_detail",
+            "GET",
+            f"/questionnaires/assignments/{summary['id']}",
+            headers=headers,
+        )
+        if r is None:
+            continue
+        answers = [
+            {"question_id": question["id"], "likert_value": rng.randint(1, 5)}
+            for question in r.json()["questionnaire"]["questions"]
+        ]
+        await recorder.request(
+            client,
+            "submit_response",
+            "POST",
+            "/questionnaires/responses",
+            headers=headers,
+            json={"assignment_id": summary["id"], "answers": answers},
+        )
+
+
+async def admin_flow(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    headers: dict[str, str],
+    page_size: int,
+    max_pages: int,
+) -> None:
+    await recorder.request(
+        client, "admin_templates", "GET", "/questionnaires/templates", headers=headers
+    )
+    await recorder.request(
+        client,
+        "admin_assignments",
+        "GET",
+        "/questionnaires/assignments",
+        headers=headers,
+        params={"limit": page_size},
+    )
+    # Export: page through every assignment the way a CSV export would,
+    # continuing after the last id of each page
+    params: dict[str, Any] = {"limit": page_size}
+    for _ in range(max_pages):
+        r = await recorder.request(
+            client,
+            "admin_export_page",
+            "GET",
+            "/questionnaires/assignments",
+            headers=headers,
+            params=params,
+        )
+        if r is None or len(r.json()["data"]) < page_size:
+            break
+        params["after"] = r.json()["data"][-1]["id"]
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        admin_headers = await login(
+            client, recorder, args.admin_email, args.admin_password
+        )
+        if admin_headers is None:
+            raise SystemExit("Could not log in as the admin user")
+
+        async def limited(coro: Any) -> None:
+            async with semaphore:
+                await coro
+
+        tasks = [
+            limited(participant_flow(client, recorder, rng))
+            for _ in range(args.participants)
+        ]
+        tasks += [
+            limited(
+                admin_flow(
+                    client, recorder, admin_headers, args.page_size, args.max_pages
+                )
+            )
+            for _ in range(args.admin_iterations)
+        ]
+        rng.shuffle(tasks)
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in {"admin_password", "output"}
+    }
+    return build_report(recorder.samples, dict(recorder.errors), elapsed, config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--admin-iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--admin-email", default=os.getenv("FIRST_SUPERUSER", "admin@example.com")
+    )
+    parser.add_argument(
+        "--admin-password", default=os.getenv("FIRST_SUPERUSER_PASSWORD", "changethis")
+    )
+    parser.add_argument("--output", type=Path, default=Path("benchmark-report.json"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report(report, args.output)
+    total = report["total"]
+    print(
+        f"{total['count']} requests, {total['errors']} errors, "
+        f"{total['throughput_rps']} req/s, p50 {total['p50_ms']} ms, "
+        f"p95 {total['p95_ms']} ms, p99 {total['p99_ms']} ms -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Latency reports for the load scenarios, and a diff between two of them.
+
+    python -m benchmarks.report before.json after.json
+"""
+
+import argparse
+import json
+import math
+import subprocess
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile, stable for the small sample sizes of a quick run."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Sequence[float], errors: int, elapsed: float) -> dict[str, Any]:
+    summary: dict[str, Any] = {
+        "count": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(1000 * sum(samples) / len(samples), 2) if samples else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(1000 * percentile(samples, pct), 2)
+    return summary
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(
+    samples: dict[str, list[float]],
+    errors: dict[str, int],
+    elapsed: float,
+    config: dict[str, Any],
+) -> dict[str, Any]:
+    all_samples = [s for step in samples.values() for s in step]
+    return {
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_samples, sum(errors.values()), elapsed),
+        "steps": {
+            step: summarize(step_samples, errors.get(step, 0), elapsed)
+            for step, step_samples in sorted(samples.items())
+        },
+    }
+
+
+def write_report(report: dict[str, Any], path: Path) -> None:
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def compare(before: dict[str, Any], after: dict[str, Any]) -> str:
+    columns = ["throughput_rps", *(f"p{pct}_ms" for pct in PERCENTILES)]
+    header = f"{'step':<32}" + "".join(f"{c:>28}" for c in columns)
+    lines = [
+        f"{before.get('revision')} -> {after.get('revision')}",
+        header,
+        "-" * len(header),
+    ]
+    rows = {"total": (before["total"], after["total"])}
+    for step in sorted(set(before["steps"]) | set(after["steps"])):
+        if step in before["steps"] and step in after["steps"]:
+            rows[step] = (before["steps"][step], after["steps"][step])
+    for step, (old, new) in rows.items():
+        cells = []
+        for column in columns:
+            a, b = old[column], new[column]
+            change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+            cells.append(f"{a:>8} -> {b:<8} {change:>6}")
+        lines.append(f"{step:<32}" + "".join(f"{c:>28}" for c in cells))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    args = parser.parse_args()
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    print(compare(before, after))
+
+
+if __name__ == "__main__":
+    main()
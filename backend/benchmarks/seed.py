@@ -0,0 +1,172 @@
+"""
+Seed the database with a deterministic synthetic workload for the benchmarks:
+users, questionnaire templates with questions, assignments and responses.
+
+    python -m benchmarks.seed --users 1000 --templates 10 --questions 20
+"""
+
+import argparse
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.core.security import get_password_hash
+from app.models import (
+    Answer,
+    AssignmentStatus,
+    Question,
+    QuestionnaireAssignment,
+    QuestionnaireResponse,
+    QuestionnaireTemplate,
+    ScaleType,
+    User,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCHMARK_PASSWORD = "benchmark-password"
+INITIAL_ASSESSMENT_TITLE = "Initial Assessment"
+BATCH_SIZE = 1000
+
+
+@dataclass
+class SeedSummary:
+    users: int = 0
+    templates: int = 0
+    questions: int = 0
+    assignments: int = 0
+    responses: int = 0
+    answers: int = 0
+
+
+def benchmark_email(prefix: str, index: int) -> str:
+    return f"{prefix}-{index}@example.com"
+
+
+def seed(
+    session: Session,
+    *,
+    users: int,
+    templates: int,
+    questions: int,
+    assignments_per_user: int = 2,
+    completed_ratio: float = 0.5,
+    prefix: str = "bench",
+    seed: int = 0,
+) -> SeedSummary:
+    rng = random.Random(seed)
+    summary = SeedSummary()
+    superuser = session.exec(
+        select(User).where(User.email == settings.FIRST_SUPERUSER)
+    ).one()
+
+    # The first template is the one signup auto-assigns
+    db_templates = []
+    for t in range(templates):
+        template = QuestionnaireTemplate(
+            title=INITIAL_ASSESSMENT_TITLE if t == 0 else f"{prefix} template {t}",
+            description=f"Synthetic template {t}",
+            tags=["onboarding"] if t == 0 else [],
+            created_by_id=superuser.id,
+        )
+        template.questions = [
+            Question(
+                question_text=f"Question {q} of template {t}",
+                order=q,
+                scale_type=ScaleType.LIKERT_5,
+            )
+            for q in range(questions)
+        ]
+        db_templates.append(template)
+    session.add_all(db_templates)
+    session.commit()
+    question_ids = {
+        template.id: [question.id for question in template.questions]
+        for template in db_templates
+    }
+    summary.templates = templates
+    summary.questions = templates * questions
+
+    # Hashing is deliberately slow, so every seeded user shares one hash
+    hashed_password = get_password_hash(BENCHMARK_PASSWORD)
+    pending: list[object] = []
+    for u in range(users):
+        user = User(
+            email=benchmark_email(prefix, u),
+            full_name=f"Benchmark User {u}",
+            hashed_password=hashed_password,
+        )
+        pending.append(user)
+        summary.users += 1
+        for template in rng.sample(db_templates, min(assignments_per_user, templates)):
+            completed = rng.random() < completed_ratio
+            assignment = QuestionnaireAssignment(
+                questionnaire_id=template.id,
+                user_id=user.id,
+                due_date=datetime.utcnow() + timedelta(days=rng.randint(1, 30)),
+                status=AssignmentStatus.COMPLETED
+                if completed
+                else AssignmentStatus.PENDING,
+            )
+            pending.append(assignment)
+            summary.assignments += 1
+            if not completed:
+                continue
+            answers = [
+                Answer(question_id=question_id, likert_value=rng.randint(1, 5))
+                for question_id in question_ids[template.id]
+            ]
+            response = QuestionnaireResponse(
+                assignment_id=assignment.id,
+                user_id=user.id,
+                total_score=sum(answer.likert_value or 0 for answer in answers),
+            )
+            for answer in answers:
+                answer.response_id = response.id
+            pending.append(response)
+            pending.extend(answers)
+            summary.responses += 1
+            summary.answers += len(answers)
+        if len(pending) >= BATCH_SIZE:
+            session.add_all(pending)
+            session.commit()
+            pending.clear()
+    session.add_all(pending)
+    session.commit()
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--templates", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--assignments-per-user", type=int, default=2)
+    parser.add_argument("--completed-ratio", type=float, default=0.5)
+    parser.add_argument("--prefix", default="bench")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        init_db(session)
+        summary = seed(
+            session,
+            users=args.users,
+            templates=args.templates,
+            questions=args.questions,
+            assignments_per_user=args.assignments_per_user,
+            completed_ratio=args.completed_ratio,
+            prefix=args.prefix,
+            seed=args.seed,
+        )
+    logger.info("Seeded %s", summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Serialization time of a page of assignments.
+
+    python -m benchmarks.serialization --rows 100 --questions 10 --output serialization.json
+
+Times how long a page of ``--rows`` assignments, each with its template and
+``--questions`` questions, takes to turn into a response body, the way
+``GET /questionnaires/assignments`` did and does:
+
+- ``models_json``: the page model validated against the route's response
+  model and rendered with the stdlib ``json``, FastAPI's default
+- ``models_orjson``: the same, rendered with orjson
+- ``rows_orjson``: the response dicts built from row tuples with
+  ``RowSerializer`` and rendered with orjson, skipping the models
+
+Only serialization is timed: the page is built in memory, no database is
+needed. All variants must render the same body. The report has
+p50/p95/p99 per variant and the body size.
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.core.ids import uuid7
+from app.core.serialization import RowSerializer, page
+from app.main import app
+from app.models import (
+    Question,
+    QuestionnaireAssignment,
+    QuestionnaireAssignmentPublic,
+    QuestionnaireAssignmentsPublic,
+    QuestionnaireTemplate,
+    QuestionnaireTemplatePublic,
+    QuestionPublic,
+)
+from benchmarks.report import build_report, write_report
+
+assignment_row = RowSerializer(
+    QuestionnaireAssignmentPublic, QuestionnaireAssignment, exclude={"questionnaire"}
+)
+template_row = RowSerializer(
+    QuestionnaireTemplatePublic, QuestionnaireTemplate, exclude={"questions"}
+)
+question_row = RowSerializer(QuestionPublic, Question)
+
+
+def build_page(
+    args: argparse.Namespace,
+) -> tuple[list[QuestionnaireAssignment], dict[str, list[tuple[Any, ...]]]]:
+    """The page as ORM objects, and as the rows the list queries return"""
+    rng = random.Random(args.seed)
+    now = datetime(2025, 1, 1)
+    templates = []
+    for t in range(args.templates):
+        template = QuestionnaireTemplate(
+            id=uuid7(),
+            title=f"Template {t}",
+            description="x" * rng.randint(0, 200),
+            created_by_id=uuid.uuid4(),
+            created_at=now,
+            updated_at=now,
+        )
+        template.questions = [
+            Question(
+                id=uuid7(),
+                questionnaire_id=template.id,
+                question_text=f"Question {q} " + "x" * rng.randint(20, 200),
+                order=q,
+            )
+            for q in range(args.questions)
+        ]
+        templates.append(template)
+    assignments = []
+    for a in range(args.rows):
+        template = rng.choice(templates)
+        assignment = QuestionnaireAssignment(
+            id=uuid7(),
+            questionnaire_id=template.id,
+            user_id=uuid.uuid4(),
+            assigned_at=now + timedelta(seconds=a, microseconds=a),
+            due_date=now + timedelta(days=7),
+        )
+        assignment.questionnaire = template
+        assignments.append(assignment)
+
+    def row(serializer: RowSerializer, obj: Any) -> tuple[Any, ...]:
+        return tuple(getattr(obj, field) for field in serializer.fields)
+
+    used = {assignment.questionnaire_id for assignment in assignments}
+    rows = {
+        "assignments": [row(assignment_row, a) for a in assignments],
+        "templates": [row(template_row, t) for t in templates if t.id in used],
+        "questions": [
+            row(question_row, q) for t in templates if t.id in used for q in t.questions
+        ],
+    }
+    return assignments, rows
+
+
+def render_rows(rows: dict[str, list[tuple[Any, ...]]], count: int) -> bytes:
+    # What the assignment list routes do with the rows of their three queries
+    assignments = [assignment_row.to_dict(row) for row in rows["assignments"]]
+    templates: dict[uuid.UUID, dict[str, Any]] = {}
+    for row in rows["templates"]:
+        template = template_row.to_dict(row)
+        template["questions"] = []
+        templates[template["id"]] = template
+    for row in rows["questions"]:
+        question = question_row.to_dict(row)
+        templates[question["questionnaire_id"]]["questions"].append(question)
+    for assignment in assignments:
+        assignment["questionnaire"] = templates[assignment["questionnaire_id"]]
+    return bytes(page(assignments, count).body)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    route = next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.name == "read_all_assignments"
+    )
+    assignments, rows = build_page(args)
+    count = len(assignments)
+
+    async def render_models(response_class: type[JSONResponse]) -> bytes:
+        content = await serialize_response(
+            field=route.response_field,
+            response_content=QuestionnaireAssignmentsPublic(
+                data=assignments, count=count
+            ),
+        )
+        return bytes(response_class(content).body)
+
+    async def models_json() -> bytes:
+        return await render_models(JSONResponse)
+
+    async def models_orjson() -> bytes:
+        return await render_models(ORJSONResponse)
+
+    async def rows_orjson() -> bytes:
+        return render_rows(rows, count)
+
+    variants = {
+        "models_json": models_json,
+        "models_orjson": models_orjson,
+        "rows_orjson": rows_orjson,
+    }
+    bodies = {name: await variant() for name, variant in variants.items()}
+    if len(set(bodies.values())) != 1:
+        raise SystemExit("The variants render different bodies")
+    samples: dict[str, list[float]] = defaultdict(list)
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        # Interleaved, so drifting clock speeds affect every variant alike
+        for name, variant in variants.items():
+            # Without collections, like timeit, so one variant doesn't pay
+            # for the garbage of another
+            gc.collect()
+            gc.disable()
+            variant_start = time.perf_counter()
+            await variant()
+            samples[name].append(time.perf_counter() - variant_start)
+            gc.enable()
+    elapsed = time.perf_counter() - start
+
+    config: dict[str, Any] = {
+        key: value for key, value in vars(args).items() if key != "output"
+    }
+    report = build_report(samples, {}, elapsed, config)
+    report["body_bytes"] = len(bodies["rows_orjson"])
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--templates", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("serialization.json"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    write_report(report, args.output)
+    for name, summary in report["steps"].items():
+        print(
+            f"{name}: p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, "
+            f"p99 {summary['p99_ms']} ms"
+        )
+    print(f"{report['body_bytes']} bytes per page -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Latency and recall of the similar orientation search.
+
+    python -m benchmarks.similarity --rows 1000000 --output similarity.json
+    python -m benchmarks.similarity --database --output similarity.json
+
+Builds an exact and an approximate (inverted file) vector set over the same
+vectors and times ``--queries`` searches on each, like
+``GET /orientations/{id}/similar`` does for superusers. Vectors are synthetic
+by default: ``--traits`` of ``--dimensions`` traits per orientation with
+random values, like ``app.seed`` generates. ``--database`` loads the
+orientations of the configured database instead. The report adds the build
+time of each set and the recall of the approximate search, the share of the
+exact ``--k`` nearest it finds.
+"""
+
+import argparse
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.similarity import SimilarityIndex, VectorSet
+from benchmarks.report import build_report, write_report
+
+
+def synthetic_rows(args: argparse.Namespace) -> list[tuple[uuid.UUID, bytes]]:
+    rng = np.random.default_rng(args.seed)
+    matrix = np.zeros((args.rows, args.dimensions), dtype=np.uint8)
+    for row in range(args.rows):
+        traits = rng.choice(args.dimensions, args.traits, replace=False)
+        matrix[row, traits] = rng.integers(0, 101, args.traits)
+    return [(uuid.UUID(int=row), matrix[row].tobytes()) for row in range(args.rows)]
+
+
+def database_rows() -> list[tuple[uuid.UUID, bytes]]:
+    from app.core.db import engine
+
+    vectors = SimilarityIndex(engine).refresh()
+    return [
+        (uuid.UUID(bytes=id.tobytes()), row.astype(np.uint8).tobytes())
+        for id, row in zip(vectors.ids, vectors.matrix, strict=True)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=10)
+    parser.add_argument("--traits", type=int, default=5)
+    parser.add_argument("--database", action="store_true")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=settings.ORIENTATION_ANN_PROBES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("similarity.json"))
+    args = parser.parse_args()
+
+    rows = database_rows() if args.database else synthetic_rows(args)
+    print(f"{len(rows)} vectors")
+    build_seconds: dict[str, float] = {}
+    start = time.perf_counter()
+    exact = VectorSet.build(rows, ann_min_rows=len(rows) + 1)
+    build_seconds["exact"] = time.perf_counter() - start
+    start = time.perf_counter()
+    approximate = VectorSet.build(rows, ann_min_rows=0)
+    build_seconds["ann"] = time.perf_counter() - start
+
+    samples: dict[str, list[float]] = defaultdict(list)
+    found = 0
+    rng = np.random.default_rng(args.seed + 1)
+    start = time.perf_counter()
+    for index in rng.choice(len(rows), args.queries, replace=False):
+        id, vector = rows[index]
+        query_start = time.perf_counter()
+        expected = exact.search(vector, args.k, exclude=id)
+        samples["exact"].append(time.perf_counter() - query_start)
+        query_start = time.perf_counter()
+        matches = approximate.search(vector, args.k, exclude=id, probes=args.probes)
+        samples["ann"].append(time.perf_counter() - query_start)
+        # Ties at the k-th distance make any of them a correct answer
+        cutoff = expected[-1][1]
+        found += sum(1 for _, distance in matches if distance <= cutoff + 1e-6)
+    elapsed = time.perf_counter() - start
+
+    config: dict[str, Any] = {
+        key: value for key, value in vars(args).items() if key != "output"
+    }
+    report = build_report(samples, {}, elapsed, config)
+    report["rows"] = len(rows)
+    report["build_s"] = {step: round(s, 2) for step, s in build_seconds.items()}
+    report["clusters"] = (
+        len(approximate.centroids) if approximate.centroids is not None else 0
+    )
+    report["recall"] = round(found / (args.k * args.queries), 4)
+    write_report(report, args.output)
+    for step, summary in report["steps"].items():
+        print(
+            f"{step}: built in {report['build_s'][step]}s, "
+            f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, "
+            f"p99 {summary['p99_ms']} ms"
+        )
+    print(f"recall@{args.k} {report['recall']} over {report['clusters']} clusters")
+    print(f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
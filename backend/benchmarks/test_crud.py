@@ -0,0 +1,106 @@
+"""
+Microbenchmarks for the CRUD layer.
+
+    pytest benchmarks --benchmark-json=crud.json
+"""
+
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlmodel import Session
+
+from app import crud
+from app.models import (
+    AnswerCreate,
+    QuestionCreate,
+    QuestionnaireAssignmentBulkCreate,
+    QuestionnaireAssignmentCreate,
+    QuestionnaireResponseCreate,
+    QuestionnaireTemplate,
+    QuestionnaireTemplateCreate,
+    User,
+    UserCreate,
+)
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def test_create_user(benchmark: BenchmarkFixture, db: Session) -> None:
+    def create() -> None:
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    benchmark.pedantic(create, rounds=20)
+
+
+def test_get_user_by_email(
+    benchmark: BenchmarkFixture, db: Session, user: User
+) -> None:
+    email = user.email
+    result = benchmark(crud.get_user_by_email, session=db, email=email)
+    assert result is not None
+
+
+def test_create_questionnaire_template(
+    benchmark: BenchmarkFixture, db: Session, user: User
+) -> None:
+    template_in = QuestionnaireTemplateCreate(
+        title=random_lower_string(),
+        questions=[
+            QuestionCreate(question_text=random_lower_string(), order=i)
+            for i in range(20)
+        ],
+    )
+    benchmark(
+        crud.create_questionnaire_template,
+        session=db,
+        questionnaire_in=template_in,
+        created_by_id=user.id,
+    )
+
+
+def test_create_questionnaire_assignment(
+    benchmark: BenchmarkFixture, db: Session, template: QuestionnaireTemplate
+) -> None:
+    assignment_in = QuestionnaireAssignmentCreate(
+        questionnaire_id=template.id, user_id=create_random_user(db).id
+    )
+    benchmark(
+        crud.create_questionnaire_assignment, session=db, assignment_in=assignment_in
+    )
+
+
+def test_create_bulk_questionnaire_assignments(
+    benchmark: BenchmarkFixture, db: Session, template: QuestionnaireTemplate
+) -> None:
+    user_ids = [create_random_user(db).id for _ in range(10)]
+    assignment_in = QuestionnaireAssignmentBulkCreate(
+        questionnaire_id=template.id, user_ids=user_ids * 10
+    )
+    benchmark.pedantic(
+        crud.create_bulk_questionnaire_assignments,
+        kwargs={"session": db, "assignment_in": assignment_in},
+        rounds=20,
+    )
+
+
+def test_create_questionnaire_response(
+    benchmark: BenchmarkFixture, db: Session, template: QuestionnaireTemplate
+) -> None:
+    user_id = create_random_user(db).id
+    answers = [
+        AnswerCreate(question_id=question.id, likert_value=3)
+        for question in template.questions
+    ]
+
+    def setup() -> tuple[tuple[()], dict[str, object]]:
+        assignment = crud.create_questionnaire_assignment(
+            session=db,
+            assignment_in=QuestionnaireAssignmentCreate(
+                questionnaire_id=template.id, user_id=user_id
+            ),
+        )
+        response_in = QuestionnaireResponseCreate(
+            assignment_id=assignment.id, answers=answers
+        )
+        return (), {"session": db, "response_in": response_in, "user_id": user_id}
+
+    benchmark.pedantic(crud.create_questionnaire_response, setup=setup, rounds=50)
@@ -0,0 +1,128 @@
+"""
+Insert throughput and primary key size with random and time-ordered ids.
+
+    python -m benchmarks.uuid_keys --rows 1000000 --output uuid_keys.json
+
+Inserts the same answer-shaped rows into two scratch tables, one keyed by
+``uuid.uuid4`` and one by ``app.core.ids.uuid7``, a batch per transaction like
+response submissions do. Reports rows per second, the size and leaf density of
+each primary key index and how many of its blocks had to be read from outside
+shared buffers. The scratch tables are dropped afterwards.
+"""
+
+import argparse
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, cast
+
+import psycopg
+
+from app.core.db import engine
+from app.core.ids import uuid7
+from benchmarks.report import git_revision, write_report
+
+GENERATORS: dict[str, Callable[[], uuid.UUID]] = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+def measure(
+    cursor: psycopg.Cursor[Any],
+    name: str,
+    generate: Callable[[], uuid.UUID],
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    table = f"benchmark_{name}"
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(
+        f"CREATE UNLOGGED TABLE {table} (id uuid PRIMARY KEY, response_id uuid,"
+        " question_id uuid, likert_value integer)"
+    )
+    cursor.connection.commit()
+    rng = random.Random(args.seed)
+    question_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(args.questions)]
+
+    start = time.perf_counter()
+    for _ in range(args.rows // args.batch_size):
+        response_id = uuid.UUID(int=rng.getrandbits(128))
+        cursor.executemany(
+            f"INSERT INTO {table} VALUES (%s, %s, %s, %s)",
+            [
+                (
+                    generate(),
+                    response_id,
+                    question_ids[i % args.questions],
+                    rng.randint(1, 5),
+                )
+                for i in range(args.batch_size)
+            ],
+        )
+        cursor.connection.commit()
+    elapsed = time.perf_counter() - start
+
+    cursor.execute(
+        "SELECT pg_relation_size(indexrelid), idx_blks_read, idx_blks_hit"
+        " FROM pg_statio_user_indexes WHERE relname = %s",
+        (table,),
+    )
+    size, blocks_read, blocks_hit = cast(tuple[int, int, int], cursor.fetchone())
+    result: dict[str, Any] = {
+        "rows_per_s": round(args.rows / elapsed),
+        "duration_s": round(elapsed, 3),
+        "index_mb": round(size / 2**20, 2),
+        "index_blocks_read": blocks_read,
+        "index_blocks_hit": blocks_hit,
+    }
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'")
+    if cursor.fetchone():
+        cursor.execute(
+            "SELECT avg_leaf_density FROM pgstatindex(%s)", (f"{table}_pkey",)
+        )
+        result["leaf_density_pct"] = cast(tuple[float], cursor.fetchone())[0]
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.connection.commit()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=random.randrange(1000, 2**31))
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {}
+    connection = engine.raw_connection()
+    try:
+        driver_connection = cast(psycopg.Connection[Any], connection.driver_connection)
+        with driver_connection.cursor() as cursor:
+            for name, generate in GENERATORS.items():
+                results[name] = measure(cursor, name, generate, args)
+    finally:
+        connection.close()
+
+    columns = list(results["uuid4"])
+    print(f"{'ids':<8}" + "".join(f"{column:>20}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<8}" + "".join(f"{result[c]:>20}" for c in columns))
+    if args.output:
+        write_report(
+            {
+                "revision": git_revision(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "config": {k: v for k, v in vars(args).items() if k != "output"},
+                "ids": results,
+            },
+            args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()